@@ -0,0 +1,156 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+from psycopg.errors import Error
+
+from .config import settings
+from .db import get_pool
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    media_type: str
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+class CacheBackend(Protocol):
+    """Storage behind ResponseCache.
+
+    The in-process MemoryBackend is the default; a shared backend (e.g. Redis)
+    only needs these methods to be plugged in with ``set_cache_backend``.
+    """
+
+    async def get(self, key: str) -> CachedResponse | None: ...
+
+    async def set(self, key: str, value: CachedResponse) -> None: ...
+
+    def stats(self) -> dict[str, int]: ...
+
+
+class MemoryBackend:
+    """LRU cache with a per-entry TTL, bounded by entry count."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> CachedResponse | None:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: CachedResponse) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class ResponseCache:
+    """Serialized responses keyed by data version, so a load invalidates all of them.
+
+    The data version is read from the ``data_version`` table at most once per
+    ``version_check_seconds``; load jobs bump it when they change rows.
+    """
+
+    def __init__(self, backend: CacheBackend | None, version_check_seconds: float) -> None:
+        self.backend = backend
+        self.version_check_seconds = version_check_seconds
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._version: int | None = None
+        self._version_checked_at = float("-inf")
+
+    async def data_version(self) -> int | None:
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_seconds:
+            return self._version
+        try:
+            async with get_pool().connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT version FROM data_version WHERE id = 1")
+                    row = await cur.fetchone()
+            self._version = row[0] if row else None
+        except Error:
+            # No version means no caching; the handler reports the outage itself.
+            self._version = None
+        self._version_checked_at = now
+        return self._version
+
+    async def get(self, key: str) -> tuple[str | None, CachedResponse | None]:
+        """Return (versioned key, cached response); the key is None when caching is off."""
+        if self.backend is None:
+            return None, None
+        version = await self.data_version()
+        if version is None:
+            return None, None
+        versioned_key = f"{version}|{key}"
+        value = await self.backend.get(versioned_key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return versioned_key, value
+
+    async def set(self, versioned_key: str, value: CachedResponse) -> None:
+        if self.backend is not None:
+            await self.backend.set(versioned_key, value)
+
+    def metrics(self) -> dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.backend is not None,
+            "data_version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            **(self.backend.stats() if self.backend is not None else {}),
+        }
+
+
+def _default_backend() -> CacheBackend | None:
+    if not settings.cache_enabled:
+        return None
+    return MemoryBackend(settings.cache_max_entries, settings.cache_ttl_seconds)
+
+
+response_cache = ResponseCache(_default_backend(), settings.cache_version_check_seconds)
+
+
+def set_cache_backend(backend: CacheBackend | None) -> ResponseCache:
+    global response_cache
+    response_cache = ResponseCache(backend, settings.cache_version_check_seconds)
+    return response_cache
+
+
+def get_response_cache() -> ResponseCache:
+    return response_cache
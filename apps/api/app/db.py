@@ -1,151 +1,452 @@
+from collections.abc import AsyncIterator
 from datetime import date
+from decimal import Decimal
 
-from psycopg import connect
 from psycopg.errors import Error
+from psycopg_pool import AsyncConnectionPool, PoolClosed
 
 from .config import settings
+from .pagination import encode_cursor
 
+_pool: AsyncConnectionPool | None = None
 
-def check_db_connection() -> tuple[bool, str]:
+
+async def open_pool() -> AsyncConnectionPool:
+    global _pool
+    if _pool is None:
+        check = AsyncConnectionPool.check_connection if settings.db_pool_check_connections else None
+        _pool = AsyncConnectionPool(
+            settings.database_url,
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            timeout=settings.db_pool_timeout_seconds,
+            max_idle=settings.db_pool_max_idle_seconds,
+            max_lifetime=settings.db_pool_max_lifetime_seconds,
+            check=check,
+            name="methane-api",
+            open=False,
+        )
+        # Don't block startup on the database: the pool keeps retrying in the
+        # background and requests fail fast with a 503 until it is reachable.
+        await _pool.open(wait=False)
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def get_pool() -> AsyncConnectionPool:
+    if _pool is None:
+        raise PoolClosed("database connection pool is not open")
+    return _pool
+
+
+async def check_db_connection() -> tuple[bool, str]:
     try:
-        with connect(settings.database_url) as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
-                cur.fetchone()
+        async with get_pool().connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT 1")
+                await cur.fetchone()
         return True, "connected"
     except Error as exc:
         return False, str(exc)
 
 
-def list_emitters() -> list[dict[str, object]]:
-    with connect(settings.database_url) as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                    id,
-                    name,
-                    confidence,
-                    detection_count,
-                    last_seen::text,
-                    ST_Y(geom) AS latitude,
-                    ST_X(geom) AS longitude
-                FROM emitters
-                ORDER BY confidence DESC, id ASC
-                """
-            )
-            rows = cur.fetchall()
+# EMIT confirmations per emitter, counted through
+# idx_confirmations_emitter_observed; the aggregate always yields one row.
+CONFIRMATIONS_SQL = """
+    SELECT count(*) AS confirmation_count, max(c.observed_on) AS last_confirmed_on
+    FROM confirmations AS c
+    WHERE c.emitter_id = {emitter_id}
+"""
 
-    return [
-        {
-            "id": row[0],
-            "name": row[1],
-            "confidence": float(row[2]),
-            "detection_count": row[3],
-            "last_seen": row[4],
-            "latitude": float(row[5]),
-            "longitude": float(row[6]),
-        }
-        for row in rows
-    ]
-
-
-def get_emitter_with_evidence(emitter_id: str) -> dict[str, object] | None:
-    with connect(settings.database_url) as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                    id,
-                    name,
-                    confidence,
-                    detection_count,
-                    last_seen::text,
-                    ST_Y(geom) AS latitude,
-                    ST_X(geom) AS longitude
-                FROM emitters
-                WHERE id = %s
-                """,
-                (emitter_id,),
-            )
-            emitter_row = cur.fetchone()
+EMITTERS_SQL = """
+    SELECT
+        id,
+        name,
+        confidence,
+        detection_count,
+        last_seen::text,
+        ST_Y(geom) AS latitude,
+        ST_X(geom) AS longitude,
+        confirmed.confirmation_count,
+        confirmed.last_confirmed_on::text
+    FROM emitters
+    CROSS JOIN LATERAL ({confirmations}) AS confirmed
+""".format(confirmations=CONFIRMATIONS_SQL.format(emitter_id="emitters.id"))
 
-            if emitter_row is None:
-                return None
+HOTSPOTS_SQL = """
+    SELECT
+        id,
+        emitter_id,
+        observed_on::text,
+        anomaly_score,
+        area_km2,
+        pixel_count,
+        qa_pass_ratio,
+        ST_Y(ST_Centroid(geom)) AS centroid_latitude,
+        ST_X(ST_Centroid(geom)) AS centroid_longitude
+    FROM hotspots
+"""
+
+
+def _emitter_record(row: tuple) -> dict[str, object]:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "confidence": float(row[2]),
+        "detection_count": row[3],
+        "last_seen": row[4],
+        "latitude": float(row[5]),
+        "longitude": float(row[6]),
+        "confirmed": row[7] > 0,
+        "confirmation_count": row[7],
+        "last_confirmed_on": row[8],
+    }
+
+
+def _hotspot_record(row: tuple) -> dict[str, object]:
+    return {
+        "id": row[0],
+        "emitter_id": row[1],
+        "observed_on": row[2],
+        "anomaly_score": float(row[3]),
+        "area_km2": float(row[4]),
+        "pixel_count": row[5],
+        "qa_pass_ratio": float(row[6]),
+        "centroid_latitude": float(row[7]),
+        "centroid_longitude": float(row[8]),
+    }
+
+
+def _keyset_query(
+    base: str,
+    filters: list[str],
+    params: tuple[object, ...],
+    sort_column: str,
+    after: tuple[Decimal, str] | None,
+    limit: int | None,
+) -> tuple[str, tuple[object, ...]]:
+    # Lists are ordered by (<sort_column> DESC, id ASC). Mixed directions rule
+    # out a row comparison, so the seek is spelled out; both forms are
+    # appended only when needed so every variant stays index-friendly.
+    if after is not None:
+        filters = [*filters, f"({sort_column} < %s OR ({sort_column} = %s AND id > %s))"]
+        params += (after[0], after[0], after[1])
+    query = base
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+    query += f" ORDER BY {sort_column} DESC, id ASC"
+    if limit is not None:
+        query += " LIMIT %s"
+        params += (limit,)
+    return query, params
+
+
+def _emitters_query(
+    after: tuple[Decimal, str] | None, limit: int | None
+) -> tuple[str, tuple[object, ...]]:
+    return _keyset_query(EMITTERS_SQL, [], (), "confidence", after, limit)
+
+
+def _hotspots_query(
+    start: date,
+    end: date,
+    bbox: tuple[float, float, float, float] | None,
+    after: tuple[Decimal, str] | None,
+    limit: int | None,
+) -> tuple[str, tuple[object, ...]]:
+    # The bbox filter is a plain `geom && envelope` so the planner can use
+    # idx_hotspots_geom.
+    filters = ["observed_on BETWEEN %s AND %s"]
+    params: tuple[object, ...] = (start, end)
+    if bbox is not None:
+        filters.append("geom && ST_MakeEnvelope(%s, %s, %s, %s, 4326)")
+        params += bbox
+    return _keyset_query(HOTSPOTS_SQL, filters, params, "anomaly_score", after, limit)
 
-            cur.execute(
-                """
-                SELECT
-                    id,
-                    observed_on::text,
-                    anomaly_score,
-                    area_km2,
-                    pixel_count,
-                    qa_pass_ratio
-                FROM hotspots
-                WHERE emitter_id = %s
-                ORDER BY observed_on DESC, id ASC
-                """,
-                (emitter_id,),
-            )
-            hotspot_rows = cur.fetchall()
+
+async def _fetch_rows(query: str, params: tuple[object, ...]) -> list[tuple]:
+    async with get_pool().connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, params)
+            return await cur.fetchall()
+
+
+async def _fetch_records(query: str, params: tuple[object, ...], record) -> list[dict[str, object]]:
+    return [record(row) for row in await _fetch_rows(query, params)]
+
+
+def _page(
+    rows: list[tuple], limit: int | None, sort_index: int, record
+) -> tuple[list[dict[str, object]], str | None]:
+    # Queries fetch limit + 1 rows; the extra row only signals another page.
+    # The cursor takes the sort column straight from the row, as the Decimal
+    # psycopg returns for NUMERIC, not the float the record carries.
+    if limit is None or len(rows) <= limit:
+        return [record(row) for row in rows], None
+    rows = rows[:limit]
+    return [record(row) for row in rows], encode_cursor(rows[-1][sort_index], rows[-1][0])
+
+
+async def _stream_records(
+    name: str, query: str, params: tuple[object, ...], record
+) -> AsyncIterator[dict[str, object]]:
+    # Server-side cursor: rows arrive in batches of stream_fetch_rows, so memory
+    # stays flat however many rows match.
+    async with get_pool().connection() as conn:
+        async with conn.cursor(name=name) as cur:
+            cur.itersize = settings.stream_fetch_rows
+            await cur.execute(query, params)
+            async for row in cur:
+                yield record(row)
+
+
+async def list_emitters(
+    limit: int | None = None, after: tuple[Decimal, str] | None = None
+) -> tuple[list[dict[str, object]], str | None]:
+    """One page of emitters and the cursor for the next page (None on the last)."""
+    query, params = _emitters_query(after, None if limit is None else limit + 1)
+    return _page(await _fetch_rows(query, params), limit, 2, _emitter_record)
+
+
+def iter_emitters(after: tuple[Decimal, str] | None = None) -> AsyncIterator[dict[str, object]]:
+    query, params = _emitters_query(after, None)
+    return _stream_records("emitters_stream", query, params, _emitter_record)
+
+
+def _emitter_detail_query(
+    emitter_id: str, limit: int | None, since: date | None
+) -> tuple[str, tuple[object, ...]]:
+    # One round trip: the emitter row LEFT JOIN LATERAL its newest evidence,
+    # which idx_hotspots_emitter_observed serves as an ordered range scan that
+    # stops at the limit. An emitter without evidence still yields one row.
+    evidence_filters = "h.emitter_id = e.id"
+    evidence_params: tuple[object, ...] = ()
+    if since is not None:
+        evidence_filters += " AND h.observed_on >= %s"
+        evidence_params += (since,)
+    evidence_limit = ""
+    if limit is not None:
+        evidence_limit = "LIMIT %s"
+        evidence_params += (limit,)
+
+    query = f"""
+        SELECT
+            e.id,
+            e.name,
+            e.confidence,
+            e.detection_count,
+            e.last_seen::text,
+            ST_Y(e.geom) AS latitude,
+            ST_X(e.geom) AS longitude,
+            confirmed.confirmation_count,
+            confirmed.last_confirmed_on::text,
+            evidence.id,
+            evidence.observed_on::text,
+            evidence.anomaly_score,
+            evidence.area_km2,
+            evidence.pixel_count,
+            evidence.qa_pass_ratio
+        FROM emitters AS e
+        CROSS JOIN LATERAL ({CONFIRMATIONS_SQL.format(emitter_id="e.id")}) AS confirmed
+        LEFT JOIN LATERAL (
+            SELECT h.id, h.observed_on, h.anomaly_score, h.area_km2, h.pixel_count, h.qa_pass_ratio
+            FROM hotspots AS h
+            WHERE {evidence_filters}
+            ORDER BY h.observed_on DESC, h.id ASC
+            {evidence_limit}
+        ) AS evidence ON true
+        WHERE e.id = %s
+        ORDER BY evidence.observed_on DESC, evidence.id ASC
+    """
+    return query, (*evidence_params, emitter_id)
+
+
+async def get_emitter_with_evidence(
+    emitter_id: str, limit: int | None = None, since: date | None = None
+) -> dict[str, object] | None:
+    query, params = _emitter_detail_query(emitter_id, limit, since)
+    async with get_pool().connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, params)
+            rows = await cur.fetchall()
+
+    if not rows:
+        return None
 
     return {
-        "id": emitter_row[0],
-        "name": emitter_row[1],
-        "confidence": float(emitter_row[2]),
-        "detection_count": emitter_row[3],
-        "last_seen": emitter_row[4],
-        "latitude": float(emitter_row[5]),
-        "longitude": float(emitter_row[6]),
+        **_emitter_record(rows[0]),
         "hotspot_evidence": [
             {
-                "hotspot_id": row[0],
-                "observed_on": row[1],
-                "anomaly_score": float(row[2]),
-                "area_km2": float(row[3]),
-                "pixel_count": row[4],
-                "qa_pass_ratio": float(row[5]),
+                "hotspot_id": row[9],
+                "observed_on": row[10],
+                "anomaly_score": float(row[11]),
+                "area_km2": float(row[12]),
+                "pixel_count": row[13],
+                "qa_pass_ratio": float(row[14]),
             }
-            for row in hotspot_rows
+            for row in rows
+            if row[9] is not None
         ],
     }
 
 
-def list_hotspots_by_date(observed_on: date) -> list[dict[str, object]]:
-    with connect(settings.database_url) as conn:
-        with conn.cursor() as cur:
-            cur.execute(
+async def list_hotspots(
+    start: date,
+    end: date,
+    bbox: tuple[float, float, float, float] | None = None,
+    limit: int | None = None,
+    after: tuple[Decimal, str] | None = None,
+) -> tuple[list[dict[str, object]], str | None]:
+    """One page of hotspots and the cursor for the next page (None on the last)."""
+    query, params = _hotspots_query(start, end, bbox, after, None if limit is None else limit + 1)
+    return _page(await _fetch_rows(query, params), limit, 3, _hotspot_record)
+
+
+def iter_hotspots(
+    start: date,
+    end: date,
+    bbox: tuple[float, float, float, float] | None = None,
+    after: tuple[Decimal, str] | None = None,
+) -> AsyncIterator[dict[str, object]]:
+    query, params = _hotspots_query(start, end, bbox, after, None)
+    return _stream_records("hotspots_stream", query, params, _hotspot_record)
+
+
+async def get_hotspot_tile(z: int, x: int, y: int, start: date, end: date) -> bytes:
+    async with get_pool().connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
                 """
-                SELECT
-                    id,
-                    emitter_id,
-                    observed_on::text,
-                    anomaly_score,
-                    area_km2,
-                    pixel_count,
-                    qa_pass_ratio,
-                    ST_Y(ST_Centroid(geom)) AS centroid_latitude,
-                    ST_X(ST_Centroid(geom)) AS centroid_longitude
-                FROM hotspots
-                WHERE observed_on = %s
-                ORDER BY anomaly_score DESC, id ASC
+                WITH bounds AS (
+                    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS tile
+                ),
+                features AS (
+                    SELECT
+                        ST_AsMVTGeom(ST_Transform(h.geom, 3857), bounds.tile) AS geom,
+                        h.id,
+                        h.emitter_id,
+                        h.observed_on::text AS observed_on,
+                        h.anomaly_score::float8 AS anomaly_score,
+                        h.area_km2::float8 AS area_km2,
+                        h.pixel_count
+                    FROM hotspots AS h, bounds
+                    WHERE h.geom && ST_Transform(bounds.tile, 4326)
+                      AND h.observed_on BETWEEN %(start)s AND %(end)s
+                )
+                SELECT ST_AsMVT(features.*, 'hotspots', 4096, 'geom')
+                FROM features
+                WHERE geom IS NOT NULL
                 """,
-                (observed_on,),
+                {"z": z, "x": x, "y": y, "start": start, "end": end},
             )
-            rows = cur.fetchall()
-
-    return [
-        {
-            "id": row[0],
-            "emitter_id": row[1],
-            "observed_on": row[2],
-            "anomaly_score": float(row[3]),
-            "area_km2": float(row[4]),
-            "pixel_count": row[5],
-            "qa_pass_ratio": float(row[6]),
-            "centroid_latitude": float(row[7]),
-            "centroid_longitude": float(row[8]),
-        }
-        for row in rows
-    ]
+            row = await cur.fetchone()
+
+    return bytes(row[0]) if row and row[0] is not None else b""
+
+
+EMITTER_STATS_SORTS = ("hotspot_count", "max_anomaly_score", "hotspots_last_30d")
+
+
+async def list_daily_summaries(start: date, end: date) -> list[dict[str, object]]:
+    return await _fetch_records(
+        """
+        SELECT
+            observed_on::text,
+            hotspot_count,
+            linked_count,
+            total_area_km2,
+            mean_anomaly_score,
+            max_anomaly_score
+        FROM hotspot_daily_summary
+        WHERE observed_on BETWEEN %s AND %s
+        ORDER BY observed_on
+        """,
+        (start, end),
+        lambda row: {
+            "observed_on": row[0],
+            "hotspot_count": row[1],
+            "linked_count": row[2],
+            "total_area_km2": float(row[3]),
+            "mean_anomaly_score": float(row[4]),
+            "max_anomaly_score": float(row[5]),
+        },
+    )
+
+
+async def list_aoi_summaries(
+    start: date, end: date, aoi: str | None = None
+) -> list[dict[str, object]]:
+    query = """
+        SELECT
+            aoi,
+            observed_on::text,
+            hotspot_count,
+            mean_anomaly_score,
+            p50_anomaly_score,
+            p90_anomaly_score,
+            max_anomaly_score
+        FROM aoi_daily_summary
+        WHERE observed_on BETWEEN %s AND %s
+    """
+    params: tuple[object, ...] = (start, end)
+    if aoi is not None:
+        query += " AND aoi = %s"
+        params += (aoi,)
+    query += " ORDER BY aoi, observed_on"
+    return await _fetch_records(
+        query,
+        params,
+        lambda row: {
+            "aoi": row[0],
+            "observed_on": row[1],
+            "hotspot_count": row[2],
+            "mean_anomaly_score": float(row[3]),
+            "p50_anomaly_score": float(row[4]),
+            "p90_anomaly_score": float(row[5]),
+            "max_anomaly_score": float(row[6]),
+        },
+    )
+
+
+async def list_top_emitter_stats(sort: str, limit: int) -> list[dict[str, object]]:
+    if sort not in EMITTER_STATS_SORTS:
+        raise ValueError(f"unsupported emitter stats sort: {sort}")
+    # Each sort key has a (key DESC, emitter_id) index, so top-N is an index scan.
+    return await _fetch_records(
+        f"""
+        SELECT
+            s.emitter_id,
+            e.name,
+            s.hotspot_count,
+            s.detection_days,
+            s.first_seen::text,
+            s.last_seen::text,
+            s.hotspots_last_30d,
+            s.mean_anomaly_score,
+            s.max_anomaly_score,
+            s.total_area_km2
+        FROM emitter_stats AS s
+        JOIN emitters AS e ON e.id = s.emitter_id
+        ORDER BY s.{sort} DESC, s.emitter_id ASC
+        LIMIT %s
+        """,
+        (limit,),
+        lambda row: {
+            "emitter_id": row[0],
+            "name": row[1],
+            "hotspot_count": row[2],
+            "detection_days": row[3],
+            "first_seen": row[4],
+            "last_seen": row[5],
+            "hotspots_last_30d": row[6],
+            "mean_anomaly_score": float(row[7]),
+            "max_anomaly_score": float(row[8]),
+            "total_area_km2": float(row[9]),
+        },
+    )
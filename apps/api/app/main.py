@@ -1,20 +1,70 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from datetime import date
+from decimal import Decimal
+from typing import Literal
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from psycopg.errors import Error
+from pydantic_core import to_json
 
+from .cache import CachedResponse, get_response_cache, make_etag
 from .config import (
+    AoiSummaryResponse,
+    DailySummaryResponse,
     DBHealthResponse,
     EmitterDetailResponse,
     EmittersResponse,
+    EmitterStatsResponse,
     HealthResponse,
     HotspotsResponse,
+    MetricsResponse,
     VersionResponse,
     settings,
 )
-from .db import check_db_connection, get_emitter_with_evidence, list_emitters, list_hotspots_by_date
+from .db import (
+    check_db_connection,
+    close_pool,
+    get_emitter_with_evidence,
+    get_hotspot_tile,
+    iter_emitters,
+    iter_hotspots,
+    list_aoi_summaries,
+    list_daily_summaries,
+    list_emitters,
+    list_hotspots,
+    list_top_emitter_stats,
+    open_pool,
+)
+from .pagination import decode_cursor
+
+JSON_MEDIA_TYPE = "application/json"
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+MAX_TILE_ZOOM = 22
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_RESPONSES = {200: {"content": {NDJSON_MEDIA_TYPE: {}}}}
+
+ListFormat = Literal["json", "ndjson"]
+EmitterStatsSort = Literal["hotspot_count", "max_anomaly_score", "hotspots_last_30d"]
+PageLimit = Query(
+    default=None,
+    ge=1,
+    le=settings.page_max_limit,
+    description="Page size; omit both limit and cursor for every row in one response",
+)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    await open_pool()
+    try:
+        yield
+    finally:
+        await close_pool()
 
-app = FastAPI(title="Methane Hotspot API", version=settings.app_version)
+
+app = FastAPI(title="Methane Hotspot API", version=settings.app_version, lifespan=lifespan)
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -28,40 +78,269 @@ def version() -> VersionResponse:
 
 
 @app.get("/db/health", response_model=DBHealthResponse)
-def db_health() -> DBHealthResponse:
-    connected, detail = check_db_connection()
+async def db_health() -> DBHealthResponse:
+    connected, detail = await check_db_connection()
     status = "ok" if connected else "error"
     return DBHealthResponse(status=status, detail=detail)
 
 
-@app.get("/emitters", response_model=EmittersResponse)
-def get_emitters() -> EmittersResponse:
+@app.get("/metrics", response_model=MetricsResponse)
+def metrics() -> MetricsResponse:
+    return MetricsResponse(cache=get_response_cache().metrics())
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+async def _cached_response(
+    request: Request,
+    render: Callable[[], Awaitable[bytes]],
+    media_type: str = JSON_MEDIA_TYPE,
+) -> Response:
+    """Serve a rendered body from the response cache, honouring If-None-Match.
+
+    ``render`` runs only on a miss; errors it raises (404/503) are not cached.
+    JSON bodies are serialized straight from the typed records ``db.py``
+    builds, skipping per-row model validation; the route's ``response_model``
+    still documents the schema.
+    """
+    cache = get_response_cache()
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+    versioned_key, cached = await cache.get(key)
+    if cached is None:
+        body = await render()
+        cached = CachedResponse(body=body, media_type=media_type, etag=make_etag(body))
+        if versioned_key is not None:
+            await cache.set(versioned_key, cached)
+
+    headers = {"ETag": cached.etag}
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type=cached.media_type, headers=headers)
+
+
+def _decode_after(cursor: str | None) -> tuple[Decimal, str] | None:
+    if cursor is None:
+        return None
     try:
-        emitters = list_emitters()
-    except Error as exc:
-        raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
+        return decode_cursor(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
 
-    return EmittersResponse(emitters=emitters)
 
+def _page_limit(limit: int | None, cursor: str | None) -> int | None:
+    # Lists stay unpaged unless the client opts in, so existing consumers still
+    # get every row; a cursor alone continues at the default page size.
+    if limit is None and cursor is not None:
+        return settings.page_default_limit
+    return limit
 
-@app.get("/emitters/{emitter_id}", response_model=EmitterDetailResponse)
-def get_emitter(emitter_id: str) -> EmitterDetailResponse:
+
+async def _ndjson_response(records: AsyncIterator[dict[str, object]]) -> StreamingResponse:
+    # Pull the first row before committing to a 200, so pool and query errors
+    # still surface as 503 instead of a truncated stream.
     try:
-        emitter = get_emitter_with_evidence(emitter_id)
+        first = await anext(records, None)
     except Error as exc:
         raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
 
-    if emitter is None:
-        raise HTTPException(status_code=404, detail=f"emitter not found: {emitter_id}")
+    async def lines() -> AsyncIterator[bytes]:
+        if first is None:
+            return
+        yield to_json(first) + b"\n"
+        async for record in records:
+            yield to_json(record) + b"\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
 
-    return EmitterDetailResponse(emitter=emitter)
 
+@app.get("/emitters", response_model=EmittersResponse, responses=NDJSON_RESPONSES)
+async def get_emitters(
+    request: Request,
+    limit: int | None = PageLimit,
+    cursor: str | None = None,
+    output_format: ListFormat = Query(default="json", alias="format"),
+) -> Response:
+    after = _decode_after(cursor)
+    if output_format == "ndjson":
+        return await _ndjson_response(iter_emitters(after))
+    limit = _page_limit(limit, cursor)
+
+    async def render() -> bytes:
+        try:
+            emitters, next_cursor = await list_emitters(limit, after)
+        except Error as exc:
+            raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
+
+        return to_json({"emitters": emitters, "next_cursor": next_cursor})
+
+    return await _cached_response(request, render)
+
+
+@app.get("/emitters/{emitter_id}", response_model=EmitterDetailResponse)
+async def get_emitter(
+    request: Request,
+    emitter_id: str,
+    limit: int = Query(
+        default=settings.evidence_default_limit,
+        ge=1,
+        le=settings.evidence_max_limit,
+        description="Newest hotspot evidence rows to return",
+    ),
+    since: date | None = Query(default=None, description="Only evidence observed on/after"),
+) -> Response:
+    async def render() -> bytes:
+        try:
+            emitter = await get_emitter_with_evidence(emitter_id, limit, since)
+        except Error as exc:
+            raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
+
+        if emitter is None:
+            raise HTTPException(status_code=404, detail=f"emitter not found: {emitter_id}")
 
-@app.get("/hotspots", response_model=HotspotsResponse)
-def get_hotspots(observed_on: date = Query(alias="date")) -> HotspotsResponse:
+        return to_json({"emitter": emitter})
+
+    return await _cached_response(request, render)
+
+
+def _date_range(
+    observed_on: date | None, start: date | None, end: date | None
+) -> tuple[date, date]:
+    if observed_on is not None:
+        if start is not None or end is not None:
+            raise HTTPException(status_code=422, detail="use either date or start/end, not both")
+        return observed_on, observed_on
+    if start is None or end is None:
+        raise HTTPException(status_code=422, detail="date or both start and end are required")
+    if start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+    return start, end
+
+
+def _parse_bbox(bbox: str | None) -> tuple[float, float, float, float] | None:
+    if bbox is None:
+        return None
     try:
-        hotspots = list_hotspots_by_date(observed_on)
-    except Error as exc:
-        raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError as exc:
+        detail = "bbox must be minLon,minLat,maxLon,maxLat"
+        raise HTTPException(status_code=422, detail=detail) from exc
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=422, detail=f"bbox out of range or inverted: {bbox}")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+@app.get("/hotspots", response_model=HotspotsResponse, responses=NDJSON_RESPONSES)
+async def get_hotspots(
+    request: Request,
+    observed_on: date | None = Query(default=None, alias="date"),
+    start: date | None = None,
+    end: date | None = None,
+    bbox: str | None = Query(default=None, description="minLon,minLat,maxLon,maxLat in EPSG:4326"),
+    limit: int | None = PageLimit,
+    cursor: str | None = None,
+    output_format: ListFormat = Query(default="json", alias="format"),
+) -> Response:
+    start, end = _date_range(observed_on, start, end)
+    bounds = _parse_bbox(bbox)
+    after = _decode_after(cursor)
+    if output_format == "ndjson":
+        return await _ndjson_response(iter_hotspots(start, end, bounds, after))
+    limit = _page_limit(limit, cursor)
+
+    async def render() -> bytes:
+        try:
+            hotspots, next_cursor = await list_hotspots(start, end, bounds, limit, after)
+        except Error as exc:
+            raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
+
+        return to_json({"hotspots": hotspots, "next_cursor": next_cursor})
+
+    return await _cached_response(request, render)
+
+
+@app.get(
+    "/tiles/hotspots/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}},
+)
+async def get_hotspots_tile(
+    request: Request,
+    z: int,
+    x: int,
+    y: int,
+    observed_on: date | None = Query(default=None, alias="date"),
+    start: date | None = None,
+    end: date | None = None,
+) -> Response:
+    if not (0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z):
+        raise HTTPException(status_code=422, detail=f"invalid tile coordinates: {z}/{x}/{y}")
+    start, end = _date_range(observed_on, start, end)
+
+    async def render() -> bytes:
+        try:
+            return await get_hotspot_tile(z, x, y, start, end)
+        except Error as exc:
+            raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
+
+    return await _cached_response(request, render, MVT_MEDIA_TYPE)
+
+
+@app.get("/summaries/daily", response_model=DailySummaryResponse)
+async def get_daily_summaries(
+    request: Request,
+    observed_on: date | None = Query(default=None, alias="date"),
+    start: date | None = None,
+    end: date | None = None,
+) -> Response:
+    start, end = _date_range(observed_on, start, end)
+
+    async def render() -> bytes:
+        try:
+            days = await list_daily_summaries(start, end)
+        except Error as exc:
+            raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
+        return to_json({"days": days})
+
+    return await _cached_response(request, render)
+
+
+@app.get("/summaries/aois", response_model=AoiSummaryResponse)
+async def get_aoi_summaries(
+    request: Request,
+    observed_on: date | None = Query(default=None, alias="date"),
+    start: date | None = None,
+    end: date | None = None,
+    aoi: str | None = None,
+) -> Response:
+    start, end = _date_range(observed_on, start, end)
+
+    async def render() -> bytes:
+        try:
+            aois = await list_aoi_summaries(start, end, aoi)
+        except Error as exc:
+            raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
+        return to_json({"aois": aois})
+
+    return await _cached_response(request, render)
+
+
+@app.get("/summaries/emitters", response_model=EmitterStatsResponse)
+async def get_emitter_stats(
+    request: Request,
+    sort: EmitterStatsSort = "hotspot_count",
+    limit: int = Query(default=10, ge=1, le=settings.page_max_limit),
+) -> Response:
+    async def render() -> bytes:
+        try:
+            emitters = await list_top_emitter_stats(sort, limit)
+        except Error as exc:
+            raise HTTPException(status_code=503, detail=f"database unavailable: {exc}") from exc
+        return to_json({"emitters": emitters})
 
-    return HotspotsResponse(hotspots=hotspots)
+    return await _cached_response(request, render)
@@ -0,0 +1,27 @@
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+
+
+def encode_cursor(sort_value: Decimal, row_id: str) -> str:
+    """Opaque keyset cursor for the last row of a page.
+
+    ``sort_value`` is the row's NUMERIC sort column as psycopg returns it (a
+    Decimal, never the float shown in the response). It travels as its decimal
+    string, so the next page compares the exact stored value and the keyset
+    predicate stays index-friendly.
+    """
+    payload = json.dumps([str(sort_value), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Decimal, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        decoded = Decimal(sort_value)
+    except (ValueError, TypeError, InvalidOperation) as exc:
+        raise ValueError(f"invalid cursor: {cursor}") from exc
+    if not decoded.is_finite() or not isinstance(row_id, str):
+        raise ValueError(f"invalid cursor: {cursor}")
+    return decoded, row_id
@@ -0,0 +1,91 @@
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+from pydantic_core import to_json
+
+from app.config import HotspotsResponse
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare /hotspots serialization paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def synthetic_hotspots(count: int) -> list[dict[str, object]]:
+    # Same shape and types as db._hotspot_record output.
+    return [
+        {
+            "id": f"hs-obs-{idx:08d}",
+            "emitter_id": f"em-{idx % 997:03d}" if idx % 3 else None,
+            "observed_on": "2026-02-12",
+            "anomaly_score": 40.0 + (idx % 5000) / 100,
+            "area_km2": 25.893,
+            "pixel_count": 1 + idx % 40,
+            "qa_pass_ratio": 0.75,
+            "centroid_latitude": 31.0 + (idx % 1000) / 500,
+            "centroid_longitude": -104.0 + (idx % 777) / 300,
+        }
+        for idx in range(count)
+    ]
+
+
+def fastapi_default(rows: list[dict[str, object]]) -> bytes:
+    # What returning the model from a response_model route did: validate, dump
+    # to JSON-safe Python, then json.dumps in JSONResponse.render.
+    payload = HotspotsResponse(hotspots=rows, next_cursor=None).model_dump(mode="json")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def validated_model(rows: list[dict[str, object]]) -> bytes:
+    return HotspotsResponse(hotspots=rows, next_cursor=None).model_dump_json().encode()
+
+
+def stdlib_json(rows: list[dict[str, object]]) -> bytes:
+    return json.dumps({"hotspots": rows, "next_cursor": None}).encode()
+
+
+def fast_path(rows: list[dict[str, object]]) -> bytes:
+    return to_json({"hotspots": rows, "next_cursor": None})
+
+
+PATHS: dict[str, Callable[[list[dict[str, object]]], bytes]] = {
+    "fastapi_default": fastapi_default,
+    "validated_model": validated_model,
+    "stdlib_json": stdlib_json,
+    "fast_path": fast_path,
+}
+
+
+def main() -> None:
+    args = parse_args()
+    for size in args.sizes:
+        rows = synthetic_hotspots(size)
+        timings = {}
+        for name, render in PATHS.items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                body = render(rows)
+                best = min(best, time.perf_counter() - started)
+            timings[name] = best
+        print(
+            json.dumps(
+                {
+                    "benchmark": "hotspot_serialization",
+                    "rows": size,
+                    "body_bytes": len(body),
+                    **{f"{name}_ms": round(seconds * 1e3, 2) for name, seconds in timings.items()},
+                    "speedup": round(timings["fastapi_default"] / timings["fast_path"], 1),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
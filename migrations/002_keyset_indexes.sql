@@ -0,0 +1,4 @@
+-- Keyset pagination walks the list endpoints in their sort order; these
+-- indexes let each page seek straight to the cursor instead of re-sorting.
+CREATE INDEX IF NOT EXISTS idx_emitters_confidence_id ON emitters (confidence DESC, id ASC);
+CREATE INDEX IF NOT EXISTS idx_hotspots_score_id ON hotspots (anomaly_score DESC, id ASC);
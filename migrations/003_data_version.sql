@@ -0,0 +1,9 @@
+-- Single-row counter bumped by load jobs whenever they change published rows;
+-- the API keys its response cache on it.
+CREATE TABLE IF NOT EXISTS data_version (
+  id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO data_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
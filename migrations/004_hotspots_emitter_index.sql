@@ -0,0 +1,3 @@
+-- Emitter detail reads an emitter's newest evidence first; this turns it into
+-- an ordered index range scan instead of a sequential scan plus sort.
+CREATE INDEX IF NOT EXISTS idx_hotspots_emitter_observed ON hotspots (emitter_id, observed_on DESC, id ASC);
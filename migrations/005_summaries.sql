@@ -0,0 +1,121 @@
+-- Summary tables for dashboard aggregates. Load and link jobs refresh only the
+-- days/emitters they touched, so reads never scan hotspots.
+
+CREATE TABLE IF NOT EXISTS aois (
+  name TEXT PRIMARY KEY,
+  geom GEOMETRY(Geometry, 4326) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_aois_geom ON aois USING GIST (geom);
+
+CREATE TABLE IF NOT EXISTS hotspot_daily_summary (
+  observed_on DATE PRIMARY KEY,
+  hotspot_count INTEGER NOT NULL,
+  linked_count INTEGER NOT NULL,
+  total_area_km2 NUMERIC NOT NULL,
+  mean_anomaly_score NUMERIC NOT NULL,
+  max_anomaly_score NUMERIC NOT NULL,
+  refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS aoi_daily_summary (
+  aoi TEXT NOT NULL,
+  observed_on DATE NOT NULL,
+  hotspot_count INTEGER NOT NULL,
+  mean_anomaly_score NUMERIC NOT NULL,
+  p50_anomaly_score NUMERIC NOT NULL,
+  p90_anomaly_score NUMERIC NOT NULL,
+  max_anomaly_score NUMERIC NOT NULL,
+  refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (aoi, observed_on)
+);
+
+CREATE INDEX IF NOT EXISTS idx_aoi_daily_summary_observed_on ON aoi_daily_summary (observed_on);
+
+CREATE TABLE IF NOT EXISTS emitter_stats (
+  emitter_id TEXT PRIMARY KEY REFERENCES emitters(id) ON DELETE CASCADE,
+  hotspot_count INTEGER NOT NULL,
+  detection_days INTEGER NOT NULL,
+  first_seen DATE NOT NULL,
+  last_seen DATE NOT NULL,
+  hotspots_last_30d INTEGER NOT NULL,
+  mean_anomaly_score NUMERIC NOT NULL,
+  max_anomaly_score NUMERIC NOT NULL,
+  total_area_km2 NUMERIC NOT NULL,
+  refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_emitter_stats_hotspot_count ON emitter_stats (hotspot_count DESC, emitter_id);
+CREATE INDEX IF NOT EXISTS idx_emitter_stats_max_anomaly ON emitter_stats (max_anomaly_score DESC, emitter_id);
+CREATE INDEX IF NOT EXISTS idx_emitter_stats_last_30d ON emitter_stats (hotspots_last_30d DESC, emitter_id);
+
+-- Recompute the daily and per-AOI summaries for the given days (NULL = all).
+-- A hotspot belongs to every AOI containing its centroid.
+CREATE OR REPLACE FUNCTION refresh_hotspot_summaries(days DATE[]) RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+  refreshed INTEGER;
+BEGIN
+  DELETE FROM hotspot_daily_summary WHERE days IS NULL OR observed_on = ANY (days);
+  INSERT INTO hotspot_daily_summary
+    (observed_on, hotspot_count, linked_count, total_area_km2, mean_anomaly_score, max_anomaly_score)
+  SELECT observed_on, count(*), count(emitter_id), sum(area_km2), avg(anomaly_score), max(anomaly_score)
+  FROM hotspots
+  WHERE days IS NULL OR observed_on = ANY (days)
+  GROUP BY observed_on;
+  GET DIAGNOSTICS refreshed = ROW_COUNT;
+
+  DELETE FROM aoi_daily_summary WHERE days IS NULL OR observed_on = ANY (days);
+  INSERT INTO aoi_daily_summary
+    (aoi, observed_on, hotspot_count, mean_anomaly_score, p50_anomaly_score, p90_anomaly_score, max_anomaly_score)
+  SELECT
+    a.name,
+    h.observed_on,
+    count(*),
+    avg(h.anomaly_score),
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY h.anomaly_score),
+    percentile_cont(0.9) WITHIN GROUP (ORDER BY h.anomaly_score),
+    max(h.anomaly_score)
+  FROM hotspots AS h
+  JOIN aois AS a ON ST_Intersects(a.geom, ST_Centroid(h.geom))
+  WHERE days IS NULL OR h.observed_on = ANY (days)
+  GROUP BY a.name, h.observed_on;
+
+  RETURN refreshed;
+END;
+$$;
+
+-- Recompute rolling stats for the given emitters (NULL = all). The 30-day
+-- window ends at each emitter's own last detection.
+CREATE OR REPLACE FUNCTION refresh_emitter_stats(emitter_ids TEXT[]) RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+  refreshed INTEGER;
+BEGIN
+  DELETE FROM emitter_stats WHERE emitter_ids IS NULL OR emitter_id = ANY (emitter_ids);
+  INSERT INTO emitter_stats
+    (emitter_id, hotspot_count, detection_days, first_seen, last_seen, hotspots_last_30d,
+     mean_anomaly_score, max_anomaly_score, total_area_km2)
+  SELECT
+    h.emitter_id,
+    count(*),
+    count(DISTINCT h.observed_on),
+    min(h.observed_on),
+    latest.last_seen,
+    count(*) FILTER (WHERE h.observed_on > latest.last_seen - 30),
+    avg(h.anomaly_score),
+    max(h.anomaly_score),
+    sum(h.area_km2)
+  FROM hotspots AS h
+  JOIN (
+    SELECT emitter_id, max(observed_on) AS last_seen
+    FROM hotspots
+    WHERE emitter_id IS NOT NULL AND (emitter_ids IS NULL OR emitter_id = ANY (emitter_ids))
+    GROUP BY emitter_id
+  ) AS latest ON latest.emitter_id = h.emitter_id
+  GROUP BY h.emitter_id, latest.last_seen;
+  GET DIAGNOSTICS refreshed = ROW_COUNT;
+
+  RETURN refreshed;
+END;
+$$;
@@ -0,0 +1,81 @@
+-- Monthly range partitioning of hotspots by observed_on. Old months stop
+-- taking writes, so vacuum and index maintenance only touch recent
+-- partitions, and date-filtered queries prune to the months they cover.
+--
+-- The primary key must include the partition key, so it becomes
+-- (id, observed_on). Hotspot IDs are hs-<peak observation ID>, and every
+-- source's observation IDs are global: real-source IDs come from the
+-- provider, and GEE IDs carry the day and rounded coordinates of the sample
+-- rather than a per-run row index. So id alone stays unique across runs and
+-- AOIs, and a reload of the same peak updates the same row.
+
+-- Creates any missing monthly partitions between the two days (inclusive).
+CREATE OR REPLACE FUNCTION ensure_hotspot_partitions(from_day DATE, to_day DATE) RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+  month_start DATE := date_trunc('month', from_day)::date;
+  partition_name TEXT;
+  created INTEGER := 0;
+BEGIN
+  WHILE month_start <= to_day LOOP
+    partition_name := format('hotspots_p%s', to_char(month_start, 'YYYY_MM'));
+    IF to_regclass(partition_name) IS NULL THEN
+      EXECUTE format(
+        'CREATE TABLE %I PARTITION OF hotspots FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        month_start,
+        (month_start + INTERVAL '1 month')::date
+      );
+      created := created + 1;
+    END IF;
+    month_start := (month_start + INTERVAL '1 month')::date;
+  END LOOP;
+  RETURN created;
+END;
+$$;
+
+-- One-time conversion of the original heap table; a no-op once partitioned.
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1
+    FROM pg_class AS c
+    JOIN pg_namespace AS n ON n.oid = c.relnamespace
+    WHERE c.relname = 'hotspots' AND n.nspname = current_schema() AND c.relkind = 'r'
+  ) THEN
+    ALTER TABLE hotspots RENAME TO hotspots_unpartitioned;
+    ALTER INDEX hotspots_pkey RENAME TO hotspots_unpartitioned_pkey;
+    DROP INDEX IF EXISTS idx_hotspots_observed_on, idx_hotspots_geom, idx_hotspots_score_id, idx_hotspots_emitter_observed;
+
+    CREATE TABLE hotspots (
+      id TEXT NOT NULL,
+      emitter_id TEXT REFERENCES emitters(id),
+      observed_on DATE NOT NULL,
+      anomaly_score NUMERIC NOT NULL,
+      area_km2 NUMERIC NOT NULL,
+      pixel_count INTEGER NOT NULL,
+      qa_pass_ratio NUMERIC NOT NULL,
+      geom GEOMETRY(Polygon, 4326) NOT NULL,
+      created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+      PRIMARY KEY (id, observed_on)
+    ) PARTITION BY RANGE (observed_on);
+
+    PERFORM ensure_hotspot_partitions(min(observed_on), max(observed_on))
+    FROM hotspots_unpartitioned
+    HAVING count(*) > 0;
+
+    INSERT INTO hotspots (id, emitter_id, observed_on, anomaly_score, area_km2, pixel_count, qa_pass_ratio, geom, created_at)
+    SELECT id, emitter_id, observed_on, anomaly_score, area_km2, pixel_count, qa_pass_ratio, geom, created_at
+    FROM hotspots_unpartitioned;
+
+    DROP TABLE hotspots_unpartitioned;
+  END IF;
+END;
+$$;
+
+-- Partitioned indexes: every partition, including ones created later, gets
+-- its own B-tree and GiST indexes.
+CREATE INDEX IF NOT EXISTS idx_hotspots_observed_on ON hotspots (observed_on);
+CREATE INDEX IF NOT EXISTS idx_hotspots_geom ON hotspots USING GIST (geom);
+CREATE INDEX IF NOT EXISTS idx_hotspots_score_id ON hotspots (anomaly_score DESC, id ASC);
+CREATE INDEX IF NOT EXISTS idx_hotspots_emitter_observed ON hotspots (emitter_id, observed_on DESC, id ASC);
@@ -0,0 +1,5 @@
+-- EMIT confirmation linking prefilters emitters with a bounding-box `&&`
+-- around each plume; without this GiST index every plume scans all emitters.
+CREATE INDEX IF NOT EXISTS idx_emitters_geom ON emitters USING GIST (geom);
+-- Emitter reads count and date an emitter's confirmations per row.
+CREATE INDEX IF NOT EXISTS idx_confirmations_emitter_observed ON confirmations (emitter_id, observed_on DESC);
@@ -0,0 +1,42 @@
+-- Hotspots remember the AOI of the detect run that last loaded them, so a
+-- reload only deletes the stale hotspots it owns: AOIs may overlap, and a
+-- load of one must not remove another's detections. Rows loaded before this
+-- column existed have no owner and are never deleted by a reload.
+ALTER TABLE hotspots ADD COLUMN IF NOT EXISTS aoi TEXT;
+CREATE INDEX IF NOT EXISTS idx_hotspots_aoi_observed ON hotspots (aoi, observed_on);
+
+-- Recompute the given emitters' detection_count (distinct linked days),
+-- last_seen, confidence and position (mean of each day's mean hotspot
+-- centroid) from their linked hotspots. Deriving them from the links, rather
+-- than adding each run's days, keeps them exact when a day is linked twice,
+-- when days arrive out of order and when linked hotspots are deleted. An
+-- emitter with no linked hotspots left keeps its position and last_seen with
+-- a zero count. confidence_scale matches emitter_linking.CONFIDENCE_SCALE_DETECTIONS.
+CREATE OR REPLACE FUNCTION refresh_emitter_detections(emitter_ids TEXT[], confidence_scale DOUBLE PRECISION)
+RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+  refreshed INTEGER;
+BEGIN
+  UPDATE emitters AS e
+  SET detection_count = coalesce(d.days, 0),
+      last_seen = coalesce(d.last_seen, e.last_seen),
+      confidence = round((1 - exp(-coalesce(d.days, 0) / confidence_scale))::numeric, 3),
+      geom = coalesce(ST_SetSRID(ST_MakePoint(d.longitude, d.latitude), 4326), e.geom)
+  FROM unnest(emitter_ids) AS ids(emitter_id)
+  LEFT JOIN (
+    SELECT emitter_id, count(*) AS days, max(observed_on) AS last_seen, avg(latitude) AS latitude, avg(longitude) AS longitude
+    FROM (
+      SELECT emitter_id, observed_on, avg(ST_Y(ST_Centroid(geom))) AS latitude, avg(ST_X(ST_Centroid(geom))) AS longitude
+      FROM hotspots
+      WHERE emitter_id = ANY (emitter_ids)
+      GROUP BY emitter_id, observed_on
+    ) AS linked_days
+    GROUP BY emitter_id
+  ) AS d ON d.emitter_id = ids.emitter_id
+  WHERE e.id = ids.emitter_id;
+  GET DIAGNOSTICS refreshed = ROW_COUNT;
+
+  RETURN refreshed;
+END;
+$$;
@@ -0,0 +1,89 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+
+import ingest_tropomi  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare one ingest per AOI against a single batch ingest")
+    parser.add_argument("--observations", type=int, default=500_000)
+    parser.add_argument("--aois", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def write_fixture(path: Path, count: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    latitude = rng.uniform(-60.0, 70.0, count)
+    longitude = rng.uniform(-180.0, 180.0, count)
+    ch4_ppb = rng.normal(1900.0, 12.0, count)
+    qa_value = rng.uniform(0.5, 1.0, count)
+    observations = [
+        {
+            "observation_id": f"obs-{idx:08d}",
+            "observed_on": f"2026-02-{10 + idx % 2}",
+            "latitude": float(latitude[idx]),
+            "longitude": float(longitude[idx]),
+            "ch4_ppb": float(ch4_ppb[idx]),
+            "qa_value": float(qa_value[idx]),
+        }
+        for idx in range(count)
+    ]
+    path.write_text(json.dumps({"dataset": "synthetic", "product": "tropomi_ch4", "version": "bench", "observations": observations}))
+
+
+def basin_bboxes(count: int, seed: int) -> list[str]:
+    # Basin-sized (3-6 degree) boxes scattered over the observed latitudes.
+    rng = np.random.default_rng(seed + 1)
+    bboxes = []
+    for _ in range(count):
+        min_lon, min_lat = rng.uniform(-175.0, 170.0), rng.uniform(-55.0, 60.0)
+        width, height = rng.uniform(3.0, 6.0, 2)
+        bboxes.append(f"{min_lon:.3f},{min_lat:.3f},{min_lon + width:.3f},{min_lat + height:.3f}")
+    return bboxes
+
+
+def main() -> None:
+    args = parse_args()
+    aois = basin_bboxes(args.aois, args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        fixture = root / "fixture.json"
+        write_fixture(fixture, args.observations, args.seed)
+        common = ["--fixture", str(fixture), "--output-root", str(root / "out")]
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            per_aoi = [ingest_tropomi.main([f"--aoi={aoi}", *common]) for aoi in aois]
+        results["per_aoi"] = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "qa_pass_count": sum(report["qa_pass_count"] for report in per_aoi),
+        }
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            batch = ingest_tropomi.main([f"--aois={' '.join(aois)}", *common])
+        results["batch"] = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "qa_pass_count": sum(run["qa_pass_count"] for run in batch["runs"]),
+        }
+
+    if results["per_aoi"]["qa_pass_count"] != results["batch"]["qa_pass_count"]:
+        raise SystemExit("batch ingest does not match per-AOI ingest")
+    print(json.dumps({"benchmark": "batch_ingest", "observations": args.observations, "aois": args.aois, "results": results}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+
+from detect_engine import detect_hotspots, detect_hotspots_reference, observations_frame  # noqa: E402
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare record-at-a-time and columnar hotspot detection")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--anomaly-threshold-ppb", type=float, default=40.0)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def synthetic_observations(count: int, seed: int) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    ch4 = np.round(rng.normal(1900.0, 25.0, count), 1)
+    latitudes = rng.uniform(30.3, 33.0, count)
+    longitudes = rng.uniform(-104.9, -100.0, count)
+    return [
+        {
+            "observation_id": f"obs-{idx:08d}",
+            "observed_on": "2026-02-10",
+            "latitude": float(latitudes[idx]),
+            "longitude": float(longitudes[idx]),
+            "ch4_ppb": float(ch4[idx]),
+            "qa_value": 0.9,
+        }
+        for idx in range(count)
+    ]
+
+
+def _timed(func, *args, **kwargs) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def main() -> None:
+    args = parse_args()
+    for size in args.sizes:
+        observations = synthetic_observations(size, args.seed)
+        kwargs = {"anomaly_threshold_ppb": args.anomaly_threshold_ppb, "qa_pass_ratio": 0.9}
+
+        reference_seconds, reference = _timed(detect_hotspots_reference, observations, **kwargs)
+        load_seconds, frame = _timed(observations_frame, observations)
+        engine_seconds, engine = _timed(detect_hotspots, frame, **kwargs)
+
+        print(
+            json.dumps(
+                {
+                    "benchmark": "detect_engine",
+                    "observations": size,
+                    "hotspots": len(reference[1]),
+                    "identical": reference == engine,
+                    "reference_seconds": round(reference_seconds, 4),
+                    "columnar_load_seconds": round(load_seconds, 4),
+                    "columnar_detect_seconds": round(engine_seconds, 4),
+                    "speedup_detect": round(reference_seconds / max(engine_seconds, 1e-9), 1),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
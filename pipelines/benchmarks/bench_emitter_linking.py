@@ -0,0 +1,75 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+
+from emitter_linking import EmitterLinker  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure emitter linking over a year of daily hotspots")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--hotspots-per-day", type=int, default=2000)
+    parser.add_argument("--sources", type=int, default=1000)
+    parser.add_argument("--link-radius-km", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    # Recurring sources plus jitter, so most hotspots re-link and some found new emitters.
+    rng = np.random.default_rng(args.seed)
+    source_lat = rng.uniform(30.3, 33.0, args.sources)
+    source_lon = rng.uniform(-104.9, -100.0, args.sources)
+    linker = EmitterLinker([], link_radius_km=args.link_radius_km)
+
+    started = time.perf_counter()
+    day_seconds = []
+    for day in range(args.days):
+        observed_on = str(np.datetime64("2026-01-01") + day)
+        source = rng.integers(0, args.sources, args.hotspots_per_day)
+        latitude = source_lat[source] + rng.normal(0.0, 0.02, args.hotspots_per_day)
+        longitude = source_lon[source] + rng.normal(0.0, 0.02, args.hotspots_per_day)
+        hotspots = [
+            {
+                "id": f"hs-{day:03d}-{idx:05d}",
+                "observed_on": observed_on,
+                "anomaly_score": 50.0,
+                "area_km2": 25.0,
+                "centroid_latitude": float(latitude[idx]),
+                "centroid_longitude": float(longitude[idx]),
+            }
+            for idx in range(args.hotspots_per_day)
+        ]
+        day_started = time.perf_counter()
+        linker.link_day(observed_on, hotspots)
+        day_seconds.append(time.perf_counter() - day_started)
+    seconds = time.perf_counter() - started
+
+    total = args.days * args.hotspots_per_day
+    print(
+        json.dumps(
+            {
+                "benchmark": "emitter_linking",
+                "days": args.days,
+                "hotspots": total,
+                "emitters": len(linker.emitters),
+                "seconds": round(seconds, 3),
+                "link_seconds": round(sum(day_seconds), 3),
+                "first_day_ms": round(day_seconds[0] * 1e3, 2),
+                "last_day_ms": round(day_seconds[-1] * 1e3, 2),
+                "microseconds_per_hotspot": round(sum(day_seconds) / total * 1e6, 2),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
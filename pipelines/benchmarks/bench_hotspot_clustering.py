@@ -0,0 +1,73 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+
+from hotspot_clustering import cluster_anomalies  # noqa: E402
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure grid clustering cost against anomalous point count")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--grid-cell-deg", type=float, default=0.05)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def synthetic_anomalies(count: int, *, days: int, grid_cell_deg: float, seed: int) -> pd.DataFrame:
+    # Plume-like blobs around random sources, so clusters of many sizes occur
+    # and occupancy stays similar as the count grows.
+    rng = np.random.default_rng(seed)
+    source_count = max(1, count // 50)
+    source_lat = rng.uniform(30.3, 33.0, source_count)
+    source_lon = rng.uniform(-104.9, -100.0, source_count)
+    source = rng.integers(0, source_count, count)
+    spread = grid_cell_deg * rng.uniform(0.5, 4.0, source_count)[source]
+    day_offsets = rng.integers(0, days, count)
+    return pd.DataFrame(
+        {
+            "observation_id": [f"obs-{idx:08d}" for idx in range(count)],
+            "observed_on": (np.datetime64("2026-02-01") + day_offsets).astype(str),
+            "latitude": source_lat[source] + rng.normal(0.0, 1.0, count) * spread,
+            "longitude": source_lon[source] + rng.normal(0.0, 1.0, count) * spread,
+            "anomaly_score": np.round(40.0 + rng.exponential(15.0, count), 3),
+        }
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    for size in args.sizes:
+        anomalies = synthetic_anomalies(size, days=args.days, grid_cell_deg=args.grid_cell_deg, seed=args.seed)
+
+        started = time.perf_counter()
+        clusters = cluster_anomalies(anomalies, cell_deg=args.grid_cell_deg)
+        seconds = time.perf_counter() - started
+
+        print(
+            json.dumps(
+                {
+                    "benchmark": "hotspot_clustering",
+                    "anomalous_points": size,
+                    "grid_cells": int(clusters["pixel_count"].sum()),
+                    "clusters": len(clusters),
+                    "largest_cluster_cells": int(clusters["pixel_count"].max()),
+                    "seconds": round(seconds, 4),
+                    "microseconds_per_point": round(seconds / size * 1e6, 2),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
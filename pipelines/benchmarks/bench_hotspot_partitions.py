@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from psycopg import connect, sql
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+
+from bulk_load import DEFAULT_DATABASE_URL  # noqa: E402
+
+SCHEMA = "bench_partitions"
+TABLE_DDL = """
+    CREATE TABLE {table} (
+      id TEXT NOT NULL,
+      emitter_id TEXT,
+      observed_on DATE NOT NULL,
+      anomaly_score NUMERIC NOT NULL,
+      area_km2 NUMERIC NOT NULL,
+      pixel_count INTEGER NOT NULL,
+      qa_pass_ratio NUMERIC NOT NULL,
+      geom GEOMETRY(Polygon, 4326) NOT NULL,
+      created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+      PRIMARY KEY {primary_key}
+    ) {partitioning}
+"""
+# Synthetic Permian-scale detections: ~5 km squares scattered over the basin.
+# Referencing n keeps the LATERAL point re-drawn for every row.
+SYNTHETIC_ROWS_SQL = """
+    INSERT INTO {table} (id, observed_on, anomaly_score, area_km2, pixel_count, qa_pass_ratio, geom)
+    SELECT
+      'hs-' || to_char(day, 'YYYYMMDD') || '-' || n,
+      day::date,
+      40 + random() * 60,
+      25.893,
+      1,
+      0.75,
+      ST_MakeEnvelope(lon, lat, lon + 0.05, lat + 0.05, 4326)
+    FROM generate_series(%(start)s::date, %(start)s::date + %(days)s - 1, INTERVAL '1 day') AS day,
+         generate_series(1, %(per_day)s) AS n,
+         LATERAL (SELECT -104.9 + random() * 4.9 + n * 0 AS lon, 30.3 + random() * 2.7 + n * 0 AS lat) AS point
+"""
+QUERIES = {
+    "one_day": "SELECT count(*) FROM {table} WHERE observed_on BETWEEN %(day)s AND %(day)s",
+    "one_month": "SELECT count(*) FROM {table} WHERE observed_on BETWEEN %(day)s AND %(day)s::date + 30",
+    "month_bbox": (
+        "SELECT count(*) FROM {table} WHERE observed_on BETWEEN %(day)s AND %(day)s::date + 30 "
+        "AND geom && ST_MakeEnvelope(-102.5, 31.5, -102.0, 32.0, 4326)"
+    ),
+    "all_days_bbox": "SELECT count(*) FROM {table} WHERE geom && ST_MakeEnvelope(-102.5, 31.5, -102.0, 32.0, 4326)",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare date and bbox queries on heap vs monthly-partitioned hotspots")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--hotspots-per-day", type=int, default=500)
+    parser.add_argument("--start", default="2023-01-01")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="Leave the scratch schema in place")
+    return parser.parse_args()
+
+
+def build_tables(cur, args: argparse.Namespace) -> dict:
+    timings = {}
+    params = {"start": args.start, "days": args.days, "per_day": args.hotspots_per_day}
+    layouts = {
+        "heap": (sql.SQL("(id)"), sql.SQL("")),
+        "partitioned": (sql.SQL("(id, observed_on)"), sql.SQL("PARTITION BY RANGE (observed_on)")),
+    }
+    for layout, (primary_key, partitioning) in layouts.items():
+        table = sql.Identifier(SCHEMA, f"hotspots_{layout}")
+        started = time.perf_counter()
+        cur.execute(sql.SQL(TABLE_DDL).format(table=table, primary_key=primary_key, partitioning=partitioning))
+        if layout == "partitioned":
+            cur.execute(
+                """
+                SELECT format('CREATE TABLE %%I.%%I PARTITION OF %%I.hotspots_partitioned FOR VALUES FROM (%%L) TO (%%L)',
+                              %(schema)s, 'hotspots_p' || to_char(month, 'YYYY_MM'), %(schema)s,
+                              month::date, (month + INTERVAL '1 month')::date)
+                FROM generate_series(date_trunc('month', %(start)s::date), %(start)s::date + %(days)s, INTERVAL '1 month') AS month
+                """,
+                {"schema": SCHEMA, **params},
+            )
+            for (statement,) in cur.fetchall():
+                cur.execute(statement)
+        cur.execute(sql.SQL("CREATE INDEX ON {} (observed_on)").format(table))
+        cur.execute(sql.SQL("CREATE INDEX ON {} USING GIST (geom)").format(table))
+        cur.execute(sql.SQL(SYNTHETIC_ROWS_SQL).format(table=table), params)
+        cur.execute(sql.SQL("ANALYZE {}").format(table))
+        timings[layout] = round(time.perf_counter() - started, 3)
+    return timings
+
+
+def time_query(cur, statement: sql.Composed, params: dict, repeats: int) -> dict:
+    cur.execute(sql.SQL("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ") + statement, params)
+    plan = cur.fetchone()[0][0]
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        cur.execute(statement, params)
+        cur.fetchall()
+        samples.append((time.perf_counter() - started) * 1e3)
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "planned_relations": len(_relations(plan["Plan"])),
+        "shared_hit_blocks": plan["Plan"].get("Shared Hit Blocks"),
+    }
+
+
+def _relations(node: dict) -> set[str]:
+    names = {node["Relation Name"]} if "Relation Name" in node else set()
+    for child in node.get("Plans", []):
+        names |= _relations(child)
+    return names
+
+
+def main() -> None:
+    args = parse_args()
+    probe_day = str(args.start)
+    with connect(args.database_url, autocommit=True) as conn, conn.cursor() as cur:
+        cur.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(SCHEMA)))
+        cur.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(SCHEMA)))
+        try:
+            build_seconds = build_tables(cur, args)
+            results = {}
+            for name, query in QUERIES.items():
+                results[name] = {
+                    layout: time_query(
+                        cur,
+                        sql.SQL(query).format(table=sql.Identifier(SCHEMA, f"hotspots_{layout}")),
+                        {"day": probe_day},
+                        args.repeats,
+                    )
+                    for layout in ("heap", "partitioned")
+                }
+        finally:
+            if not args.keep:
+                cur.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(SCHEMA)))
+
+    print(
+        json.dumps(
+            {
+                "benchmark": "hotspot_partitions",
+                "days": args.days,
+                "hotspots": args.days * args.hotspots_per_day,
+                "build_seconds": build_seconds,
+                "queries": results,
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+
+import detect_hotspots  # noqa: E402
+import ingest_tropomi  # noqa: E402
+from observation_store import write_ingest_artifacts  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare artifact-chained vs in-process ingest -> detect")
+    parser.add_argument("--observations", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def write_fixture(path: Path, count: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    latitude = rng.uniform(30.3, 33.0, count)
+    longitude = rng.uniform(-104.9, -100.0, count)
+    ch4_ppb = rng.normal(1900.0, 12.0, count)
+    ch4_ppb[rng.random(count) < 0.002] += 80.0
+    qa_value = rng.uniform(0.5, 1.0, count)
+    observations = [
+        {
+            "observation_id": f"obs-{idx:08d}",
+            "observed_on": f"2026-02-{10 + idx % 2}",
+            "latitude": float(latitude[idx]),
+            "longitude": float(longitude[idx]),
+            "ch4_ppb": float(ch4_ppb[idx]),
+            "qa_value": float(qa_value[idx]),
+        }
+        for idx in range(count)
+    ]
+    path.write_text(json.dumps({"dataset": "synthetic", "product": "tropomi_ch4", "version": "bench", "observations": observations}))
+
+
+def main() -> None:
+    args = parse_args()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        fixture = root / "fixture.json"
+        write_fixture(fixture, args.observations, args.seed)
+
+        for processed_format in ("json", "parquet"):
+            output_root = root / f"chained-{processed_format}"
+            ingest_argv = ["--fixture", str(fixture), "--processed-format", processed_format, "--output-root", str(output_root)]
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                ingest_report = ingest_tropomi.main(ingest_argv)
+                detect_report = detect_hotspots.main(["--ingest-run-id", ingest_report["run_id"], "--output-root", str(output_root)])
+            results[f"chained_{processed_format}"] = {
+                "seconds": round(time.perf_counter() - started, 3),
+                "candidate_count": detect_report["candidate_count"],
+            }
+
+        output_root = root / "in-process"
+        started = time.perf_counter()
+        ingest_args = ingest_tropomi.parse_args(["--fixture", str(fixture), "--output-root", str(output_root)])
+        ingest = ingest_tropomi.run_ingest(ingest_args)
+        write_ingest_artifacts(ingest, output_root, processed_format="parquet", persist_observations=False)
+        detect_args = detect_hotspots.parse_args(["--output-root", str(output_root)])
+        detect = detect_hotspots.run_detect(detect_args, ingest.observations, ingest.metadata)
+        detect_hotspots.write_detect_artifacts(detect, output_root)
+        results["in_process"] = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "candidate_count": detect.metadata["candidate_count"],
+        }
+
+    print(json.dumps({"benchmark": "stage_handoff", "observations": args.observations, "results": results}))
+
+
+if __name__ == "__main__":
+    main()
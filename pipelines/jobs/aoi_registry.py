@@ -0,0 +1,287 @@
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_AOI_PRESETS = ROOT / "pipelines" / "fixtures" / "aoi.geojson"
+DEFAULT_INDEX_CELL_DEG = 1.0
+
+
+def validate_bbox(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> tuple[float, float, float, float]:
+    if not -180 <= min_lon <= 180 or not -180 <= max_lon <= 180:
+        raise ValueError("AOI longitude values must be within [-180, 180]")
+    if not -90 <= min_lat <= 90 or not -90 <= max_lat <= 90:
+        raise ValueError("AOI latitude values must be within [-90, 90]")
+    if min_lon >= max_lon:
+        raise ValueError("AOI bbox min_lon must be less than max_lon")
+    if min_lat >= max_lat:
+        raise ValueError("AOI bbox min_lat must be less than max_lat")
+
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def parse_bbox(aoi_value: str) -> tuple[float, float, float, float] | None:
+    parts = [part.strip() for part in aoi_value.split(",")]
+    if len(parts) != 4:
+        return None
+
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in parts)
+    except ValueError as exc:
+        raise ValueError("AOI bbox must contain numeric values: min_lon,min_lat,max_lon,max_lat") from exc
+
+    return validate_bbox(min_lon, min_lat, max_lon, max_lat)
+
+
+def date_mask(observed_on: np.ndarray, *, start_date: str, end_date: str) -> np.ndarray:
+    # Half-open [start_date, end_date), like GEE's filterDate and run_pipeline's
+    # date windows, so adjacent windows never share a day. ISO YYYY-MM-DD
+    # strings order like the dates they spell, so the check is a vectorized
+    # string comparison.
+    days = np.asarray(observed_on, dtype=str)
+    return (days >= start_date) & (days < end_date)
+
+
+def _geometry_rings(geometry: dict) -> list[list]:
+    if geometry.get("type") == "Polygon":
+        return list(geometry.get("coordinates", []))
+    if geometry.get("type") == "MultiPolygon":
+        return [ring for polygon in geometry.get("coordinates", []) for ring in polygon]
+    raise ValueError(f"AOI geometry must be a Polygon or MultiPolygon, got {geometry.get('type')}")
+
+
+def _edges(rings: list[list]) -> np.ndarray:
+    # Every ring edge as (x0, y0, x1, y1); holes and MultiPolygon parts are
+    # handled by the even-odd rule, so all rings go into one edge table.
+    edges = []
+    for ring in rings:
+        points = np.asarray(ring, dtype="float64")[:, :2]
+        if len(points) and not np.array_equal(points[0], points[-1]):
+            points = np.vstack([points, points[:1]])
+        edges.append(np.hstack([points[:-1], points[1:]]))
+    return np.vstack(edges) if edges else np.empty((0, 4))
+
+
+@dataclass(frozen=True)
+class Aoi:
+    """An AOI prepared for clipping: bbox plus the polygon's edge table."""
+
+    name: str
+    bbox: tuple[float, float, float, float]
+    query: str
+    edges: np.ndarray = field(repr=False, compare=False)
+
+    @classmethod
+    def from_geometry(cls, name: str, geometry: dict, *, query: str | None = None) -> "Aoi":
+        edges = _edges(_geometry_rings(geometry))
+        if not len(edges):
+            raise ValueError(f"AOI '{name}' has no polygon rings")
+        longitudes = np.concatenate([edges[:, 0], edges[:, 2]])
+        latitudes = np.concatenate([edges[:, 1], edges[:, 3]])
+        bbox = validate_bbox(
+            float(longitudes.min()), float(latitudes.min()), float(longitudes.max()), float(latitudes.max())
+        )
+        return cls(name=name, bbox=bbox, query=query or name, edges=edges)
+
+    @classmethod
+    def from_bbox(cls, bbox: tuple[float, float, float, float]) -> "Aoi":
+        min_lon, min_lat, max_lon, max_lat = bbox
+        canonical = ",".join(f"{value:.6f}" for value in bbox)
+        ring = [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+        return cls.from_geometry(f"bbox:{canonical}", {"type": "Polygon", "coordinates": [ring]}, query=canonical)
+
+    def in_bbox(self, longitude: np.ndarray, latitude: np.ndarray) -> np.ndarray:
+        """Mask of points inside the bbox, edges included, as a bbox source query selects them."""
+        longitude = np.asarray(longitude, dtype="float64")
+        latitude = np.asarray(latitude, dtype="float64")
+        min_lon, min_lat, max_lon, max_lat = self.bbox
+        return (longitude >= min_lon) & (longitude <= max_lon) & (latitude >= min_lat) & (latitude <= max_lat)
+
+    def contains(self, longitude: np.ndarray, latitude: np.ndarray) -> np.ndarray:
+        """Vectorized point-in-polygon over whole coordinate arrays.
+
+        The polygon is closed: points on an edge or vertex are inside, as with
+        the inclusive bbox prefilter and PostGIS ``ST_Intersects``. Points
+        outside the bbox are rejected first; only the rest go through the
+        crossing-number test and the on-edge check, one pass per polygon edge.
+        """
+        longitude = np.asarray(longitude, dtype="float64")
+        latitude = np.asarray(latitude, dtype="float64")
+        inside = self.in_bbox(longitude, latitude)
+        candidates = np.flatnonzero(inside)
+        if not len(candidates):
+            return inside
+
+        x = longitude[candidates]
+        y = latitude[candidates]
+        crossings = np.zeros(len(candidates), dtype=bool)
+        on_edge = np.zeros(len(candidates), dtype=bool)
+        for x0, y0, x1, y1 in self.edges:
+            # Collinear and within the segment's extent. Exact for the axis-aligned
+            # edges of bbox AOIs; diagonal edges only match points exactly on them.
+            on_edge |= (
+                ((x1 - x0) * (y - y0) == (y1 - y0) * (x - x0))
+                & (x >= min(x0, x1))
+                & (x <= max(x0, x1))
+                & (y >= min(y0, y1))
+                & (y <= max(y0, y1))
+            )
+            if y0 == y1:
+                continue
+            straddles = (y0 > y) != (y1 > y)
+            crossings ^= straddles & (x < x0 + (y - y0) * (x1 - x0) / (y1 - y0))
+        inside[candidates] = crossings | on_edge
+        return inside
+
+    def clip(
+        self,
+        longitude: np.ndarray,
+        latitude: np.ndarray,
+        observed_on: np.ndarray,
+        *,
+        start_date: str,
+        end_date: str,
+    ) -> tuple[np.ndarray, dict[str, int]]:
+        """Mask rows observed within [start_date, end_date) and inside the AOI.
+
+        Returns the mask and how many rows each step dropped.
+        """
+        in_range = date_mask(observed_on, start_date=start_date, end_date=end_date)
+        in_aoi = np.zeros(len(in_range), dtype=bool)
+        in_aoi[in_range] = self.contains(np.asarray(longitude)[in_range], np.asarray(latitude)[in_range])
+        return in_aoi, {
+            "out_of_range_count": int(len(in_range) - in_range.sum()),
+            "out_of_aoi_count": int(in_range.sum() - in_aoi.sum()),
+        }
+
+
+class AoiIndex:
+    """Uniform grid over AOI bboxes for assigning points to many AOIs at once.
+
+    Each point is looked up by its grid cell, so it is only tested against the
+    AOIs whose bbox overlaps that cell; AOIs may overlap, and a point inside
+    several of them is assigned to each.
+    """
+
+    def __init__(self, aois: Sequence[Aoi], cell_deg: float = DEFAULT_INDEX_CELL_DEG) -> None:
+        if cell_deg <= 0:
+            raise ValueError("AOI index cell size must be positive")
+        self.aois = list(aois)
+        self.cell_deg = cell_deg
+        keys: list[np.ndarray] = []
+        owners: list[np.ndarray] = []
+        for position, aoi in enumerate(self.aois):
+            min_lon, min_lat, max_lon, max_lat = aoi.bbox
+            rows, cols = np.meshgrid(
+                np.arange(np.floor(min_lat / cell_deg), np.floor(max_lat / cell_deg) + 1, dtype="int64"),
+                np.arange(np.floor(min_lon / cell_deg), np.floor(max_lon / cell_deg) + 1, dtype="int64"),
+            )
+            keys.append(self._cell_keys(rows.ravel(), cols.ravel()))
+            owners.append(np.full(rows.size, position, dtype="int64"))
+        all_keys = np.concatenate(keys) if keys else np.empty(0, dtype="int64")
+        order = np.argsort(all_keys, kind="stable")
+        self._keys = all_keys[order]
+        self._owners = (np.concatenate(owners) if owners else np.empty(0, dtype="int64"))[order]
+
+    @staticmethod
+    def _cell_keys(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        return rows * (1 << 32) + cols
+
+    def assign(self, longitude: np.ndarray, latitude: np.ndarray) -> list[np.ndarray]:
+        """Return, per AOI (in constructor order), the sorted indices of the points inside it."""
+        longitude = np.asarray(longitude, dtype="float64")
+        latitude = np.asarray(latitude, dtype="float64")
+        finite = np.flatnonzero(np.isfinite(longitude) & np.isfinite(latitude))
+        point_keys = self._cell_keys(
+            np.floor(latitude[finite] / self.cell_deg).astype("int64"),
+            np.floor(longitude[finite] / self.cell_deg).astype("int64"),
+        )
+        # Each point expands to one (point, AOI) candidate pair per AOI registered in its cell.
+        first = np.searchsorted(self._keys, point_keys, side="left")
+        counts = np.searchsorted(self._keys, point_keys, side="right") - first
+        points = np.repeat(finite, counts)
+        pair_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        owners = self._owners[np.repeat(first, counts) + pair_offsets]
+
+        order = np.argsort(owners, kind="stable")
+        bounds = np.cumsum(np.bincount(owners, minlength=len(self.aois)))
+        assigned = []
+        for aoi, candidates in zip(self.aois, np.split(points[order], bounds[:-1])):
+            assigned.append(candidates[aoi.contains(longitude[candidates], latitude[candidates])])
+        return assigned
+
+    def clip(
+        self,
+        longitude: np.ndarray,
+        latitude: np.ndarray,
+        observed_on: np.ndarray,
+        *,
+        start_date: str,
+        end_date: str,
+    ) -> list[tuple[np.ndarray, int, dict[str, int]]]:
+        """``Aoi.clip`` for every indexed AOI in one pass, as (rows, bbox_count, dropped counts).
+
+        The points cover the union of the AOI bboxes, so each AOI's counts are
+        taken over the ``bbox_count`` points inside its own bbox: what a source
+        query for that AOI alone would have returned.
+        """
+        longitude = np.asarray(longitude, dtype="float64")
+        latitude = np.asarray(latitude, dtype="float64")
+        in_range_mask = date_mask(observed_on, start_date=start_date, end_date=end_date)
+        in_range = np.flatnonzero(in_range_mask)
+        assigned = self.assign(longitude[in_range], latitude[in_range])
+        clipped = []
+        for aoi, rows in zip(self.aois, assigned):
+            in_bbox = aoi.in_bbox(longitude, latitude)
+            bbox_in_range = int(np.count_nonzero(in_bbox & in_range_mask))
+            counts = {
+                "out_of_range_count": int(np.count_nonzero(in_bbox)) - bbox_in_range,
+                "out_of_aoi_count": bbox_in_range - len(rows),
+            }
+            clipped.append((in_range[rows], int(np.count_nonzero(in_bbox)), counts))
+        return clipped
+
+
+class AoiRegistry:
+    """Named AOI presets, parsed and prepared once per presets file."""
+
+    def __init__(self, aois: dict[str, Aoi]) -> None:
+        self._aois = aois
+
+    @classmethod
+    def from_geojson(cls, path: Path) -> "AoiRegistry":
+        aois: dict[str, Aoi] = {}
+        for feature in json.loads(path.read_text()).get("features", []):
+            name = feature.get("properties", {}).get("name")
+            geometry = feature.get("geometry") or {}
+            if not name or not geometry.get("coordinates"):
+                continue
+            aois[name] = Aoi.from_geometry(name, geometry)
+        return cls(aois)
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(self._aois)
+
+    def resolve(self, aoi_input: str) -> Aoi:
+        """Return a named preset, or an ad-hoc AOI for a ``min_lon,min_lat,max_lon,max_lat`` bbox."""
+        if aoi_input in self._aois:
+            return self._aois[aoi_input]
+
+        parsed_bbox = parse_bbox(aoi_input)
+        if parsed_bbox:
+            return Aoi.from_bbox(parsed_bbox)
+
+        raise ValueError(
+            "Invalid --aoi. Use one of the named presets "
+            f"({', '.join(self.names)}) or a bbox in the format min_lon,min_lat,max_lon,max_lat"
+        )
+
+
+@cache
+def load_registry(path: Path = DEFAULT_AOI_PRESETS) -> AoiRegistry:
+    return AoiRegistry.from_geojson(path)
@@ -0,0 +1,300 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import duckdb
+
+from run_catalog import RunCatalog
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_ROOT = ROOT / "pipelines" / "artifacts"
+# JSON artifacts are one object per file; DuckDB's default 16 MB cap would reject large runs.
+MAX_JSON_OBJECT_BYTES = 1 << 30
+
+# Columns of every view, in order, so a view with no artifacts behind it is
+# still queryable (and empty) instead of failing to bind.
+VIEW_COLUMNS = {
+    "gee_points": {
+        "run_id": "VARCHAR",
+        "aoi": "VARCHAR",
+        "observed_on": "VARCHAR",
+        "lat": "DOUBLE",
+        "lon": "DOUBLE",
+        "ch4_ppb": "DOUBLE",
+        "qa_value": "DOUBLE",
+        "source": "VARCHAR",
+    },
+    "observations": {
+        "run_id": "VARCHAR",
+        "aoi": "VARCHAR",
+        "observation_id": "VARCHAR",
+        "observed_on": "VARCHAR",
+        "latitude": "DOUBLE",
+        "longitude": "DOUBLE",
+        "ch4_ppb": "DOUBLE",
+        "qa_value": "DOUBLE",
+    },
+    "observation_qa": {
+        "run_id": "VARCHAR",
+        "aoi": "VARCHAR",
+        "observation_id": "VARCHAR",
+        "observed_on": "VARCHAR",
+        "qa_pass": "BOOLEAN",
+    },
+    "hotspots": {
+        "run_id": "VARCHAR",
+        "aoi": "VARCHAR",
+        "id": "VARCHAR",
+        "observed_on": "VARCHAR",
+        "anomaly_score": "DOUBLE",
+        "mean_anomaly_ppb": "DOUBLE",
+        "background_ppb": "DOUBLE",
+        "qa_pass_ratio": "DOUBLE",
+        "pixel_count": "BIGINT",
+        "area_km2": "DOUBLE",
+        "centroid_latitude": "DOUBLE",
+        "centroid_longitude": "DOUBLE",
+    },
+}
+
+QUERIES = {
+    # Raw GEE points below the QA threshold, per AOI and ISO week.
+    "qa_weekly": """
+        SELECT
+            aoi,
+            strftime(date_trunc('week', observed_on::DATE), '%Y-%m-%d') AS week,
+            count(*) FILTER (WHERE qa_value < $qa_threshold) AS qa_fail_count,
+            count(*) AS point_count
+        FROM gee_points
+        GROUP BY ALL
+        ORDER BY aoi, week
+    """,
+    "hotspots_weekly": """
+        SELECT
+            aoi,
+            strftime(date_trunc('week', observed_on::DATE), '%Y-%m-%d') AS week,
+            count(*) AS hotspot_count,
+            max(anomaly_score) AS max_anomaly_score,
+            sum(area_km2) AS area_km2
+        FROM hotspots
+        GROUP BY ALL
+        ORDER BY aoi, week
+    """,
+    "runs": """
+        SELECT stage, aoi, count(*) AS run_count, min(start_date) AS start_date, max(end_date) AS end_date
+        FROM runs
+        GROUP BY ALL
+        ORDER BY stage, aoi
+    """,
+}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query pipeline artifacts in place with DuckDB")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument("--query", choices=tuple(QUERIES), default="qa_weekly", help="Named query to run")
+    query.add_argument("--sql", help="Ad-hoc SQL over the artifact views (see connect)")
+    parser.add_argument("--aoi", action="append", help="Only scan runs for this AOI; repeat for several")
+    parser.add_argument("--start-date", help="Only scan runs and day partitions on or after this date")
+    parser.add_argument("--end-date", help="Only scan runs and day partitions before this (exclusive) date")
+    parser.add_argument("--qa-threshold", type=float, default=float(os.getenv("GEE_QA_THRESHOLD", "0.5")))
+    parser.add_argument("--output-root", type=Path, default=Path(os.getenv("PIPELINE_ARTIFACT_ROOT", DEFAULT_OUTPUT_ROOT)))
+    return parser.parse_args(argv)
+
+
+def _in_range(day: str, start_date: str | None, end_date: str | None) -> bool:
+    return (start_date is None or day >= start_date) and (end_date is None or day < end_date)
+
+
+def _existing(path: str | None) -> Path | None:
+    return Path(path) if path and Path(path).exists() else None
+
+
+def artifact_files(
+    output_root: Path,
+    *,
+    aois: list[str] | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> dict[str, list[tuple[str, str, str | None]]]:
+    """List the artifact files each view scans, as (path, run_id, aoi), pruned by AOI and date.
+
+    Runs come from the run catalog, so only runs for the requested AOIs whose
+    date range overlaps the half-open [start_date, end_date) window are
+    considered; GEE points are further pruned to the ``observed_on=<day>``
+    partitions inside the window.
+    """
+    catalog = RunCatalog(output_root)
+    window = {"aois": aois, "start_date": start_date, "end_date": end_date}
+    files: dict[str, list[tuple[str, str, str | None]]] = {
+        "gee_points": [],
+        "gee_points_legacy": [],
+        "observations_parquet": [],
+        "observations_json": [],
+        "observation_qa": [],
+        "hotspots": [],
+    }
+
+    for run in catalog.runs("fetch", **window):
+        run_dir = Path(run["paths"].get("artifact_dir") or output_root / "source" / "gee" / run["run_id"])
+        for partition in sorted((run_dir / "points").glob("observed_on=*")):
+            if _in_range(partition.name.split("=", 1)[1], start_date, end_date):
+                files["gee_points"].extend(
+                    (str(path), run["run_id"], run["aoi"]) for path in sorted(partition.glob("*.parquet"))
+                )
+        if (run_dir / "points.parquet").exists():
+            files["gee_points_legacy"].append((str(run_dir / "points.parquet"), run["run_id"], run["aoi"]))
+
+    for run in catalog.runs("ingest", **window):
+        processed = _existing(run["paths"].get("processed_path"))
+        if processed is not None:
+            kind = "observations_json" if processed.suffix == ".json" else "observations_parquet"
+            files[kind].append((str(processed), run["run_id"], run["aoi"]))
+        observation_qa = _existing(run["paths"].get("observation_qa_path"))
+        if observation_qa is not None:
+            files["observation_qa"].append((str(observation_qa), run["run_id"], run["aoi"]))
+
+    for run in catalog.runs("detect", **window):
+        hotspots = _existing(run["paths"].get("hotspots_path"))
+        if hotspots is not None:
+            files["hotspots"].append((str(hotspots), run["run_id"], run["aoi"]))
+    return files
+
+
+def _paths_literal(entries: list[tuple[str, str, str | None]]) -> str:
+    return "[" + ", ".join("'" + path.replace("'", "''") + "'" for path, _, _ in entries) + "]"
+
+
+def _select(view: str, source: str) -> str:
+    # Run identity comes from the artifact_files join on the scan's filename
+    # column; every other column is read straight from the files, so filters on
+    # them are pushed into the Parquet scan and unused columns are never read.
+    columns = ", ".join(
+        f"files.{name}" if name in ("run_id", "aoi") else f"CAST(scan.{name} AS {kind}) AS {name}"
+        for name, kind in VIEW_COLUMNS[view].items()
+    )
+    return f"SELECT {columns} FROM {source} AS scan JOIN artifact_files AS files ON files.path = scan.filename"
+
+
+def _empty(view: str) -> str:
+    columns = ", ".join(f"NULL::{kind} AS {name}" for name, kind in VIEW_COLUMNS[view].items())
+    return f"SELECT {columns} WHERE false"
+
+
+def _view_sources(files: dict[str, list[tuple[str, str, str | None]]]) -> dict[str, list[str]]:
+    json_options = f"filename = true, maximum_object_size = {MAX_JSON_OBJECT_BYTES}"
+    sources: dict[str, list[str]] = {view: [] for view in VIEW_COLUMNS}
+    if files["gee_points"]:
+        sources["gee_points"].append(
+            _select(
+                "gee_points",
+                f"read_parquet({_paths_literal(files['gee_points'])}, hive_partitioning = true, "
+                "hive_types = {'observed_on': VARCHAR}, filename = true)",
+            )
+        )
+    if files["gee_points_legacy"]:
+        sources["gee_points"].append(
+            _select("gee_points", f"read_parquet({_paths_literal(files['gee_points_legacy'])}, filename = true)")
+        )
+    if files["observations_parquet"]:
+        sources["observations"].append(
+            _select(
+                "observations",
+                f"read_parquet({_paths_literal(files['observations_parquet'])}, union_by_name = true, filename = true)",
+            )
+        )
+    if files["observations_json"]:
+        unnested = (
+            "(SELECT filename, unnest(observations, recursive := true) "
+            f"FROM read_json({_paths_literal(files['observations_json'])}, {json_options}))"
+        )
+        sources["observations"].append(_select("observations", unnested))
+    if files["observation_qa"]:
+        sources["observation_qa"].append(
+            _select("observation_qa", f"read_parquet({_paths_literal(files['observation_qa'])}, filename = true)")
+        )
+    if files["hotspots"]:
+        unnested = (
+            "(SELECT filename, unnest(hotspots, max_depth := 2) "
+            f"FROM read_json({_paths_literal(files['hotspots'])}, {json_options}))"
+        )
+        sources["hotspots"].append(_select("hotspots", unnested))
+    return sources
+
+
+def connect(
+    output_root: Path,
+    *,
+    aois: list[str] | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> duckdb.DuckDBPyConnection:
+    """In-memory DuckDB connection with the artifacts under ``output_root`` registered as views.
+
+    Views: ``runs`` (the run catalog), ``gee_points`` (fetched points),
+    ``observations`` (QA-passed ingest output), ``observation_qa`` (per-point
+    QA outcome of streamed ingests) and ``hotspots`` (detect output). Each
+    carries ``run_id`` and ``aoi``; the files are scanned in place at query time.
+    """
+    files = artifact_files(output_root, aois=aois, start_date=start_date, end_date=end_date)
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE artifact_files (path VARCHAR PRIMARY KEY, run_id VARCHAR, aoi VARCHAR)")
+    entries = [entry for view_files in files.values() for entry in view_files]
+    if entries:
+        conn.executemany("INSERT INTO artifact_files VALUES (?, ?, ?)", entries)
+
+    conn.execute(
+        "CREATE TABLE runs (stage VARCHAR, run_id VARCHAR, aoi VARCHAR, start_date VARCHAR, end_date VARCHAR, "
+        "parent_run_id VARCHAR, completed_at VARCHAR, counts JSON, params JSON)"
+    )
+    catalog = RunCatalog(output_root)
+    runs = [
+        (
+            run["stage"],
+            run["run_id"],
+            run["aoi"],
+            run["start_date"],
+            run["end_date"],
+            run["parent_run_id"],
+            run["completed_at"],
+            json.dumps(run["counts"]),
+            json.dumps(run["params"]),
+        )
+        for stage in ("fetch", "ingest", "detect", "load")
+        for run in catalog.runs(stage, aois=aois, start_date=start_date, end_date=end_date)
+    ]
+    if runs:
+        conn.executemany("INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", runs)
+
+    for view, sources in _view_sources(files).items():
+        conn.execute(f"CREATE VIEW {view} AS {' UNION ALL '.join(sources) or _empty(view)}")
+    return conn
+
+
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    conn = connect(args.output_root, aois=args.aoi, start_date=args.start_date, end_date=args.end_date)
+    query = args.sql or QUERIES[args.query]
+    result = conn.execute(query, {"qa_threshold": args.qa_threshold} if "$qa_threshold" in query else None)
+    columns = [column[0] for column in result.description]
+    rows = [dict(zip(columns, row)) for row in result.fetchall()]
+    scanned = conn.execute("SELECT count(*) FROM artifact_files").fetchone()[0]
+    conn.close()
+
+    report = {
+        "stage": "analytics",
+        "query": "sql" if args.sql else args.query,
+        "artifact_file_count": scanned,
+        "row_count": len(rows),
+        "rows": rows,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    print(json.dumps(report, default=str))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import math
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from hotspot_clustering import grid_cells
+
+BACKGROUND_MODES = ("global", "local")
+# Scales a median absolute deviation to a standard deviation for Gaussian noise.
+MAD_TO_SIGMA = 1.4826
+# Lower bound on the robust scale so flat scenes don't divide by ~0; TROPOMI
+# XCH4 single-sounding precision is well above 1 ppb.
+MIN_ROBUST_SCALE_PPB = 1.0
+# Windows with fewer populated cells than this fall back to the scene background.
+MIN_BACKGROUND_CELLS = 5
+# Occupied cells gathered per batch; bounds the window copy to a few hundred MB.
+_WINDOW_BATCH_CELLS = 8192
+# Largest padded day x row x col raster local_background allocates at once
+# (float64, so 256 MiB). Scenes spanning more cells are split into tiles that
+# each fit, with the same result as one raster.
+MAX_RASTER_CELLS = 1 << 25
+
+
+def _row_nanmedian(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Sorting pushes NaN to the end of each row, so the median sits at fixed
+    # offsets given the per-row count of valid values. Every window holds its own
+    # occupied cell, so no row is empty.
+    ordered = np.sort(values, axis=1)
+    counts = np.count_nonzero(~np.isnan(ordered), axis=1)
+    rows = np.arange(len(ordered))
+    return (ordered[rows, (counts - 1) // 2] + ordered[rows, counts // 2]) / 2, counts
+
+
+def _tile_shape(shape: tuple[int, int, int], pad: tuple[int, int, int], max_raster_cells: int) -> tuple[int, ...]:
+    # Halve the longest tile axis until the padded tile fits.
+    tile = list(shape)
+    while math.prod(size + extra for size, extra in zip(tile, pad)) > max_raster_cells:
+        axis = max(range(3), key=lambda index: tile[index])
+        if tile[axis] == 1:
+            raise ValueError(
+                f"Local background window spans {math.prod(1 + extra for extra in pad)} cells, more than "
+                f"max_raster_cells={max_raster_cells}; shrink the window or raise the limit"
+            )
+        tile[axis] = (tile[axis] + 1) // 2
+    return tuple(tile)
+
+
+def _tile_members(
+    coords: np.ndarray, shape: tuple[int, int, int], tile: np.ndarray, lower: np.ndarray, upper: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Every (cell, tile) pair where the cell lies in the tile's padded extent.
+
+    Tile ``k`` owns cells ``[k * tile, (k + 1) * tile)`` on each axis and reads
+    ``lower`` cells before and ``upper`` cells after that range.
+    """
+    first = np.maximum((coords - upper) // tile, 0)
+    last = np.minimum((coords + lower) // tile, (np.asarray(shape) - 1) // tile)
+    spans = last - first + 1
+    counts = spans.prod(axis=1)
+    cells = np.repeat(np.arange(len(coords)), counts)
+    offsets = np.arange(len(cells)) - np.repeat(np.cumsum(counts) - counts, counts)
+    steps = np.empty((len(cells), 3), dtype="int64")
+    for axis in (2, 1, 0):
+        steps[:, axis] = offsets % spans[cells, axis]
+        offsets = offsets // spans[cells, axis]
+    return cells, first[cells] + steps
+
+
+def robust_scale(values: np.ndarray, center: float) -> float:
+    if len(values) == 0:
+        return MIN_ROBUST_SCALE_PPB
+    return max(float(np.median(np.abs(values - center))) * MAD_TO_SIGMA, MIN_ROBUST_SCALE_PPB)
+
+
+def local_background(
+    frame: pd.DataFrame,
+    *,
+    grid_cell_deg: float,
+    window_cells: int,
+    window_days: int,
+    fallback_ppb: float,
+    fallback_scale_ppb: float,
+    max_raster_cells: int = MAX_RASTER_CELLS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-observation background and robust scale from neighbouring cells and days.
+
+    Observations are reduced to one median per (day, grid cell) and laid out
+    on a dense day x row x col raster. For every occupied cell the window of
+    +/- ``window_cells`` cells over that day and the ``window_days`` days before
+    it is read through a strided view (no per-pixel Python loop); the
+    background is the window median and the scale its MAD.
+
+    The raster, padded by the window, never exceeds ``max_raster_cells``: a
+    larger scene is cut into tiles that each fit, and only tiles holding
+    occupied cells are built.
+    """
+    if frame.empty:
+        return np.empty(0), np.empty(0)
+
+    rows, cols = grid_cells(
+        frame["latitude"].to_numpy(dtype="float64"), frame["longitude"].to_numpy(dtype="float64"), grid_cell_deg
+    )
+    days = pd.to_datetime(frame["observed_on"]).to_numpy().astype("datetime64[D]").astype("int64")
+    days = days - days.min()
+    rows = rows - rows.min()
+    cols = cols - cols.min()
+    shape = (int(days.max()) + 1, int(rows.max()) + 1, int(cols.max()) + 1)
+
+    cell_codes, cell_keys = pd.factorize(np.ravel_multi_index((days, rows, cols), shape))
+    cell_medians = pd.Series(frame["ch4_ppb"].to_numpy(dtype="float64")).groupby(cell_codes).median().to_numpy()
+    coords = np.stack(np.unravel_index(cell_keys, shape), axis=1)
+
+    # Windows reach back window_days days and window_cells cells either side.
+    lower = np.array([window_days, window_cells, window_cells])
+    upper = np.array([0, window_cells, window_cells])
+    window = tuple(int(size) for size in lower + upper + 1)
+    tile = np.array(_tile_shape(shape, tuple(int(extra) for extra in lower + upper), max_raster_cells))
+    member_cells, member_tiles = _tile_members(coords, shape, tile, lower, upper)
+    tile_grid = tuple(int(size) for size in (np.asarray(shape) - 1) // tile + 1)
+    order = np.argsort(np.ravel_multi_index(member_tiles.T, tile_grid), kind="stable")
+    member_cells, member_tiles = member_cells[order], member_tiles[order]
+    bounds = np.flatnonzero(np.any(np.diff(member_tiles, axis=0) != 0, axis=1)) + 1
+
+    cell_background = np.empty(len(cell_keys))
+    cell_scale = np.empty(len(cell_keys))
+    for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(member_cells)]):
+        cells = member_cells[start:stop]
+        owned = np.all(coords[cells] // tile == member_tiles[start], axis=1)
+        if not owned.any():
+            continue
+        tile_start = member_tiles[start] * tile
+        # NaN padding keeps every window in bounds: before the first day, around
+        # the grid edge and wherever a neighbouring tile has no data.
+        raster = np.full(tuple(int(size) for size in tile + lower + upper), np.nan)
+        local = coords[cells] - tile_start + lower
+        raster[local[:, 0], local[:, 1], local[:, 2]] = cell_medians[cells]
+        windows = sliding_window_view(raster, window)
+
+        targets = cells[owned]
+        corners = coords[targets] - tile_start
+        for batch_start in range(0, len(targets), _WINDOW_BATCH_CELLS):
+            batch = slice(batch_start, batch_start + _WINDOW_BATCH_CELLS)
+            batch_corners = corners[batch]
+            values = windows[batch_corners[:, 0], batch_corners[:, 1], batch_corners[:, 2]].reshape(
+                len(batch_corners), -1
+            )
+            median, counts = _row_nanmedian(values)
+            mad, _ = _row_nanmedian(np.abs(values - median[:, None]))
+            sparse = counts < MIN_BACKGROUND_CELLS
+            cell_background[targets[batch]] = np.where(sparse, fallback_ppb, median)
+            cell_scale[targets[batch]] = np.where(
+                sparse, fallback_scale_ppb, np.maximum(mad * MAD_TO_SIGMA, MIN_ROBUST_SCALE_PPB)
+            )
+
+    return cell_background[cell_codes], cell_scale[cell_codes]
@@ -0,0 +1,216 @@
+from statistics import median
+
+import numpy as np
+import pandas as pd
+
+from background import BACKGROUND_MODES, local_background, robust_scale
+from hotspot_clustering import cluster_anomalies
+
+OBSERVATION_COLUMNS = ("observation_id", "observed_on", "latitude", "longitude", "ch4_ppb")
+
+# Anomalies are rounded to 3 decimals before thresholding, which moves a value by
+# at most 0.0005. Prefiltering with a wider margin keeps the vectorized mask a
+# strict superset of the rows the exact per-row rounding accepts.
+_ROUNDING_MARGIN = 1e-3
+
+
+def observations_frame(observations: list[dict]) -> pd.DataFrame:
+    if not observations:
+        return pd.DataFrame(
+            {
+                "observation_id": pd.Series(dtype="object"),
+                "observed_on": pd.Series(dtype="object"),
+                "latitude": pd.Series(dtype="float64"),
+                "longitude": pd.Series(dtype="float64"),
+                "ch4_ppb": pd.Series(dtype="float64"),
+            }
+        )
+
+    return pd.DataFrame(
+        {
+            "observation_id": [obs["observation_id"] for obs in observations],
+            "observed_on": [obs["observed_on"] for obs in observations],
+            "latitude": np.fromiter((obs["latitude"] for obs in observations), dtype="float64"),
+            "longitude": np.fromiter((obs["longitude"] for obs in observations), dtype="float64"),
+            "ch4_ppb": np.fromiter((obs["ch4_ppb"] for obs in observations), dtype="float64"),
+        }
+    )
+
+
+def compute_baseline(ch4_ppb: np.ndarray) -> float:
+    if len(ch4_ppb) == 0:
+        return 0.0
+    return float(np.median(ch4_ppb))
+
+
+def score_anomalies(
+    frame: pd.DataFrame,
+    *,
+    anomaly_threshold_ppb: float,
+    background_ppb: np.ndarray | None = None,
+    scale_ppb: np.ndarray | None = None,
+    robust_z_threshold: float | None = None,
+) -> tuple[float, pd.DataFrame]:
+    """Return the scene baseline and the observations at or above the threshold.
+
+    ``background_ppb`` gives a per-observation background (default: the scene
+    median for every row). With ``scale_ppb`` a ``robust_z`` column is added, and
+    ``robust_z_threshold`` additionally requires ``robust_z`` at or above it.
+    The returned frame keeps the input columns plus ``anomaly_score`` (ppb above
+    background, rounded to 3 decimals) and ``background_ppb``, in input order.
+    """
+    ch4_ppb = frame["ch4_ppb"].to_numpy(dtype="float64")
+    baseline = compute_baseline(ch4_ppb)
+    if background_ppb is None:
+        background_ppb = np.full(len(ch4_ppb), baseline)
+
+    raw_anomaly = ch4_ppb - background_ppb
+    candidate_mask = raw_anomaly >= anomaly_threshold_ppb - _ROUNDING_MARGIN
+    if robust_z_threshold is not None:
+        candidate_mask &= raw_anomaly >= robust_z_threshold * scale_ppb
+    candidate_idx = np.flatnonzero(candidate_mask)
+
+    # Only the (small) candidate set goes through Python's round() so scores match
+    # the record-at-a-time job bit for bit.
+    anomalies = frame.iloc[candidate_idx].assign(
+        anomaly_score=[round(value, 3) for value in raw_anomaly[candidate_idx].tolist()],
+        background_ppb=background_ppb[candidate_idx],
+    )
+    if scale_ppb is not None:
+        anomalies["robust_z"] = np.round(raw_anomaly[candidate_idx] / scale_ppb[candidate_idx], 3)
+    return baseline, anomalies[anomalies["anomaly_score"] >= anomaly_threshold_ppb]
+
+
+def detect_hotspots(
+    frame: pd.DataFrame,
+    *,
+    anomaly_threshold_ppb: float,
+    qa_pass_ratio: float,
+) -> tuple[float, list[dict]]:
+    # One hotspot per anomalous observation; see detect_hotspot_clusters for the
+    # spatially merged output the detect job writes.
+    baseline, anomalies = score_anomalies(frame, anomaly_threshold_ppb=anomaly_threshold_ppb)
+
+    hotspots: list[dict] = []
+    for observation_id, observed_on, latitude, longitude, anomaly in zip(
+        anomalies["observation_id"].tolist(),
+        anomalies["observed_on"].tolist(),
+        anomalies["latitude"].tolist(),
+        anomalies["longitude"].tolist(),
+        anomalies["anomaly_score"].tolist(),
+    ):
+        hotspots.append(
+            {
+                "id": f"hs-{observation_id}",
+                "source_observation_id": observation_id,
+                "observed_on": observed_on,
+                "anomaly_score": anomaly,
+                "threshold": anomaly_threshold_ppb,
+                "qa_pass_ratio": round(qa_pass_ratio, 3),
+                "pixel_count": 1,
+                "area_km2": 7.0,
+                "centroid_latitude": latitude,
+                "centroid_longitude": longitude,
+            }
+        )
+
+    return baseline, hotspots
+
+
+def detect_hotspot_clusters(
+    frame: pd.DataFrame,
+    *,
+    anomaly_threshold_ppb: float,
+    qa_pass_ratio: float,
+    grid_cell_deg: float,
+    background_mode: str = "global",
+    background_window_cells: int = 5,
+    background_window_days: int = 7,
+    robust_z_threshold: float | None = None,
+) -> tuple[float, list[dict]]:
+    if background_mode not in BACKGROUND_MODES:
+        raise ValueError(f"Unsupported background mode '{background_mode}'. Use one of: {', '.join(BACKGROUND_MODES)}")
+
+    ch4_ppb = frame["ch4_ppb"].to_numpy(dtype="float64")
+    baseline = compute_baseline(ch4_ppb)
+    scene_scale = robust_scale(ch4_ppb, baseline)
+    if background_mode == "local":
+        background_ppb, scale_ppb = local_background(
+            frame,
+            grid_cell_deg=grid_cell_deg,
+            window_cells=background_window_cells,
+            window_days=background_window_days,
+            fallback_ppb=baseline,
+            fallback_scale_ppb=scene_scale,
+        )
+    else:
+        background_ppb, scale_ppb = np.full(len(ch4_ppb), baseline), np.full(len(ch4_ppb), scene_scale)
+
+    _, anomalies = score_anomalies(
+        frame,
+        anomaly_threshold_ppb=anomaly_threshold_ppb,
+        background_ppb=background_ppb,
+        scale_ppb=scale_ppb,
+        robust_z_threshold=robust_z_threshold,
+    )
+    clusters = cluster_anomalies(anomalies, cell_deg=grid_cell_deg)
+    # Peak columns are looked up by row position, not observation_id, which the
+    # detector does not require to be unique.
+    peak_rows = clusters["peak_row"].to_numpy(dtype="int64")
+    peak_background = anomalies["background_ppb"].iloc[peak_rows].tolist()
+    peak_robust_z = anomalies["robust_z"].iloc[peak_rows].tolist()
+
+    hotspots = [
+        {
+            "id": f"hs-{cluster['peak_observation_id']}",
+            "source_observation_id": cluster["peak_observation_id"],
+            "source_observation_ids": cluster["observation_ids"],
+            "observed_on": cluster["observed_on"],
+            "anomaly_score": cluster["anomaly_score"],
+            "mean_anomaly_ppb": round(cluster["mean_anomaly_ppb"], 3),
+            "background_ppb": round(float(background), 3),
+            "robust_z": float(robust_z),
+            "threshold": anomaly_threshold_ppb,
+            "qa_pass_ratio": round(qa_pass_ratio, 3),
+            "pixel_count": int(cluster["pixel_count"]),
+            "area_km2": round(cluster["area_km2"], 3),
+            "centroid_latitude": cluster["centroid_latitude"],
+            "centroid_longitude": cluster["centroid_longitude"],
+            "geometry": cluster["geometry"],
+        }
+        for cluster, background, robust_z in zip(
+            clusters.to_dict(orient="records"), peak_background, peak_robust_z
+        )
+    ]
+    hotspots.sort(key=lambda hotspot: (hotspot["observed_on"], -hotspot["anomaly_score"], hotspot["id"]))
+    return baseline, hotspots
+
+
+def detect_hotspots_reference(
+    observations: list[dict],
+    *,
+    anomaly_threshold_ppb: float,
+    qa_pass_ratio: float,
+) -> tuple[float, list[dict]]:
+    # Record-at-a-time implementation kept as the parity/benchmark reference.
+    baseline = median(obs["ch4_ppb"] for obs in observations) if observations else 0.0
+
+    hotspots = []
+    for obs in observations:
+        anomaly = round(obs["ch4_ppb"] - baseline, 3)
+        if anomaly >= anomaly_threshold_ppb:
+            hotspots.append(
+                {
+                    "id": f"hs-{obs['observation_id']}",
+                    "source_observation_id": obs["observation_id"],
+                    "observed_on": obs["observed_on"],
+                    "anomaly_score": anomaly,
+                    "threshold": anomaly_threshold_ppb,
+                    "qa_pass_ratio": round(qa_pass_ratio, 3),
+                    "pixel_count": 1,
+                    "area_km2": 7.0,
+                    "centroid_latitude": obs["latitude"],
+                    "centroid_longitude": obs["longitude"],
+                }
+            )
+    return baseline, hotspots
@@ -1,109 +1,174 @@
 import argparse
 import json
 import os
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
-from statistics import median
+
+import pandas as pd
+
+from background import BACKGROUND_MODES
+from detect_engine import OBSERVATION_COLUMNS, detect_hotspot_clusters
+from observation_store import ingest_processed_path, read_processed_observations
+from run_catalog import RunCatalog
 
 ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_OUTPUT_ROOT = ROOT / "pipelines" / "artifacts"
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Fixture-backed hotspot detect smoke job")
     parser.add_argument("--ingest-run-id", default=os.getenv("DETECT_INGEST_RUN_ID"))
+    parser.add_argument("--aoi", help="Without --ingest-run-id, detect on the latest ingest run for this AOI")
     parser.add_argument(
         "--anomaly-threshold-ppb",
         type=float,
         default=float(os.getenv("DETECT_ANOMALY_THRESHOLD_PPB", "40")),
     )
+    parser.add_argument(
+        "--grid-cell-deg",
+        type=float,
+        default=float(os.getenv("DETECT_GRID_CELL_DEG", "0.05")),
+    )
+    parser.add_argument(
+        "--background-mode",
+        choices=BACKGROUND_MODES,
+        default=os.getenv("DETECT_BACKGROUND_MODE", "global"),
+        help="global: one scene median; local: windowed median/MAD over neighbouring cells and previous days",
+    )
+    parser.add_argument(
+        "--background-window-cells",
+        type=int,
+        default=int(os.getenv("DETECT_BACKGROUND_WINDOW_CELLS", "5")),
+        help="Local background window half-width in grid cells",
+    )
+    parser.add_argument(
+        "--background-window-days",
+        type=int,
+        default=int(os.getenv("DETECT_BACKGROUND_WINDOW_DAYS", "7")),
+        help="Previous days included in the local background window",
+    )
+    parser.add_argument(
+        "--robust-z-threshold",
+        type=float,
+        default=float(os.environ["DETECT_ROBUST_Z_THRESHOLD"]) if os.getenv("DETECT_ROBUST_Z_THRESHOLD") else None,
+        help="Also require (observed - background) / (1.4826 * MAD) at or above this value",
+    )
     parser.add_argument("--output-root", type=Path, default=Path(os.getenv("PIPELINE_ARTIFACT_ROOT", DEFAULT_OUTPUT_ROOT)))
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def resolve_ingest_run_id(output_root: Path, ingest_run_id: str | None) -> str:
+def resolve_ingest_run_id(output_root: Path, ingest_run_id: str | None, aoi: str | None = None) -> str:
     if ingest_run_id:
         return ingest_run_id
 
-    ingest_root = output_root / "ingest"
-    runs = sorted(path.name for path in ingest_root.iterdir() if path.is_dir())
-    if not runs:
-        raise FileNotFoundError("No ingest artifacts found. Run make ingest first.")
-    return runs[-1]
+    latest = RunCatalog(output_root).latest("ingest", aoi=aoi)
+    if latest is None:
+        scope = f" for AOI {aoi}" if aoi else ""
+        raise FileNotFoundError(
+            f"No ingest runs{scope} in the run catalog. Run make ingest first "
+            "(or make catalog_backfill for artifacts written before the catalog)."
+        )
+    return latest["run_id"]
 
 
-def main() -> None:
-    args = parse_args()
-    ingest_run_id = resolve_ingest_run_id(args.output_root, args.ingest_run_id)
+def _background_settings(args: argparse.Namespace) -> dict:
+    settings = {"mode": args.background_mode, "robust_z_threshold": args.robust_z_threshold}
+    if args.background_mode == "local":
+        settings["window_cells"] = args.background_window_cells
+        settings["window_days"] = args.background_window_days
+    return settings
 
-    ingest_payload_path = args.output_root / "ingest" / ingest_run_id / "processed" / "observations.json"
-    ingest_metadata_path = args.output_root / "ingest" / ingest_run_id / "metadata.json"
-    ingest_payload = json.loads(ingest_payload_path.read_text())
-    ingest_metadata = json.loads(ingest_metadata_path.read_text())
 
-    observations = ingest_payload["observations"]
-    if not observations:
-        baseline = 0.0
+@dataclass
+class DetectResult:
+    """In-memory output of detect: the hotspots.json payload and run metadata."""
+
+    run_id: str
+    payload: dict
+    metadata: dict
+
+
+def run_detect(args: argparse.Namespace, observations: pd.DataFrame, ingest_metadata: dict) -> DetectResult:
+    """Detect hotspots in ``observations`` (one ingest run) in memory.
+
+    The detect run shares the ingest run's ID. Nothing is written; use
+    ``write_detect_artifacts`` to persist the result.
+    """
+    ingest_run_id = ingest_metadata["run_id"]
+    if observations.empty:
         qa_pass_ratio = 0.0
     else:
-        baseline = median(obs["ch4_ppb"] for obs in observations)
         qa_pass_ratio = ingest_metadata["qa_pass_count"] / max(1, ingest_metadata["raw_count"])
 
-    hotspots = []
-    for obs in observations:
-        anomaly = round(obs["ch4_ppb"] - baseline, 3)
-        if anomaly >= args.anomaly_threshold_ppb:
-            hotspot_id = f"hs-{obs['observation_id']}"
-            hotspots.append(
-                {
-                    "id": hotspot_id,
-                    "source_observation_id": obs["observation_id"],
-                    "observed_on": obs["observed_on"],
-                    "anomaly_score": anomaly,
-                    "threshold": args.anomaly_threshold_ppb,
-                    "qa_pass_ratio": round(qa_pass_ratio, 3),
-                    "pixel_count": 1,
-                    "area_km2": 7.0,
-                    "centroid_latitude": obs["latitude"],
-                    "centroid_longitude": obs["longitude"],
-                }
-            )
-
-    run_id = ingest_run_id
-    run_dir = args.output_root / "detect" / run_id
-    run_dir.mkdir(parents=True, exist_ok=True)
+    baseline, hotspots = detect_hotspot_clusters(
+        observations[list(OBSERVATION_COLUMNS)],
+        anomaly_threshold_ppb=args.anomaly_threshold_ppb,
+        qa_pass_ratio=qa_pass_ratio,
+        grid_cell_deg=args.grid_cell_deg,
+        background_mode=args.background_mode,
+        background_window_cells=args.background_window_cells,
+        background_window_days=args.background_window_days,
+        robust_z_threshold=args.robust_z_threshold,
+    )
 
-    detection_payload = {
+    payload = {
         "ingest_run_id": ingest_run_id,
         "baseline_ppb": baseline,
         "anomaly_threshold_ppb": args.anomaly_threshold_ppb,
+        "grid_cell_deg": args.grid_cell_deg,
+        "background": _background_settings(args),
         "hotspots": hotspots,
     }
     metadata = {
-        "run_id": run_id,
+        "run_id": ingest_run_id,
         "stage": "detect",
         "input_ingest_run_id": ingest_run_id,
         "baseline_ppb": baseline,
         "anomaly_threshold_ppb": args.anomaly_threshold_ppb,
+        "grid_cell_deg": args.grid_cell_deg,
+        "background": _background_settings(args),
         "candidate_count": len(hotspots),
+        "anomalous_observation_count": sum(len(hotspot["source_observation_ids"]) for hotspot in hotspots),
         "source_observation_count": len(observations),
         "generated_at": datetime.now(UTC).isoformat(),
-        "hotspots_path": str(run_dir / "hotspots.json"),
     }
+    return DetectResult(run_id=ingest_run_id, payload=payload, metadata=metadata)
+
 
-    (run_dir / "hotspots.json").write_text(json.dumps(detection_payload, indent=2))
+def write_detect_artifacts(result: DetectResult, output_root: Path) -> Path:
+    run_dir = output_root / "detect" / result.run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    hotspots_path = run_dir / "hotspots.json"
+    hotspots_path.write_text(json.dumps(result.payload, indent=2))
+    metadata = {**result.metadata, "hotspots_path": str(hotspots_path)}
     (run_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
+    RunCatalog(output_root).record("detect", result.run_id, metadata, paths={"artifact_dir": str(run_dir)})
+    return run_dir
 
-    print(
-        json.dumps(
-            {
-                "stage": "detect",
-                "run_id": run_id,
-                "candidate_count": len(hotspots),
-                "artifact_dir": str(run_dir),
-            }
-        )
+
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    ingest_run_id = resolve_ingest_run_id(args.output_root, args.ingest_run_id, args.aoi)
+
+    ingest_run_dir = args.output_root / "ingest" / ingest_run_id
+    ingest_metadata = json.loads((ingest_run_dir / "metadata.json").read_text())
+    observations = read_processed_observations(
+        ingest_processed_path(ingest_run_dir, ingest_metadata),
+        columns=OBSERVATION_COLUMNS,
     )
+    # Runs whose metadata predates the run_id field are addressed by directory name.
+    result = run_detect(args, observations, {**ingest_metadata, "run_id": ingest_run_id})
+    run_dir = write_detect_artifacts(result, args.output_root)
+
+    report = {
+        "stage": "detect",
+        "run_id": result.run_id,
+        "candidate_count": result.metadata["candidate_count"],
+        "artifact_dir": str(run_dir),
+    }
+    print(json.dumps(report))
+    return report
 
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+import hashlib
+import math
+from collections.abc import Iterable
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+# confidence = 1 - exp(-detection_days / scale): ~0.5 after 4 days, ~0.86 after 12.
+CONFIDENCE_SCALE_DETECTIONS = 6.0
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def emitter_confidence(detection_count: int) -> float:
+    return round(1 - math.exp(-detection_count / CONFIDENCE_SCALE_DETECTIONS), 3)
+
+
+def new_emitter_id(founding_hotspot_id: str) -> str:
+    # Derived from the hotspot that founded the emitter, so re-linking the same
+    # history yields the same IDs whatever the database sequence state.
+    return f"em-{hashlib.blake2b(founding_hotspot_id.encode('utf-8'), digest_size=6).hexdigest()}"
+
+
+class EmitterIndex:
+    """Grid-bucket spatial index over emitter positions.
+
+    Buckets are ``cell_deg`` square; a radius query only visits the buckets
+    overlapping the query box, so lookups cost O(nearby emitters) rather than
+    O(all emitters).
+    """
+
+    def __init__(self, cell_deg: float) -> None:
+        self.cell_deg = cell_deg
+        self._buckets: dict[tuple[int, int], dict[str, tuple[float, float]]] = {}
+        self._cells: dict[str, tuple[int, int]] = {}
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def upsert(self, emitter_id: str, latitude: float, longitude: float) -> None:
+        cell = self._cell(latitude, longitude)
+        previous = self._cells.get(emitter_id)
+        if previous is not None and previous != cell:
+            del self._buckets[previous][emitter_id]
+        self._buckets.setdefault(cell, {})[emitter_id] = (latitude, longitude)
+        self._cells[emitter_id] = cell
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float) -> list[tuple[float, str]]:
+        """(distance_km, emitter_id) pairs within ``radius_km``, nearest first."""
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+        row_min, col_min = self._cell(latitude - lat_span, longitude - lon_span)
+        row_max, col_max = self._cell(latitude + lat_span, longitude + lon_span)
+
+        matches = []
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                for emitter_id, (emitter_lat, emitter_lon) in self._buckets.get((row, col), {}).items():
+                    distance = haversine_km(latitude, longitude, emitter_lat, emitter_lon)
+                    if distance <= radius_km:
+                        matches.append((distance, emitter_id))
+        matches.sort()
+        return matches
+
+
+class EmitterLinker:
+    """Links daily hotspots to persistent emitters, updating stats incrementally.
+
+    Seed it with the current emitters, then feed days in order through
+    ``link_day``. Only the new hotspots are touched: emitter positions are
+    running means over detection days, and counts/last_seen/confidence are
+    updated in place, so matching within a run never reprocesses earlier days.
+    These are working estimates: a day already linked in an earlier run is
+    counted again here, so link_emitters stores the stats recomputed from the
+    distinct linked days (``refresh_emitter_detections``) instead.
+
+    A hotspot links to the nearest emitter within ``link_radius_km`` of its
+    centroid, widened by the hotspot's equivalent radius so large clusters
+    that overlap an emitter still match. Unmatched hotspots found new emitters.
+    """
+
+    def __init__(self, emitters: Iterable[dict], *, link_radius_km: float, max_hotspot_radius_km: float = 25.0) -> None:
+        self.link_radius_km = link_radius_km
+        self.max_hotspot_radius_km = max_hotspot_radius_km
+        self.emitters: dict[str, dict] = {}
+        self.index = EmitterIndex(cell_deg=max(link_radius_km, 1.0) / KM_PER_DEGREE)
+        self.changed: set[str] = set()
+        self.created: set[str] = set()
+        for emitter in emitters:
+            self.emitters[emitter["id"]] = dict(emitter)
+            self.index.upsert(emitter["id"], emitter["latitude"], emitter["longitude"])
+
+    def _search_radius_km(self, hotspot: dict) -> float:
+        equivalent_radius = math.sqrt(max(hotspot.get("area_km2", 0.0), 0.0) / math.pi)
+        return self.link_radius_km + min(equivalent_radius, self.max_hotspot_radius_km)
+
+    def _found(self, hotspot: dict) -> str:
+        emitter_id = new_emitter_id(hotspot["id"])
+        self.emitters[emitter_id] = {
+            "id": emitter_id,
+            "name": f"Emitter {hotspot['centroid_latitude']:.2f}, {hotspot['centroid_longitude']:.2f}",
+            "confidence": 0.0,
+            "detection_count": 0,
+            "last_seen": hotspot["observed_on"],
+            "latitude": hotspot["centroid_latitude"],
+            "longitude": hotspot["centroid_longitude"],
+        }
+        self.index.upsert(emitter_id, hotspot["centroid_latitude"], hotspot["centroid_longitude"])
+        self.created.add(emitter_id)
+        return emitter_id
+
+    def link_day(self, observed_on: str, hotspots: list[dict]) -> list[tuple[str, str]]:
+        """Link one day's hotspots; returns (hotspot_id, emitter_id) pairs."""
+        links = []
+        detections: dict[str, list[dict]] = {}
+        # Strongest first, so a strong plume claims its emitter before fragments.
+        for hotspot in sorted(hotspots, key=lambda item: (-item["anomaly_score"], item["id"])):
+            matches = self.index.nearby(
+                hotspot["centroid_latitude"], hotspot["centroid_longitude"], self._search_radius_km(hotspot)
+            )
+            emitter_id = matches[0][1] if matches else self._found(hotspot)
+            detections.setdefault(emitter_id, []).append(hotspot)
+            links.append((hotspot["id"], emitter_id))
+
+        # One detection per emitter per day, positioned at the day's mean centroid.
+        for emitter_id, matched in detections.items():
+            emitter = self.emitters[emitter_id]
+            count = emitter["detection_count"] + 1
+            day_lat = sum(item["centroid_latitude"] for item in matched) / len(matched)
+            day_lon = sum(item["centroid_longitude"] for item in matched) / len(matched)
+            emitter["latitude"] += (day_lat - emitter["latitude"]) / count
+            emitter["longitude"] += (day_lon - emitter["longitude"]) / count
+            emitter["detection_count"] = count
+            emitter["last_seen"] = max(emitter["last_seen"] or observed_on, observed_on)
+            emitter["confidence"] = emitter_confidence(count)
+            self.index.upsert(emitter_id, emitter["latitude"], emitter["longitude"])
+            self.changed.add(emitter_id)
+
+        return links
+
+    def changed_emitters(self) -> list[dict]:
+        return [self.emitters[emitter_id] for emitter_id in sorted(self.changed)]
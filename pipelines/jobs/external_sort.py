@@ -0,0 +1,66 @@
+import heapq
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class ExternalSorter:
+    """Sorts more records than fit in memory by spilling sorted runs to Parquet.
+
+    At most ``batch_size`` records are buffered while adding, and the k-way merge
+    reads each run in slices so the merge also holds about ``batch_size`` records.
+    """
+
+    def __init__(
+        self,
+        *,
+        key: Callable[[dict[str, Any]], Any],
+        schema: pa.Schema,
+        batch_size: int,
+        tmp_dir: Path,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self._key = key
+        self._schema = schema
+        self._batch_size = batch_size
+        self._tmp_dir = tmp_dir
+        self._buffer: list[dict[str, Any]] = []
+        self._runs: list[Path] = []
+        self.count = 0
+
+    @property
+    def run_count(self) -> int:
+        return len(self._runs)
+
+    def add(self, records: Iterable[dict[str, Any]]) -> None:
+        for record in records:
+            self._buffer.append(record)
+            self.count += 1
+            if len(self._buffer) >= self._batch_size:
+                self._spill()
+
+    def _spill(self) -> None:
+        self._buffer.sort(key=self._key)
+        run_path = self._tmp_dir / f"run-{len(self._runs):05d}.parquet"
+        pq.write_table(pa.Table.from_pylist(self._buffer, schema=self._schema), run_path)
+        self._runs.append(run_path)
+        self._buffer = []
+
+    def _read_run(self, run_path: Path, slice_rows: int) -> Iterator[dict[str, Any]]:
+        for batch in pq.ParquetFile(run_path).iter_batches(batch_size=slice_rows):
+            yield from batch.to_pylist()
+
+    def sorted(self) -> Iterator[dict[str, Any]]:
+        if not self._runs:
+            self._buffer.sort(key=self._key)
+            yield from self._buffer
+            return
+
+        if self._buffer:
+            self._spill()
+        slice_rows = max(1, self._batch_size // len(self._runs))
+        yield from heapq.merge(*(self._read_run(path, slice_rows) for path in self._runs), key=self._key)
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def geometry_hash(geometry: dict) -> str:
+    canonical = json.dumps(geometry, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class FetchCache:
+    """Content-addressed store of fetched slices, one Parquet file per key.
+
+    Entries older than ``ttl_seconds`` are treated as misses (0 disables expiry);
+    ``get`` can tighten that per lookup. ``evict`` removes expired entries, then least recently used entries until
+    the cache fits in ``max_bytes`` (0 disables the size cap).
+    """
+
+    def __init__(self, root: Path, *, schema: pa.Schema, ttl_seconds: float = 0, max_bytes: int = 0) -> None:
+        self.root = root
+        self.schema = schema
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key(**parts: object) -> str:
+        canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.parquet"
+
+    def _is_expired(self, path: Path, now: float, ttl_seconds: float | None = None) -> bool:
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        return ttl_seconds > 0 and now - path.stat().st_mtime > ttl_seconds
+
+    def get(self, key: str, *, ttl_seconds: float | None = None) -> list[dict] | None:
+        """Cached rows for ``key``, or None on a miss; ``ttl_seconds`` overrides the cache TTL."""
+        path = self._path(key)
+        if not path.exists():
+            self.misses += 1
+            return None
+        if self._is_expired(path, time.time(), ttl_seconds):
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        # Bump the access time explicitly; many filesystems mount with noatime.
+        os.utime(path, (time.time(), path.stat().st_mtime))
+        return pq.read_table(path, schema=self.schema).to_pylist()
+
+    def put(self, key: str, rows: list[dict]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        pq.write_table(pa.Table.from_pylist(rows, schema=self.schema), tmp_path, compression="zstd")
+        tmp_path.replace(path)
+
+    def evict(self) -> None:
+        if not self.root.exists():
+            return
+
+        now = time.time()
+        entries = []
+        for path in self.root.glob("*/*.parquet"):
+            if self._is_expired(path, now):
+                path.unlink(missing_ok=True)
+                self.evicted += 1
+                continue
+            stat = path.stat()
+            entries.append((stat.st_atime, stat.st_size, path))
+
+        if self.max_bytes <= 0:
+            return
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cache_dir": str(self.root),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_expired": self.expired,
+            "cache_evicted": self.evicted,
+            "cache_hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -1,19 +1,42 @@
 import argparse
 import json
+import math
 import os
-from datetime import UTC, datetime
+import random
+import shutil
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import UTC, date, datetime, timedelta
 from pathlib import Path
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from fetch_cache import FetchCache, geometry_hash
+from run_catalog import RunCatalog
 
 ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_OUTPUT_ROOT = ROOT / "pipelines" / "artifacts"
 DEFAULT_AOI_FIXTURE = ROOT / "pipelines" / "fixtures" / "aoi.geojson"
 DATASET_ID = "COPERNICUS/S5P/OFFL/L3_CH4"
 SOURCE_NAME = "S5P_OFFL_L3_CH4"
+POINTS_SCHEMA = pa.schema(
+    [
+        pa.field("lat", pa.float64()),
+        pa.field("lon", pa.float64()),
+        pa.field("ch4_ppb", pa.float64()),
+        pa.field("qa_value", pa.float64()),
+        pa.field("observed_on", pa.string()),
+        pa.field("source", pa.string()),
+    ]
+)
+POINTS_PARTITIONING = ds.partitioning(pa.schema([pa.field("observed_on", pa.string())]), flavor="hive")
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Fetch Sentinel-5P CH4 point samples from Google Earth Engine")
     parser.add_argument("--aoi", default=os.getenv("INGEST_AOI", "permian"))
     parser.add_argument("--start", default=os.getenv("INGEST_START_DATE", "2026-02-01"))
@@ -22,9 +45,54 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--qa-threshold", type=float, default=float(os.getenv("GEE_QA_THRESHOLD", "0.5")))
     parser.add_argument("--max-points", type=int, default=int(os.getenv("GEE_MAX_POINTS", "50000")))
     parser.add_argument("--tile-scale", type=int, default=int(os.getenv("GEE_TILE_SCALE", "4")))
+    parser.add_argument(
+        "--tile-size-deg",
+        type=float,
+        default=float(os.getenv("GEE_TILE_SIZE_DEG", "1.0")),
+        help="Edge length of the square AOI tiles requested independently (degrees)",
+    )
+    parser.add_argument("--max-workers", type=int, default=int(os.getenv("GEE_MAX_WORKERS", "4")))
+    parser.add_argument("--max-retries", type=int, default=int(os.getenv("GEE_MAX_RETRIES", "3")))
+    parser.add_argument(
+        "--retry-base-seconds",
+        type=float,
+        default=float(os.getenv("GEE_RETRY_BASE_SECONDS", "1.0")),
+        help="Initial backoff delay; doubles on every retry (with jitter)",
+    )
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("GEE_CACHE", "1") == "1",
+        help="Reuse tile/day slices already fetched with the same parameters",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=os.getenv("GEE_CACHE_DIR") or None,
+        help="Slice cache location (default: <output-root>/cache/gee)",
+    )
+    parser.add_argument(
+        "--cache-ttl-hours",
+        type=float,
+        default=float(os.getenv("GEE_CACHE_TTL_HOURS", "0")),
+        help="Refetch cached slices older than this (0 keeps them until evicted by size)",
+    )
+    parser.add_argument(
+        "--cache-recent-days",
+        type=int,
+        default=int(os.getenv("GEE_CACHE_RECENT_DAYS", "5")),
+        help="Slices for days this recent may still gain or change scenes; they use --cache-recent-ttl-hours",
+    )
+    parser.add_argument(
+        "--cache-recent-ttl-hours",
+        type=float,
+        default=float(os.getenv("GEE_CACHE_RECENT_TTL_HOURS", "6")),
+        help="Refetch cached recent-day slices older than this",
+    )
+    parser.add_argument("--cache-max-mb", type=float, default=float(os.getenv("GEE_CACHE_MAX_MB", "1024")))
     parser.add_argument("--aoi-fixture", type=Path, default=Path(os.getenv("INGEST_AOI_FIXTURE", DEFAULT_AOI_FIXTURE)))
     parser.add_argument("--output-root", type=Path, default=Path(os.getenv("PIPELINE_ARTIFACT_ROOT", DEFAULT_OUTPUT_ROOT)))
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def build_run_id(start_date: str, end_date: str, aoi: str) -> str:
@@ -81,8 +149,11 @@ def fetch_points(
     qa_threshold: float,
     max_points: int,
     tile_scale: int,
+    tile_bbox: tuple[float, float, float, float] | None = None,
 ) -> list[dict]:
     region = ee.Geometry(aoi_geometry)
+    if tile_bbox is not None:
+        region = region.intersection(ee.Geometry.Rectangle(list(tile_bbox)), 1)
     image = (
         ee.ImageCollection(DATASET_ID)
         .filterDate(start_date, end_date)
@@ -102,6 +173,197 @@ def fetch_points(
     return info.get("features", [])
 
 
+def geometry_bbox(geometry: dict) -> tuple[float, float, float, float]:
+    if geometry.get("type") == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry.get("type") == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        raise ValueError(f"Unsupported AOI geometry type: {geometry.get('type')}")
+
+    longitudes = [point[0] for polygon in polygons for ring in polygon for point in ring]
+    latitudes = [point[1] for polygon in polygons for ring in polygon for point in ring]
+    return min(longitudes), min(latitudes), max(longitudes), max(latitudes)
+
+
+def split_aoi_tiles(geometry: dict, tile_size_deg: float) -> list[dict]:
+    if tile_size_deg <= 0:
+        raise ValueError("tile size must be positive")
+
+    min_lon, min_lat, max_lon, max_lat = geometry_bbox(geometry)
+    columns = max(1, math.ceil((max_lon - min_lon) / tile_size_deg))
+    rows = max(1, math.ceil((max_lat - min_lat) / tile_size_deg))
+    tiles = []
+    for row in range(rows):
+        for column in range(columns):
+            tiles.append(
+                {
+                    "tile_id": f"r{row:03d}c{column:03d}",
+                    "bbox": (
+                        min_lon + column * tile_size_deg,
+                        min_lat + row * tile_size_deg,
+                        min(max_lon, min_lon + (column + 1) * tile_size_deg),
+                        min(max_lat, min_lat + (row + 1) * tile_size_deg),
+                    ),
+                }
+            )
+    return tiles
+
+
+def daily_slices(start_date: str, end_date: str) -> list[str]:
+    # Earth Engine's filterDate end is exclusive; keep the same semantics per day.
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days)]
+
+
+def fetch_with_retry(
+    fetch: Callable[[], list[dict]],
+    *,
+    max_retries: int,
+    retry_base_seconds: float,
+    sleep: Callable[[float], None] = time.sleep,
+) -> tuple[list[dict], int]:
+    attempt = 0
+    while True:
+        try:
+            return fetch(), attempt
+        except Exception:
+            if attempt >= max_retries:
+                raise
+            delay = retry_base_seconds * (2**attempt)
+            sleep(delay + random.uniform(0, delay / 2))
+            attempt += 1
+
+
+def slice_cache_key(
+    *,
+    aoi_geometry_hash: str,
+    day: str,
+    tile_bbox: tuple[float, float, float, float],
+    scale_meters: int,
+    qa_threshold: float,
+    max_points: int,
+) -> str:
+    return FetchCache.key(
+        dataset=DATASET_ID,
+        aoi=aoi_geometry_hash,
+        day=day,
+        tile=[round(value, 9) for value in tile_bbox],
+        scale_meters=scale_meters,
+        qa_threshold=qa_threshold,
+        max_points=max_points,
+    )
+
+
+def run_fetch_schedule(
+    ee_factory: Callable[[], "object"],
+    *,
+    aoi_geometry: dict,
+    start_date: str,
+    end_date: str,
+    scale_meters: int,
+    qa_threshold: float,
+    max_points: int,
+    tile_scale: int,
+    tile_size_deg: float,
+    max_workers: int,
+    max_retries: int,
+    retry_base_seconds: float,
+    cache: FetchCache | None = None,
+    recent_days: int = 0,
+    recent_ttl_seconds: float = 0,
+    today: date | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> tuple[list[dict], dict]:
+    tiles = split_aoi_tiles(aoi_geometry, tile_size_deg)
+    days = daily_slices(start_date, end_date)
+    slices = [(day, tile) for day in days for tile in tiles]
+    # Offline L3 scenes keep arriving (and get reprocessed) for a few days after
+    # the observation day, so recent slices expire on their own, shorter TTL.
+    recent_from = ((today or datetime.now(UTC).date()) - timedelta(days=recent_days)).isoformat()
+
+    rows: list[dict] = []
+    cache_keys: dict[tuple[str, str], str] = {}
+    missing = []
+    aoi_hash = geometry_hash(aoi_geometry)
+    for day, tile in slices:
+        if cache is None:
+            missing.append((day, tile))
+            continue
+        key = slice_cache_key(
+            aoi_geometry_hash=aoi_hash,
+            day=day,
+            tile_bbox=tile["bbox"],
+            scale_meters=scale_meters,
+            qa_threshold=qa_threshold,
+            max_points=max_points,
+        )
+        if recent_days > 0 and day >= recent_from:
+            # A recent TTL of 0 means recent days are always refetched.
+            cached_rows = cache.get(key, ttl_seconds=recent_ttl_seconds) if recent_ttl_seconds > 0 else None
+        else:
+            cached_rows = cache.get(key)
+        if cached_rows is None:
+            cache_keys[(day, tile["tile_id"])] = key
+            missing.append((day, tile))
+        else:
+            rows.extend(cached_rows)
+
+    # Only authenticate against Earth Engine when something actually has to be fetched.
+    ee = ee_factory() if missing else None
+
+    def fetch_slice(day: str, tile: dict) -> tuple[list[dict], int]:
+        next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+        features, retries = fetch_with_retry(
+            lambda: fetch_points(
+                ee,
+                aoi_geometry=aoi_geometry,
+                start_date=day,
+                end_date=next_day,
+                scale_meters=scale_meters,
+                qa_threshold=qa_threshold,
+                max_points=max_points,
+                tile_scale=tile_scale,
+                tile_bbox=tile["bbox"],
+            ),
+            max_retries=max_retries,
+            retry_base_seconds=retry_base_seconds,
+            sleep=sleep,
+        )
+        return features_to_rows(features, observed_on=day), retries
+
+    retry_count = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(fetch_slice, day, tile): (day, tile["tile_id"]) for day, tile in missing}
+        for future in as_completed(futures):
+            day, tile_id = futures[future]
+            try:
+                slice_rows, retries = future.result()
+            except Exception as exc:
+                for pending in futures:
+                    pending.cancel()
+                raise RuntimeError(f"GEE fetch failed for day {day} tile {tile_id} after {max_retries} retries") from exc
+            rows.extend(slice_rows)
+            retry_count += retries
+            if cache is not None:
+                cache.put(cache_keys[(day, tile_id)], slice_rows)
+
+    stats = {
+        "tile_size_deg": tile_size_deg,
+        "tile_count": len(tiles),
+        "day_count": len(days),
+        "slice_count": len(slices),
+        "fetched_slice_count": len(missing),
+        "max_workers": max_workers,
+        "retry_count": retry_count,
+    }
+    if cache is not None:
+        cache.evict()
+        stats.update(cache.stats())
+    return rows, stats
+
+
 def features_to_rows(features: list[dict], observed_on: str) -> list[dict]:
     rows: list[dict] = []
     for feature in features:
@@ -140,6 +402,33 @@ def empty_points_frame() -> pd.DataFrame:
     )
 
 
+def write_points_dataset(points_dir: Path, frame: pd.DataFrame) -> list[dict]:
+    if points_dir.exists():
+        shutil.rmtree(points_dir)
+    points_dir.mkdir(parents=True)
+
+    # Tiles share edges, so a boundary pixel can be sampled twice; sorting also makes
+    # the output independent of the order concurrent slices completed in.
+    frame = frame.drop_duplicates(subset=["observed_on", "lat", "lon"])
+    frame = frame.sort_values(by=["observed_on", "lat", "lon"], kind="stable")
+    file_schema = pa.schema([field for field in POINTS_SCHEMA if field.name != "observed_on"])
+
+    partitions = []
+    for day, day_frame in frame.groupby("observed_on", sort=True):
+        partition_dir = points_dir / f"observed_on={day}"
+        partition_dir.mkdir()
+        table = pa.Table.from_pandas(day_frame[file_schema.names], schema=file_schema, preserve_index=False)
+        pq.write_table(table, partition_dir / "part-0.parquet", compression="zstd")
+        partitions.append({"observed_on": str(day), "point_count": int(len(day_frame))})
+    return partitions
+
+
+def read_points_dataset(points_dir: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    dataset = ds.dataset(points_dir, format="parquet", schema=POINTS_SCHEMA, partitioning=POINTS_PARTITIONING)
+    columns = columns or POINTS_SCHEMA.names
+    return dataset.to_table(columns=columns).to_pandas()[columns]
+
+
 def write_artifacts(
     *,
     output_root: Path,
@@ -151,13 +440,14 @@ def write_artifacts(
     scale_meters: int,
     qa_threshold: float,
     max_points: int,
+    schedule: dict | None = None,
 ) -> Path:
     run_dir = output_root / "source" / "gee" / run_id
     run_dir.mkdir(parents=True, exist_ok=True)
 
-    points_path = run_dir / "points.parquet"
-    frame = pd.DataFrame(rows) if rows else empty_points_frame()
-    frame.to_parquet(points_path, index=False)
+    points_dir = run_dir / "points"
+    frame = pd.DataFrame(rows, columns=POINTS_SCHEMA.names) if rows else empty_points_frame()
+    partitions = write_points_dataset(points_dir, frame)
 
     metadata = {
         "run_id": run_id,
@@ -170,20 +460,30 @@ def write_artifacts(
         "scale_meters": scale_meters,
         "qa_threshold": qa_threshold,
         "max_points": max_points,
-        "point_count": int(len(frame)),
+        "point_count": sum(partition["point_count"] for partition in partitions),
+        "partitions": partitions,
+        **(schedule or {}),
         "generated_at": datetime.now(UTC).isoformat(),
-        "points_path": str(points_path),
+        "points_path": str(points_dir),
     }
     (run_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
+    RunCatalog(output_root).record("fetch", run_id, metadata, paths={"artifact_dir": str(run_dir)})
     return run_dir
 
 
-def main() -> None:
-    args = parse_args()
-    ee = initialize_ee()
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
     aoi_geometry = load_aoi_geometry(args.aoi, args.aoi_fixture)
-    features = fetch_points(
-        ee,
+    cache = None
+    if args.cache:
+        cache = FetchCache(
+            args.cache_dir or args.output_root / "cache" / "gee",
+            schema=POINTS_SCHEMA,
+            ttl_seconds=args.cache_ttl_hours * 3600,
+            max_bytes=int(args.cache_max_mb * 1024 * 1024),
+        )
+    rows, schedule = run_fetch_schedule(
+        initialize_ee,
         aoi_geometry=aoi_geometry,
         start_date=args.start,
         end_date=args.end,
@@ -191,8 +491,14 @@ def main() -> None:
         qa_threshold=args.qa_threshold,
         max_points=args.max_points,
         tile_scale=args.tile_scale,
+        tile_size_deg=args.tile_size_deg,
+        max_workers=args.max_workers,
+        max_retries=args.max_retries,
+        retry_base_seconds=args.retry_base_seconds,
+        cache=cache,
+        recent_days=args.cache_recent_days,
+        recent_ttl_seconds=args.cache_recent_ttl_hours * 3600,
     )
-    rows = features_to_rows(features, observed_on=args.start)
 
     run_id = build_run_id(args.start, args.end, args.aoi)
     run_dir = write_artifacts(
@@ -205,18 +511,18 @@ def main() -> None:
         scale_meters=args.scale_meters,
         qa_threshold=args.qa_threshold,
         max_points=args.max_points,
+        schedule=schedule,
     )
+    metadata = json.loads((run_dir / "metadata.json").read_text())
 
-    print(
-        json.dumps(
-            {
-                "stage": "fetch",
-                "run_id": run_id,
-                "point_count": len(rows),
-                "artifact_dir": str(run_dir),
-            }
-        )
-    )
+    report = {
+        "stage": "fetch",
+        "run_id": run_id,
+        "point_count": metadata["point_count"],
+        "artifact_dir": str(run_dir),
+    }
+    print(json.dumps(report))
+    return report
 
 
 if __name__ == "__main__":
@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+
+KM_PER_DEGREE = 111.32
+COORDINATE_DECIMALS = 9
+CLUSTER_COLUMNS = (
+    "observed_on",
+    "observation_ids",
+    "peak_observation_id",
+    "peak_row",
+    "anomaly_score",
+    "mean_anomaly_ppb",
+    "pixel_count",
+    "area_km2",
+    "centroid_latitude",
+    "centroid_longitude",
+    "geometry",
+)
+
+# Unit steps in counter-clockwise order, so (d + 1) % 4 is a left turn from d and (d + 3) % 4 a right turn.
+_DIRECTIONS = np.array([(1, 0), (0, 1), (-1, 0), (0, -1)])
+# Where two cells of one cluster touch only at a corner, turning right keeps each
+# ring around a single empty region, so rings stay simple and only touch at that
+# vertex (valid GeoJSON/OGC polygons).
+_TURN_PREFERENCE = (3, 0, 1)
+# Boundary edge of a cell per open side, walked counter-clockwise: start corner offset and direction.
+_SIDE_EDGES = {
+    "down": (0, 0, 0),
+    "right": (1, 0, 1),
+    "up": (1, 1, 2),
+    "left": (0, 1, 3),
+}
+
+
+def grid_cells(latitude: np.ndarray, longitude: np.ndarray, cell_deg: float) -> tuple[np.ndarray, np.ndarray]:
+    if cell_deg <= 0:
+        raise ValueError("grid cell size must be positive")
+    rows = np.floor(latitude / cell_deg).astype("int64")
+    cols = np.floor(longitude / cell_deg).astype("int64")
+    return rows, cols
+
+
+def cell_area_km2(rows: np.ndarray, cell_deg: float) -> np.ndarray:
+    center_latitude = np.radians((rows + 0.5) * cell_deg)
+    return (cell_deg * KM_PER_DEGREE) ** 2 * np.cos(center_latitude)
+
+
+def label_components(
+    day_codes: np.ndarray, rows: np.ndarray, cols: np.ndarray
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Label 4-connected cells per day.
+
+    Each (day, row, col) is packed into one int64 key, so neighbour lookups are
+    hash probes instead of pairwise distance checks. Components come from a
+    vectorized union-find: hook every root to the smallest label on its edges,
+    compress paths, repeat until nothing changes.
+
+    Returns per-cell labels numbered 0..n-1 and, per side, whether a neighbour cell exists.
+    """
+    row_min, col_min = rows.min(), cols.min()
+    height = int(rows.max() - row_min) + 2
+    width = int(cols.max() - col_min) + 2
+    keys = (day_codes.astype("int64") * height + (rows - row_min)) * width + (cols - col_min)
+    index = pd.Index(keys)
+
+    neighbours = {
+        "right": index.get_indexer(keys + 1),
+        "left": index.get_indexer(keys - 1),
+        "up": index.get_indexer(keys + width),
+        "down": index.get_indexer(keys - width),
+    }
+    cell_ids = np.arange(len(keys))
+    edge_src = np.concatenate([cell_ids[neighbours[side] >= 0] for side in ("right", "up")])
+    edge_dst = np.concatenate([neighbours[side][neighbours[side] >= 0] for side in ("right", "up")])
+
+    labels = cell_ids
+    while len(edge_src):
+        src_labels = labels[edge_src]
+        dst_labels = labels[edge_dst]
+        lowest = np.minimum(src_labels, dst_labels)
+        roots = cell_ids.copy()
+        np.minimum.at(roots, src_labels, lowest)
+        np.minimum.at(roots, dst_labels, lowest)
+        while True:
+            compressed = roots[roots]
+            if np.array_equal(compressed, roots):
+                break
+            roots = compressed
+        relabelled = roots[labels]
+        if np.array_equal(relabelled, labels):
+            break
+        labels = relabelled
+
+    labels, _ = pd.factorize(labels, sort=True)
+    return labels, {side: positions >= 0 for side, positions in neighbours.items()}
+
+
+def _cycle_order(successor: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Split a permutation into its cycles with vectorized pointer doubling.
+
+    Returns, per element, its cycle (named by the smallest member) and how many
+    steps remain to the end of the cycle when walking it from that member.
+    """
+    count = len(successor)
+    positions = np.arange(count)
+    cycle = positions
+    jump = successor
+    for _ in range(max(1, count.bit_length())):
+        cycle = np.minimum(cycle, cycle[jump])
+        jump = jump[jump]
+
+    # Cut every cycle in front of its smallest member, then rank the resulting lists.
+    link = np.where(successor == cycle, positions, successor)
+    remaining = (link != positions).astype("int64")
+    while True:
+        jumped = link[link]
+        if np.array_equal(jumped, link):
+            break
+        remaining = remaining + remaining[link]
+        link = jumped
+    return cycle, remaining
+
+
+def trace_outlines(
+    cluster: np.ndarray, x0: np.ndarray, y0: np.ndarray, direction: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Chain directed unit boundary edges into closed rings, for all clusters at once.
+
+    Edge i starts at grid vertex (x0[i], y0[i]) and steps along _DIRECTIONS[direction[i]].
+    Returns the ring corners (collinear vertices dropped) as parallel arrays of
+    cluster, ring, x and y, ordered by cluster, exterior ring before holes, then
+    along each ring.
+    """
+    x1 = x0 + _DIRECTIONS[direction, 0]
+    y1 = y0 + _DIRECTIONS[direction, 1]
+
+    # Successor of an edge: the edge of the same cluster leaving its end vertex,
+    # preferring the turn order in _TURN_PREFERENCE.
+    x_min, y_min = min(x0.min(), x1.min()), min(y0.min(), y1.min())
+    span_x = int(max(x0.max(), x1.max()) - x_min) + 1
+    vertex_ids, vertices = pd.factorize(
+        np.concatenate([(y0 - y_min) * span_x + (x0 - x_min), (y1 - y_min) * span_x + (x1 - x_min)])
+    )
+    start_vertex, end_vertex = vertex_ids[: len(x0)], vertex_ids[len(x0) :]
+    vertex_count = len(vertices)
+    edge_index = pd.Index((cluster * vertex_count + start_vertex) * 4 + direction)
+    successor = np.full(len(x0), -1)
+    for turn in reversed(_TURN_PREFERENCE):
+        found = edge_index.get_indexer((cluster * vertex_count + end_vertex) * 4 + (direction + turn) % 4)
+        successor = np.where(found >= 0, found, successor)
+
+    ring, remaining = _cycle_order(successor)
+    _, ring = np.unique(ring, return_inverse=True)
+    # Shoelace sum over edges: counter-clockwise exteriors are positive, holes negative.
+    ring_area = np.bincount(ring, weights=(x0 * y1 - x1 * y0).astype("float64"))
+
+    predecessor = np.empty_like(successor)
+    predecessor[successor] = np.arange(len(successor))
+    corner = np.flatnonzero(direction != direction[predecessor])
+    corner = corner[np.lexsort((-remaining[corner], ring[corner], -ring_area[ring[corner]], cluster[corner]))]
+    return cluster[corner], ring[corner], x0[corner], y0[corner]
+
+
+def outline_polygons(
+    cluster: np.ndarray,
+    ring: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    *,
+    cluster_count: int,
+    cell_deg: float,
+) -> list[dict]:
+    coordinates = np.round(np.column_stack([x, y]) * cell_deg, COORDINATE_DECIMALS).tolist()
+    ring_starts = np.flatnonzero(np.diff(ring, prepend=-1) != 0)
+    ring_ends = np.append(ring_starts[1:], len(ring))
+
+    polygons: list[dict] = [{"type": "Polygon", "coordinates": []} for _ in range(cluster_count)]
+    for start, end, owner in zip(ring_starts.tolist(), ring_ends.tolist(), cluster[ring_starts].tolist()):
+        points = coordinates[start:end]
+        points.append(points[0])
+        polygons[owner]["coordinates"].append(points)
+    return polygons
+
+
+def cluster_anomalies(anomalies: pd.DataFrame, *, cell_deg: float) -> pd.DataFrame:
+    """Merge anomalous observations into clusters of edge-connected grid cells.
+
+    ``anomalies`` needs observation_id, observed_on, latitude, longitude and
+    anomaly_score columns. Clusters never span days. Returns one row per
+    cluster, in order of first appearance, with the columns in CLUSTER_COLUMNS;
+    ``peak_row`` is the peak member's position in ``anomalies``, so callers can
+    read its other columns with ``iloc`` whether or not observation IDs repeat.
+    """
+    if anomalies.empty:
+        return pd.DataFrame(columns=list(CLUSTER_COLUMNS))
+
+    latitude = anomalies["latitude"].to_numpy(dtype="float64")
+    longitude = anomalies["longitude"].to_numpy(dtype="float64")
+    obs_rows, obs_cols = grid_cells(latitude, longitude, cell_deg)
+    obs_days, days = pd.factorize(anomalies["observed_on"], sort=True)
+
+    row_min, col_min = obs_rows.min(), obs_cols.min()
+    height = int(obs_rows.max() - row_min) + 1
+    width = int(obs_cols.max() - col_min) + 1
+    cell_codes, cell_keys = pd.factorize((obs_days * height + (obs_rows - row_min)) * width + (obs_cols - col_min))
+    cell_day, cell_offset = np.divmod(cell_keys, height * width)
+    cell_row = cell_offset // width + row_min
+    cell_col = cell_offset % width + col_min
+    cell_labels, has_neighbour = label_components(cell_day, cell_row, cell_col)
+    cluster_count = int(cell_labels.max()) + 1
+
+    obs_clusters = cell_labels[cell_codes]
+    anomaly_score = anomalies["anomaly_score"].to_numpy(dtype="float64")
+    members = pd.DataFrame(
+        {"cluster": obs_clusters, "latitude": latitude, "longitude": longitude, "anomaly_score": anomaly_score}
+    )
+    grouped = members.groupby("cluster", sort=True)
+    # Member lists keep input order; the peak member names the cluster, earliest
+    # input row first on ties, so IDs are stable across reruns of the same run.
+    observation_ids = anomalies["observation_id"].to_numpy(dtype=object)
+    by_cluster = np.argsort(obs_clusters, kind="stable")
+    id_bounds = np.searchsorted(obs_clusters[by_cluster], np.arange(cluster_count + 1)).tolist()
+    sorted_ids = observation_ids[by_cluster].tolist()
+    peak_rows = np.lexsort((-anomaly_score, obs_clusters))[id_bounds[:-1]]
+
+    cells = pd.DataFrame({"cluster": cell_labels, "day": cell_day, "area_km2": cell_area_km2(cell_row, cell_deg)})
+    cell_groups = cells.groupby("cluster", sort=True)
+
+    # A side with no neighbour lies on the cluster outline: 4-neighbours always
+    # share a cluster, so no cross-cluster checks are needed.
+    open_sides = [(~has_neighbour[side], offsets) for side, offsets in _SIDE_EDGES.items()]
+    geometries = outline_polygons(
+        *trace_outlines(
+            np.concatenate([cell_labels[mask] for mask, _ in open_sides]),
+            np.concatenate([cell_col[mask] + dx for mask, (dx, _, _) in open_sides]),
+            np.concatenate([cell_row[mask] + dy for mask, (_, dy, _) in open_sides]),
+            np.concatenate([np.full(int(mask.sum()), step) for mask, (_, _, step) in open_sides]),
+        ),
+        cluster_count=cluster_count,
+        cell_deg=cell_deg,
+    )
+
+    return pd.DataFrame(
+        {
+            "observed_on": np.asarray(days, dtype=object)[cell_groups["day"].first().to_numpy()],
+            "observation_ids": [sorted_ids[start:end] for start, end in zip(id_bounds, id_bounds[1:])],
+            "peak_observation_id": observation_ids[peak_rows],
+            "peak_row": peak_rows,
+            "anomaly_score": anomaly_score[peak_rows],
+            "mean_anomaly_ppb": grouped["anomaly_score"].mean().to_numpy(),
+            "pixel_count": cell_groups.size().to_numpy(),
+            "area_km2": cell_groups["area_km2"].sum().to_numpy(),
+            "centroid_latitude": grouped["latitude"].mean().to_numpy(),
+            "centroid_longitude": grouped["longitude"].mean().to_numpy(),
+            "geometry": geometries,
+        },
+        columns=list(CLUSTER_COLUMNS),
+    )
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from psycopg import Cursor, connect, sql
+
+from bulk_load import DEFAULT_DATABASE_URL, apply_migrations, bulk_upsert, bump_data_version, staged, staged_geojson
+from json_stream import JsonObjectStream
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_INPUT = ROOT / "pipelines" / "fixtures" / "sample_emit_plumes.geojson"
+EMIT_SOURCE = "EMIT"
+PLUME_FILE_SUFFIXES = (".json", ".geojson")
+# EMIT L2B plume products use display names; plain snake_case keys work too.
+PLUME_ID_KEYS = ("Plume ID", "plume_id")
+OBSERVED_KEYS = ("UTC Time Observed", "observed_on", "observed_at")
+KM_PER_DEGREE = 111.32
+
+CONFIRMATION_STAGING_COLUMNS = (
+    ("id", "TEXT"),
+    ("source", "TEXT"),
+    ("observed_on", "DATE"),
+    ("metadata", "JSONB"),
+    ("geometry", "TEXT"),
+)
+# emitter_id is deliberately absent: link_confirmations owns it.
+CONFIRMATION_COLUMNS = {
+    "id": staged("id"),
+    "source": staged("source"),
+    "observed_on": staged("observed_on"),
+    "metadata": staged("metadata"),
+    "geom": staged_geojson("geometry"),
+}
+
+# One statement links a set of plumes ({targets}, a query yielding their IDs):
+# the `&&` box prefilter runs on idx_emitters_geom, then the exact geodesic
+# ST_DWithin picks candidates and the nearest wins (a plume covering the emitter
+# has distance 0). Plumes with no emitter in range are unlinked. Ingest links the
+# staged plumes; link_emitters re-links the plumes around the emitters it creates
+# or moves, so a plume loaded before its emitter existed is picked up then.
+LINK_CONFIRMATIONS_SQL = """
+    WITH matches AS (
+        SELECT c.id, nearest.emitter_id
+        FROM confirmations AS c
+        JOIN ({targets}) AS targets ON targets.id = c.id
+        LEFT JOIN LATERAL (
+            SELECT e.id AS emitter_id
+            FROM emitters AS e
+            WHERE e.geom && ST_Expand(
+                    c.geom,
+                    %(radius_km)s / ({km_per_degree} * GREATEST(cos(radians(ST_Y(ST_Centroid(c.geom)))), 0.01)),
+                    %(radius_km)s / {km_per_degree}
+                  )
+              AND ST_DWithin(e.geom::geography, c.geom::geography, %(radius_km)s * 1000)
+            ORDER BY ST_Distance(e.geom::geography, c.geom::geography), e.id
+            LIMIT 1
+        ) AS nearest ON true
+    ),
+    relinked AS (
+        UPDATE confirmations AS c
+        SET emitter_id = matches.emitter_id
+        FROM matches
+        WHERE c.id = matches.id AND c.emitter_id IS DISTINCT FROM matches.emitter_id
+        RETURNING c.emitter_id
+    )
+    SELECT
+        (SELECT count(*) FROM matches WHERE emitter_id IS NOT NULL),
+        (SELECT count(*) FROM matches WHERE emitter_id IS NULL),
+        (SELECT count(*) FROM relinked)
+"""
+STAGED_PLUMES_SQL = "SELECT DISTINCT id FROM {staging}"
+# A plume's nearest emitter can only change if its own emitter moved or a
+# created/moved emitter is now in range; the second branch uses idx_confirmations_geom.
+PLUMES_NEAR_EMITTERS_SQL = """
+    SELECT c.id FROM confirmations AS c WHERE c.emitter_id = ANY(%(emitter_ids)s)
+    UNION
+    SELECT c.id
+    FROM emitters AS e
+    JOIN confirmations AS c
+      ON c.geom && ST_Expand(
+             e.geom,
+             %(radius_km)s / ({km_per_degree} * GREATEST(cos(radians(ST_Y(e.geom))), 0.01)),
+             %(radius_km)s / {km_per_degree}
+         )
+     AND ST_DWithin(e.geom::geography, c.geom::geography, %(radius_km)s * 1000)
+    WHERE e.id = ANY(%(emitter_ids)s)
+"""
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk-load EMIT methane plumes and link them to emitters as confirmations")
+    parser.add_argument(
+        "--input",
+        type=Path,
+        default=Path(os.getenv("EMIT_INPUT_PATH") or DEFAULT_INPUT),
+        help="Plume GeoJSON FeatureCollection, or a directory of them",
+    )
+    parser.add_argument("--link-radius-km", type=float, default=float(os.getenv("EMIT_LINK_RADIUS_KM", "10")))
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL))
+    return parser.parse_args(argv)
+
+
+def plume_paths(input_path: Path) -> list[Path]:
+    if input_path.is_dir():
+        paths = sorted(path for path in input_path.rglob("*") if path.suffix in PLUME_FILE_SUFFIXES)
+    else:
+        paths = [input_path]
+    if not paths or not paths[0].exists():
+        raise FileNotFoundError(f"No EMIT plume files found at {input_path}")
+    return paths
+
+
+def _first(properties: dict, keys: tuple[str, ...]) -> object:
+    for key in keys:
+        if properties.get(key) not in (None, ""):
+            return properties[key]
+    return None
+
+
+def plume_row(feature: dict, path: Path) -> tuple:
+    properties = feature.get("properties") or {}
+    plume_id = _first(properties, PLUME_ID_KEYS)
+    observed = _first(properties, OBSERVED_KEYS)
+    geometry = feature.get("geometry") or {}
+    if plume_id is None or observed is None:
+        raise ValueError(f"EMIT plume in {path} needs a plume ID and observation time: {properties}")
+    if geometry.get("type") != "Polygon":
+        raise ValueError(f"EMIT plume {plume_id} in {path} must have a Polygon outline, got {geometry.get('type')}")
+
+    metadata = {key: value for key, value in properties.items() if key not in PLUME_ID_KEYS}
+    return (
+        f"emit-{plume_id}",
+        EMIT_SOURCE,
+        str(observed)[:10],
+        json.dumps({"plume_id": plume_id, **metadata, "source_file": path.name}, separators=(",", ":")),
+        json.dumps(geometry, separators=(",", ":")),
+    )
+
+
+def iter_plume_rows(paths: list[Path]) -> Iterator[tuple]:
+    """Stream COPY rows from plume FeatureCollections without loading them whole."""
+    for path in paths:
+        with path.open("rb") as stream:
+            for feature in JsonObjectStream(stream, array_key="features", label="EMIT plume collection").iter_array({}):
+                yield plume_row(feature, path)
+
+
+def _link(cur: Cursor, targets: sql.Composable, params: dict) -> dict:
+    cur.execute(sql.SQL(LINK_CONFIRMATIONS_SQL).format(targets=targets, km_per_degree=sql.Literal(KM_PER_DEGREE)), params)
+    linked, unlinked, changed = cur.fetchone()
+    return {"linked_count": linked, "unlinked_count": unlinked, "link_changed_count": changed}
+
+
+def link_confirmations(cur: Cursor, staging_table: str, *, link_radius_km: float) -> dict:
+    """Link the staged plumes to their nearest emitter in one set-based statement."""
+    targets = sql.SQL(STAGED_PLUMES_SQL).format(staging=sql.Identifier(staging_table))
+    return _link(cur, targets, {"radius_km": link_radius_km})
+
+
+def relink_confirmations(cur: Cursor, emitter_ids: list[str], *, link_radius_km: float) -> dict:
+    """Re-link the plumes whose nearest emitter may have changed with ``emitter_ids`` (created or moved)."""
+    if not emitter_ids:
+        return {"linked_count": 0, "unlinked_count": 0, "link_changed_count": 0}
+    targets = sql.SQL(PLUMES_NEAR_EMITTERS_SQL).format(km_per_degree=sql.Literal(KM_PER_DEGREE))
+    return _link(cur, targets, {"radius_km": link_radius_km, "emitter_ids": emitter_ids})
+
+
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    paths = plume_paths(args.input)
+    started = time.perf_counter()
+
+    with connect(args.database_url) as conn:
+        with conn.transaction(), conn.cursor() as cur:
+            apply_migrations(cur)
+            report = bulk_upsert(
+                cur,
+                table="confirmations",
+                key="id",
+                staging_columns=CONFIRMATION_STAGING_COLUMNS,
+                columns=CONFIRMATION_COLUMNS,
+                rows=iter_plume_rows(paths),
+            )
+            link_started = time.perf_counter()
+            report.update(link_confirmations(cur, "confirmations_staging", link_radius_km=args.link_radius_km))
+            report["link_seconds"] = round(time.perf_counter() - link_started, 3)
+            if report["inserted_count"] or report["updated_count"] or report["link_changed_count"]:
+                report["data_version"] = bump_data_version(cur)
+
+    report = {
+        "stage": "ingest_emit",
+        "input_files": len(paths),
+        "link_radius_km": args.link_radius_km,
+        **report,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    print(json.dumps(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
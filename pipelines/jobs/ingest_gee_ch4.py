@@ -4,93 +4,146 @@ import os
 from datetime import UTC, datetime
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+
+from fetch_gee_ch4 import read_points_dataset
+from observation_store import PROCESSED_FORMATS, IngestResult, write_ingest_artifacts
 
 ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_OUTPUT_ROOT = ROOT / "pipelines" / "artifacts"
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Convert fetched GEE CH4 samples into ingest observations format")
     parser.add_argument("--aoi", default=os.getenv("INGEST_AOI", "permian"))
     parser.add_argument("--start", default=os.getenv("INGEST_START_DATE", "2026-02-01"))
     parser.add_argument("--end", default=os.getenv("INGEST_END_DATE", "2026-02-07"))
     parser.add_argument("--qa-threshold", type=float, default=float(os.getenv("GEE_QA_THRESHOLD", "0.5")))
+    parser.add_argument(
+        "--processed-format",
+        choices=PROCESSED_FORMATS,
+        default=os.getenv("INGEST_PROCESSED_FORMAT", "parquet"),
+        help="Processed observations artifact format (json is kept for compatibility)",
+    )
     parser.add_argument("--output-root", type=Path, default=Path(os.getenv("PIPELINE_ARTIFACT_ROOT", DEFAULT_OUTPUT_ROOT)))
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def build_run_id(start_date: str, end_date: str, aoi: str) -> str:
     return f"{start_date}_{end_date}_{aoi}".replace("/", "-")
 
 
+POINT_COLUMNS = ["observed_on", "lat", "lon", "ch4_ppb", "qa_value"]
+# JSON observations have always repeated the GEE point coordinates as lat/lon.
+JSON_ALIASES = {"lat": "latitude", "lon": "longitude"}
+ID_CHUNK_ROWS = 250_000
+
+
+def points_artifact_path(source_dir: Path) -> Path:
+    points_dir = source_dir / "points"
+    if points_dir.is_dir():
+        return points_dir
+    # Fetch runs written before the partitioned layout used a single points.parquet.
+    return source_dir / "points.parquet"
+
+
 def load_points(points_path: Path) -> pd.DataFrame:
+    if points_path.is_dir():
+        return read_points_dataset(points_path, POINT_COLUMNS)
+
     if not points_path.exists():
         raise FileNotFoundError(
             f"Missing GEE points artifact at {points_path}. Run `make fetch_gee aoi=<aoi> start=<start> end=<end>` first."
         )
-    frame = pd.read_parquet(points_path)
-    required = {"lat", "lon", "ch4_ppb", "qa_value", "observed_on"}
-    missing = required - set(frame.columns)
+    available = set(pq.read_schema(points_path).names)
+    missing = set(POINT_COLUMNS) - available
     if missing:
         raise ValueError(f"GEE points schema missing columns: {sorted(missing)}")
-    return frame
+    return pd.read_parquet(points_path, columns=POINT_COLUMNS)
+
+
+def empty_observations_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "observation_id": pd.Series(dtype="object"),
+            "observed_on": pd.Series(dtype="object"),
+            "latitude": pd.Series(dtype="float64"),
+            "longitude": pd.Series(dtype="float64"),
+            "ch4_ppb": pd.Series(dtype="float64"),
+            "qa_value": pd.Series(dtype="float64"),
+        }
+    )
 
 
-def to_observations(frame: pd.DataFrame, qa_threshold: float) -> tuple[list[dict], list[str]]:
+def build_observation_ids(observed_on: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    # IDs are "GEE-<observed_on>-<lat>_<lon>" with coordinates to 5 decimals
+    # (about 1 m). Fetch keeps one point per (day, lat, lon), so the ID names the
+    # same sample in every run, whatever its AOI or date window, and hotspot IDs
+    # derived from it never collide across runs. The result holds one string per
+    # point; building it in fixed-size chunks keeps the temporary lists and
+    # float conversions bounded for a full season.
+    ids = np.empty(len(observed_on), dtype=object)
+    for start in range(0, len(observed_on), ID_CHUNK_ROWS):
+        stop = min(start + ID_CHUNK_ROWS, len(observed_on))
+        ids[start:stop] = [
+            f"GEE-{day}-{y:.5f}_{x:.5f}"
+            for day, y, x in zip(observed_on[start:stop], lat[start:stop].tolist(), lon[start:stop].tolist())
+        ]
+    return ids
+
+
+def to_observations(frame: pd.DataFrame, qa_threshold: float) -> tuple[pd.DataFrame, list[str]]:
     if frame.empty:
-        return [], []
-
-    ordered = frame.sort_values(by=["observed_on", "lat", "lon"], ascending=[True, True, True]).reset_index(drop=True)
-    observations: list[dict] = []
-    dropped_ids: list[str] = []
-
-    for idx, row in ordered.iterrows():
-        observation_id = f"GEE-{row['observed_on']}-{idx:06d}"
-        qa_value = float(row["qa_value"])
-        if qa_value < qa_threshold:
-            dropped_ids.append(observation_id)
-            continue
-
-        observation = {
-            "observation_id": observation_id,
-            "observed_on": str(row["observed_on"]),
-            "latitude": float(row["lat"]),
-            "longitude": float(row["lon"]),
-            "lat": float(row["lat"]),
-            "lon": float(row["lon"]),
-            "ch4_ppb": float(row["ch4_ppb"]),
-            "qa_value": qa_value,
+        return empty_observations_frame(), []
+
+    ordered = frame[POINT_COLUMNS].sort_values(by=["observed_on", "lat", "lon"], ascending=[True, True, True])
+    observed_on = ordered["observed_on"].astype(str).to_numpy(dtype=object)
+    lat = ordered["lat"].to_numpy(dtype="float64")
+    lon = ordered["lon"].to_numpy(dtype="float64")
+    observation_ids = build_observation_ids(observed_on, lat, lon)
+
+    qa_value = ordered["qa_value"].to_numpy(dtype="float64")
+    # NaN QA values compare False and pass, matching the previous row-wise check.
+    dropped = qa_value < qa_threshold
+    passed = ~dropped
+
+    observations = pd.DataFrame(
+        {
+            "observation_id": observation_ids[passed],
+            "observed_on": observed_on[passed],
+            "latitude": lat[passed],
+            "longitude": lon[passed],
+            "ch4_ppb": ordered["ch4_ppb"].to_numpy(dtype="float64")[passed],
+            "qa_value": qa_value[passed],
         }
-        observations.append(observation)
+    )
+    return observations, observation_ids[dropped].tolist()
 
-    return observations, dropped_ids
 
+def run_ingest(args: argparse.Namespace, points: pd.DataFrame | None = None) -> IngestResult:
+    """Convert fetched GEE points into QA-filtered observations in memory.
 
-def main() -> None:
-    args = parse_args()
+    ``points`` defaults to the run's fetch artifact; nothing is written.
+    """
     run_id = build_run_id(args.start, args.end, args.aoi)
-
-    source_dir = args.output_root / "source" / "gee" / run_id
-    points_path = source_dir / "points.parquet"
-    points = load_points(points_path)
+    source_paths = []
+    if points is None:
+        points_path = points_artifact_path(args.output_root / "source" / "gee" / run_id)
+        points = load_points(points_path)
+        source_paths.append(str(points_path))
     observations, dropped_ids = to_observations(points, args.qa_threshold)
 
-    run_dir = args.output_root / "ingest" / run_id
-    raw_dir = run_dir / "raw"
-    processed_dir = run_dir / "processed"
-    raw_dir.mkdir(parents=True, exist_ok=True)
-    processed_dir.mkdir(parents=True, exist_ok=True)
-
     raw_refs = {
         "dataset": "COPERNICUS/S5P/OFFL/L3_CH4",
         "product": "L3_CH4",
         "version": "gee",
         "source": "gee_parquet",
-        "source_paths": [str(points_path)],
+        "source_paths": source_paths,
         "raw_observation_count": int(len(points)),
     }
-    processed_payload = {
+    processed_header = {
         "dataset": "COPERNICUS/S5P/OFFL/L3_CH4",
         "product": "L3_CH4",
         "version": "gee",
@@ -99,7 +152,6 @@ def main() -> None:
         "end_date": args.end,
         "qa_threshold": args.qa_threshold,
         "source": "gee_parquet",
-        "observations": observations,
     }
     metadata = {
         "run_id": run_id,
@@ -112,31 +164,38 @@ def main() -> None:
         "end_date": args.end,
         "qa_threshold": args.qa_threshold,
         "source": "gee_parquet",
+        "input_fetch_run_id": run_id if source_paths else None,
         "raw_count": int(len(points)),
         "qa_pass_count": len(observations),
         "qa_fail_count": len(dropped_ids),
         "qa_fail_ids": dropped_ids,
         "generated_at": datetime.now(UTC).isoformat(),
-        "raw_refs_path": str(raw_dir / "raw_refs.json"),
-        "processed_path": str(processed_dir / "observations.json"),
     }
-
-    (raw_dir / "raw_refs.json").write_text(json.dumps(raw_refs, indent=2))
-    (processed_dir / "observations.json").write_text(json.dumps(processed_payload, indent=2))
-    (run_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
-
-    print(
-        json.dumps(
-            {
-                "stage": "ingest",
-                "run_id": run_id,
-                "raw_count": len(points),
-                "qa_pass_count": len(observations),
-                "artifact_dir": str(run_dir),
-            }
-        )
+    return IngestResult(
+        run_id=run_id,
+        metadata=metadata,
+        processed_header=processed_header,
+        raw_refs=raw_refs,
+        observations=observations,
+        json_aliases=JSON_ALIASES,
     )
 
 
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    result = run_ingest(args)
+    run_dir = write_ingest_artifacts(result, args.output_root, processed_format=args.processed_format)
+
+    report = {
+        "stage": "ingest",
+        "run_id": result.run_id,
+        "raw_count": result.metadata["raw_count"],
+        "qa_pass_count": result.metadata["qa_pass_count"],
+        "artifact_dir": str(run_dir),
+    }
+    print(json.dumps(report))
+    return report
+
+
 if __name__ == "__main__":
     main()
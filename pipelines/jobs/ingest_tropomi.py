@@ -1,15 +1,33 @@
 import argparse
 import json
 import os
+import tempfile
+import time
+from collections.abc import Callable, Iterable, Iterator
 from datetime import UTC, datetime
+from itertools import compress, islice
 from pathlib import Path
-from typing import Callable
 
-from tropomi_real_adapter import load_real_tropomi_payload
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from aoi_registry import Aoi, AoiIndex, load_registry
+from external_sort import ExternalSorter
+from observation_store import (
+    OBSERVATIONS_SCHEMA,
+    PROCESSED_FORMATS,
+    IngestResult,
+    ingest_run_dir,
+    observations_table,
+    open_processed_writer,
+    write_ingest_artifacts,
+)
+from tropomi_real_adapter import load_real_tropomi_payload, observation_sort_key, open_real_tropomi_stream
 
 ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_FIXTURE = ROOT / "pipelines" / "fixtures" / "sample_tropomi_observations.json"
-DEFAULT_AOI_PRESETS = ROOT / "pipelines" / "fixtures" / "aoi.geojson"
 DEFAULT_OUTPUT_ROOT = ROOT / "pipelines" / "artifacts"
 
 
@@ -36,72 +54,33 @@ SOURCE_READERS: dict[str, Callable[[argparse.Namespace], dict]] = {
 }
 
 
-def _validate_bbox(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> tuple[float, float, float, float]:
-    if not -180 <= min_lon <= 180 or not -180 <= max_lon <= 180:
-        raise ValueError("AOI longitude values must be within [-180, 180]")
-    if not -90 <= min_lat <= 90 or not -90 <= max_lat <= 90:
-        raise ValueError("AOI latitude values must be within [-90, 90]")
-    if min_lon >= max_lon:
-        raise ValueError("AOI bbox min_lon must be less than max_lon")
-    if min_lat >= max_lat:
-        raise ValueError("AOI bbox min_lat must be less than max_lat")
-
-    return min_lon, min_lat, max_lon, max_lat
-
-
-def _parse_bbox(aoi_value: str) -> tuple[float, float, float, float] | None:
-    parts = [part.strip() for part in aoi_value.split(",")]
-    if len(parts) != 4:
-        return None
-
-    try:
-        min_lon, min_lat, max_lon, max_lat = (float(part) for part in parts)
-    except ValueError as exc:
-        raise ValueError("AOI bbox must contain numeric values: min_lon,min_lat,max_lon,max_lat") from exc
-
-    return _validate_bbox(min_lon, min_lat, max_lon, max_lat)
-
-
-def _load_named_aois() -> dict[str, tuple[float, float, float, float]]:
-    feature_collection = json.loads(DEFAULT_AOI_PRESETS.read_text())
-    named_aois: dict[str, tuple[float, float, float, float]] = {}
-    for feature in feature_collection.get("features", []):
-        name = feature.get("properties", {}).get("name")
-        coordinates = feature.get("geometry", {}).get("coordinates", [])
-        if not name or not coordinates:
-            continue
-
-        ring = coordinates[0]
-        longitudes = [point[0] for point in ring]
-        latitudes = [point[1] for point in ring]
-        named_aois[name] = _validate_bbox(min(longitudes), min(latitudes), max(longitudes), max(latitudes))
-
-    return named_aois
-
-
 def resolve_aoi(aoi_input: str) -> dict[str, str | list[float]]:
-    named_aois = _load_named_aois()
-    if aoi_input in named_aois:
-        bbox = named_aois[aoi_input]
-        return {"aoi": aoi_input, "aoi_bbox": list(bbox), "query_aoi": aoi_input}
-
-    parsed_bbox = _parse_bbox(aoi_input)
-    if parsed_bbox:
-        canonical_bbox = ",".join(f"{value:.6f}" for value in parsed_bbox)
-        return {
-            "aoi": f"bbox:{canonical_bbox}",
-            "aoi_bbox": list(parsed_bbox),
-            "query_aoi": canonical_bbox,
-        }
-
-    named = ", ".join(sorted(named_aois))
-    raise ValueError(
-        "Invalid --aoi. Use one of the named presets "
-        f"({named}) or a bbox in the format min_lon,min_lat,max_lon,max_lat"
-    )
+    aoi = load_registry().resolve(aoi_input)
+    return {"aoi": aoi.name, "aoi_bbox": list(aoi.bbox), "query_aoi": aoi.query}
+
+
+def clip_records(
+    records: Iterable[dict], aoi: Aoi, *, start_date: str, end_date: str, batch_size: int, counts: dict[str, int]
+) -> Iterator[dict]:
+    """Yield the records inside the AOI and date range, clipping a batch at a time.
+
+    ``counts`` accumulates how many records each step dropped.
+    """
+    records = iter(records)
+    while batch := list(islice(records, batch_size)):
+        in_scope, dropped = aoi.clip(
+            np.fromiter((record["longitude"] for record in batch), dtype="float64", count=len(batch)),
+            np.fromiter((record["latitude"] for record in batch), dtype="float64", count=len(batch)),
+            np.array([record["observed_on"] for record in batch], dtype=str),
+            start_date=start_date,
+            end_date=end_date,
+        )
+        for key, value in dropped.items():
+            counts[key] = counts.get(key, 0) + value
+        yield from compress(batch, in_scope)
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Fixture-backed TROPOMI ingest smoke job")
     parser.add_argument(
         "--source",
@@ -110,8 +89,18 @@ def parse_args() -> argparse.Namespace:
         help="Ingest input source adapter",
     )
     parser.add_argument("--aoi", default=os.getenv("INGEST_AOI", "permian"))
-    parser.add_argument("--start-date", default=os.getenv("INGEST_START_DATE", "2026-02-10"))
-    parser.add_argument("--end-date", default=os.getenv("INGEST_END_DATE", "2026-02-11"))
+    parser.add_argument(
+        "--aois",
+        type=str.split,
+        default=[],
+        help="Batch mode: whitespace-separated presets and/or bboxes read from the source once, one ingest run per AOI",
+    )
+    parser.add_argument("--start-date", default=os.getenv("INGEST_START_DATE", "2026-02-10"), help="First day ingested")
+    parser.add_argument(
+        "--end-date",
+        default=os.getenv("INGEST_END_DATE", "2026-02-12"),
+        help="Exclusive end day, as for GEE fetch: the range is [start-date, end-date)",
+    )
     parser.add_argument("--qa-threshold", type=float, default=float(os.getenv("INGEST_QA_THRESHOLD", "0.85")))
     parser.add_argument("--fixture", type=Path, default=Path(os.getenv("INGEST_FIXTURE_PATH", DEFAULT_FIXTURE)))
     parser.add_argument("--real-source-url", default=os.getenv("INGEST_REAL_SOURCE_URL"))
@@ -120,88 +109,357 @@ def parse_args() -> argparse.Namespace:
         type=float,
         default=float(os.getenv("INGEST_REAL_SOURCE_TIMEOUT_SECONDS", "30")),
     )
+    parser.add_argument(
+        "--stream",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("INGEST_STREAM", "0") == "1",
+        help="Parse, QA-filter, and sort real-source observations in bounded batches (requires --source=real)",
+    )
+    parser.add_argument(
+        "--stream-batch-size",
+        type=int,
+        default=int(os.getenv("INGEST_STREAM_BATCH_SIZE", "100000")),
+        help="Records held in memory per sort run / write batch in --stream mode",
+    )
+    parser.add_argument(
+        "--processed-format",
+        choices=PROCESSED_FORMATS,
+        default=os.getenv("INGEST_PROCESSED_FORMAT", "parquet"),
+        help="Processed observations artifact format (json is kept for compatibility)",
+    )
     parser.add_argument("--output-root", type=Path, default=Path(os.getenv("PIPELINE_ARTIFACT_ROOT", DEFAULT_OUTPUT_ROOT)))
-    return parser.parse_args()
-
+    return parser.parse_args(argv)
 
-def main() -> None:
-    args = parse_args()
-    resolved_aoi = resolve_aoi(args.aoi)
-    aoi = str(resolved_aoi["aoi"])
-    aoi_bbox = resolved_aoi["aoi_bbox"]
-    args.query_aoi = resolved_aoi["query_aoi"]
-    payload = SOURCE_READERS[args.source](args)
-    observations = payload["observations"]
-    passed = [obs for obs in observations if obs["qa_value"] >= args.qa_threshold]
-    dropped = [obs["observation_id"] for obs in observations if obs["qa_value"] < args.qa_threshold]
 
-    run_id = f"{args.start_date}_{args.end_date}_{aoi}".replace("/", "-")
-    run_dir = args.output_root / "ingest" / run_id
-    raw_dir = run_dir / "raw"
-    processed_dir = run_dir / "processed"
-    raw_dir.mkdir(parents=True, exist_ok=True)
-    processed_dir.mkdir(parents=True, exist_ok=True)
-
-    raw_refs = {
-        "dataset": payload["dataset"],
-        "product": payload["product"],
-        "version": payload["version"],
-        "source": args.source,
-        "source_fixture": str(args.fixture) if args.source == "fixture" else None,
-        "source_urls": payload.get("source_urls", []),
-        "raw_observation_ids": [obs["observation_id"] for obs in observations],
-    }
-    processed = {
-        "dataset": payload["dataset"],
-        "product": payload["product"],
-        "version": payload["version"],
+def _processed_header(args: argparse.Namespace, *, aoi: str, aoi_bbox: list[float], source_header: dict) -> dict:
+    return {
+        "dataset": source_header["dataset"],
+        "product": source_header["product"],
+        "version": source_header["version"],
         "aoi": aoi,
         "aoi_bbox": aoi_bbox,
         "start_date": args.start_date,
         "end_date": args.end_date,
         "qa_threshold": args.qa_threshold,
         "source": args.source,
-        "observations": passed,
+    }
+
+
+RAW_IDS_SCHEMA = pa.schema(
+    [
+        pa.field("observation_id", pa.string(), nullable=False),
+        pa.field("observed_on", pa.string(), nullable=False),
+        pa.field("qa_pass", pa.bool_(), nullable=False),
+    ]
+)
+
+
+def stream_real_source(
+    args: argparse.Namespace,
+    *,
+    aoi: Aoi,
+    raw_dir: Path,
+    processed_dir: Path,
+) -> dict:
+    if args.processed_format != "parquet":
+        raise ValueError("--stream writes the processed artifact incrementally and requires --processed-format parquet")
+
+    raw_ids_path = raw_dir / "observation_ids.parquet"
+    with (
+        open_real_tropomi_stream(
+            args.real_source_url,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            aoi=args.query_aoi,
+            timeout_seconds=args.real_source_timeout_seconds,
+        ) as stream,
+        tempfile.TemporaryDirectory(prefix="sort-", dir=processed_dir) as tmp_dir,
+    ):
+        sorter = ExternalSorter(
+            key=observation_sort_key,
+            schema=OBSERVATIONS_SCHEMA,
+            batch_size=args.stream_batch_size,
+            tmp_dir=Path(tmp_dir),
+        )
+        clip_counts: dict[str, int] = {"out_of_range_count": 0, "out_of_aoi_count": 0}
+        sorter.add(
+            clip_records(
+                stream.iter_observations(),
+                aoi,
+                start_date=args.start_date,
+                end_date=args.end_date,
+                batch_size=args.stream_batch_size,
+                counts=clip_counts,
+            )
+        )
+
+        # The whole source has been consumed at this point, so header fields that
+        # follow the observations array are known before the artifact is opened.
+        source_header = stream.header
+        processed_writer = open_processed_writer(
+            processed_dir,
+            header=_processed_header(args, aoi=aoi.name, aoi_bbox=list(aoi.bbox), source_header=source_header),
+        )
+        raw_ids_writer = pq.ParquetWriter(raw_ids_path, RAW_IDS_SCHEMA, compression="zstd")
+        qa_pass_count = 0
+        with processed_writer, raw_ids_writer:
+            passed: list[dict] = []
+            raw_ids: list[dict] = []
+            for record in sorter.sorted():
+                qa_pass = record["qa_value"] >= args.qa_threshold
+                raw_ids.append(
+                    {"observation_id": record["observation_id"], "observed_on": record["observed_on"], "qa_pass": qa_pass}
+                )
+                if qa_pass:
+                    passed.append(record)
+                if len(raw_ids) >= args.stream_batch_size:
+                    qa_pass_count += len(passed)
+                    processed_writer.write_table(pa.Table.from_pylist(passed, schema=OBSERVATIONS_SCHEMA))
+                    raw_ids_writer.write_table(pa.Table.from_pylist(raw_ids, schema=RAW_IDS_SCHEMA))
+                    passed, raw_ids = [], []
+            qa_pass_count += len(passed)
+            processed_writer.write_table(pa.Table.from_pylist(passed, schema=OBSERVATIONS_SCHEMA))
+            raw_ids_writer.write_table(pa.Table.from_pylist(raw_ids, schema=RAW_IDS_SCHEMA))
+
+    return {
+        "source_header": source_header,
+        "source_urls": stream.source_urls,
+        "raw_count": sorter.count + sum(clip_counts.values()),
+        "clip_counts": clip_counts,
+        "qa_pass_count": qa_pass_count,
+        "sort_run_count": sorter.run_count,
+        "raw_ids_path": raw_ids_path,
+    }
+
+
+def _run_id(args: argparse.Namespace, aoi: Aoi) -> str:
+    return f"{args.start_date}_{args.end_date}_{aoi.name}".replace("/", "-")
+
+
+def _resolve_run(args: argparse.Namespace) -> tuple[str, Aoi]:
+    aoi = load_registry().resolve(args.aoi)
+    args.query_aoi = aoi.query
+    return _run_id(args, aoi), aoi
+
+
+def _ingest_result(
+    args: argparse.Namespace,
+    *,
+    run_id: str,
+    aoi: Aoi,
+    source_header: dict,
+    source_urls: list[str],
+    raw_count: int,
+    clip_counts: dict[str, int],
+    qa_pass_count: int,
+    raw_ids_refs: dict,
+    qa_refs: dict,
+    observations: pd.DataFrame | None,
+) -> IngestResult:
+    raw_refs = {
+        "dataset": source_header["dataset"],
+        "product": source_header["product"],
+        "version": source_header["version"],
+        "source": args.source,
+        "source_fixture": str(args.fixture) if args.source == "fixture" else None,
+        "source_urls": source_urls,
+        # IDs of the rows left after the AOI/date clip (qa_pass_count + qa_fail_count
+        # of them); raw_count also counts the clipped rows, which are not kept.
+        **raw_ids_refs,
     }
     metadata = {
         "run_id": run_id,
         "stage": "ingest",
-        "dataset": payload["dataset"],
-        "product": payload["product"],
-        "version": payload["version"],
-        "aoi": aoi,
-        "aoi_bbox": aoi_bbox,
+        "dataset": source_header["dataset"],
+        "product": source_header["product"],
+        "version": source_header["version"],
+        "aoi": aoi.name,
+        "aoi_bbox": list(aoi.bbox),
         "start_date": args.start_date,
         "end_date": args.end_date,
         "qa_threshold": args.qa_threshold,
         "source": args.source,
         "source_fixture": str(args.fixture) if args.source == "fixture" else None,
-        "source_urls": payload.get("source_urls", []),
-        "raw_count": len(observations),
-        "qa_pass_count": len(passed),
-        "qa_fail_count": len(dropped),
-        "qa_fail_ids": dropped,
+        "source_urls": source_urls,
+        "raw_count": raw_count,
+        **clip_counts,
+        "qa_pass_count": qa_pass_count,
+        "qa_fail_count": raw_count - sum(clip_counts.values()) - qa_pass_count,
+        **qa_refs,
         "generated_at": datetime.now(UTC).isoformat(),
-        "raw_refs_path": str(raw_dir / "raw_refs.json"),
-        "processed_path": str(processed_dir / "observations.json"),
+        "streamed": args.stream,
     }
+    return IngestResult(
+        run_id=run_id,
+        metadata=metadata,
+        processed_header=_processed_header(args, aoi=aoi.name, aoi_bbox=list(aoi.bbox), source_header=source_header),
+        raw_refs=raw_refs,
+        observations=observations,
+    )
+
 
-    (raw_dir / "raw_refs.json").write_text(json.dumps(raw_refs, indent=2))
-    (processed_dir / "observations.json").write_text(json.dumps(processed, indent=2))
-    (run_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
-
-    print(
-        json.dumps(
-            {
-                "stage": "ingest",
-                "run_id": run_id,
-                "raw_count": len(observations),
-                "qa_pass_count": len(passed),
-                "artifact_dir": str(run_dir),
-            }
+def run_ingest(args: argparse.Namespace) -> IngestResult:
+    """Read, clip and QA-filter one AOI/date window into memory; nothing is written.
+
+    ``args`` comes from ``parse_args`` (pass an argv list to set options).
+    Streaming runs write their processed artifact as they go, so ``--stream``
+    is only available through ``main``.
+    """
+    if args.stream:
+        raise ValueError("--stream writes artifacts incrementally; run it through main()")
+    run_id, aoi = _resolve_run(args)
+    payload = SOURCE_READERS[args.source](args)
+    frame = observations_table(payload["observations"]).to_pandas()
+    in_scope, clip_counts = aoi.clip(
+        frame["longitude"].to_numpy(),
+        frame["latitude"].to_numpy(),
+        frame["observed_on"].to_numpy(),
+        start_date=args.start_date,
+        end_date=args.end_date,
+    )
+    return _clipped_result(
+        args,
+        run_id=run_id,
+        aoi=aoi,
+        payload=payload,
+        frame=frame,
+        rows=np.flatnonzero(in_scope),
+        raw_count=len(frame),
+        clip_counts=clip_counts,
+    )
+
+
+def run_batch_ingest(args: argparse.Namespace) -> list[IngestResult]:
+    """``run_ingest`` for every AOI in ``args.aois`` from a single source read.
+
+    The source is queried once for the union of the AOI bboxes, and each
+    observation is assigned to the AOIs containing it through an ``AoiIndex``.
+    Each AOI's counts cover the rows inside its own bbox, so a result matches
+    a single-AOI ``run_ingest`` against a source that filters by bbox. The
+    exceptions describe the shared read: ``source_urls`` name the union query
+    and ``batch_raw_count`` is its row count.
+    """
+    if args.stream:
+        raise ValueError("--stream writes one artifact incrementally and does not support --aois")
+    registry = load_registry()
+    aois = list({aoi.name: aoi for aoi in (registry.resolve(value) for value in args.aois)}.values())
+    bboxes = np.array([aoi.bbox for aoi in aois])
+    union = (bboxes[:, 0].min(), bboxes[:, 1].min(), bboxes[:, 2].max(), bboxes[:, 3].max())
+    args.query_aoi = ",".join(f"{value:.6f}" for value in union)
+
+    payload = SOURCE_READERS[args.source](args)
+    frame = observations_table(payload["observations"]).to_pandas()
+    clipped = AoiIndex(aois).clip(
+        frame["longitude"].to_numpy(),
+        frame["latitude"].to_numpy(),
+        frame["observed_on"].to_numpy(),
+        start_date=args.start_date,
+        end_date=args.end_date,
+    )
+    results = []
+    for aoi, (rows, bbox_count, clip_counts) in zip(aois, clipped):
+        result = _clipped_result(
+            args,
+            run_id=_run_id(args, aoi),
+            aoi=aoi,
+            payload=payload,
+            frame=frame,
+            rows=rows,
+            raw_count=bbox_count,
+            clip_counts=clip_counts,
         )
+        result.metadata["batch_aois"] = [batch_aoi.name for batch_aoi in aois]
+        result.metadata["batch_raw_count"] = len(frame)
+        results.append(result)
+    return results
+
+
+def _clipped_result(
+    args: argparse.Namespace,
+    *,
+    run_id: str,
+    aoi: Aoi,
+    payload: dict,
+    frame: pd.DataFrame,
+    rows: np.ndarray,
+    raw_count: int,
+    clip_counts: dict[str, int],
+) -> IngestResult:
+    in_scope = frame.take(rows)
+    qa_pass = in_scope["qa_value"].to_numpy() >= args.qa_threshold
+    passed = in_scope[qa_pass].reset_index(drop=True)
+    return _ingest_result(
+        args,
+        run_id=run_id,
+        aoi=aoi,
+        source_header=payload,
+        source_urls=payload.get("source_urls", []),
+        raw_count=raw_count,
+        clip_counts=clip_counts,
+        qa_pass_count=len(passed),
+        raw_ids_refs={"in_scope_observation_ids": in_scope["observation_id"].tolist()},
+        qa_refs={"qa_fail_ids": in_scope["observation_id"][~qa_pass].tolist()},
+        observations=passed,
     )
 
 
+def _run_report(result: IngestResult, run_dir: Path) -> dict:
+    return {
+        "stage": "ingest",
+        "run_id": result.run_id,
+        "raw_count": result.metadata["raw_count"],
+        "qa_pass_count": result.metadata["qa_pass_count"],
+        "artifact_dir": str(run_dir),
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    if args.stream and args.source != "real":
+        raise ValueError("--stream is only supported with --source=real")
+
+    if args.aois:
+        started = time.perf_counter()
+        results = run_batch_ingest(args)
+        runs = [
+            _run_report(result, write_ingest_artifacts(result, args.output_root, processed_format=args.processed_format))
+            for result in results
+        ]
+        report = {
+            "stage": "ingest",
+            "run_ids": [run["run_id"] for run in runs],
+            "batch_raw_count": results[0].metadata["batch_raw_count"],
+            "runs": runs,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        print(json.dumps(report))
+        return report
+
+    if args.stream:
+        run_id, aoi = _resolve_run(args)
+        run_dir = ingest_run_dir(args.output_root, run_id)
+        streamed = stream_real_source(args, aoi=aoi, raw_dir=run_dir / "raw", processed_dir=run_dir / "processed")
+        result = _ingest_result(
+            args,
+            run_id=run_id,
+            aoi=aoi,
+            source_header=streamed["source_header"],
+            source_urls=streamed["source_urls"],
+            raw_count=streamed["raw_count"],
+            clip_counts=streamed["clip_counts"],
+            qa_pass_count=streamed["qa_pass_count"],
+            raw_ids_refs={"in_scope_observation_ids_path": str(streamed["raw_ids_path"])},
+            qa_refs={"observation_qa_path": str(streamed["raw_ids_path"]), "sort_run_count": streamed["sort_run_count"]},
+            observations=None,
+        )
+    else:
+        result = run_ingest(args)
+    run_dir = write_ingest_artifacts(result, args.output_root, processed_format=args.processed_format)
+
+    report = _run_report(result, run_dir)
+    print(json.dumps(report))
+    return report
+
+
 if __name__ == "__main__":
     main()
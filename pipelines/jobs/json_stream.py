@@ -0,0 +1,105 @@
+import codecs
+import json
+from collections.abc import Iterator
+from typing import Any, BinaryIO
+
+DEFAULT_CHUNK_BYTES = 1 << 20
+
+
+class JsonObjectStream:
+    """Incrementally parses a top-level JSON object, streaming one array member.
+
+    Memory stays bounded by ``chunk_size`` plus the largest single array item,
+    so multi-GB payloads can be consumed record by record. Other top-level keys
+    are collected into the ``header`` dict passed to ``iter_array``; keys after
+    the array are only present once iteration has finished.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        *,
+        array_key: str,
+        chunk_size: int = DEFAULT_CHUNK_BYTES,
+        error: type[Exception] = ValueError,
+        label: str = "JSON payload",
+    ) -> None:
+        self._stream = stream
+        self._array_key = array_key
+        self._chunk_size = chunk_size
+        self._error = error
+        self._label = label
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _missing_array(self) -> Exception:
+        return self._error(f"{self._label[:1].upper()}{self._label[1:]} must include an {self._array_key} list")
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            self._buffer = self._buffer[self._pos :] + self._decoder.decode(b"", final=True)
+        else:
+            self._buffer = self._buffer[self._pos :] + self._decoder.decode(chunk)
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise self._error(f"Malformed {self._label}: expected '{char}', found '{found or 'EOF'}'")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as exc:
+                if self._fill():
+                    continue
+                raise self._error(f"Malformed {self._label}: {exc.msg}") from exc
+            # A value ending exactly at the buffer edge may be a truncated number.
+            if end == len(self._buffer) and not self._eof:
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self, header: dict[str, Any]) -> Iterator[Any]:
+        self._expect("{")
+        seen_array = False
+        while self._peek() != "}":
+            key = self._value()
+            self._expect(":")
+            if key == self._array_key:
+                if self._peek() != "[":
+                    raise self._missing_array()
+                seen_array = True
+                self._pos += 1
+                while self._peek() != "]":
+                    yield self._value()
+                    if self._peek() == ",":
+                        self._pos += 1
+                self._pos += 1
+            else:
+                header[key] = self._value()
+            if self._peek() == ",":
+                self._pos += 1
+        if not seen_array:
+            raise self._missing_array()
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import time
+from collections.abc import Iterable, Iterator
+from itertools import groupby
+
+from psycopg import Cursor, connect
+
+from bulk_load import DEFAULT_DATABASE_URL, apply_migrations, bulk_upsert, bump_data_version, copy_rows, create_staging
+from emitter_linking import EmitterLinker
+from ingest_emit import relink_confirmations
+from seed_sample_data import EMITTER_COLUMNS, EMITTER_STAGING_COLUMNS
+from summaries import refresh_emitter_detections, refresh_emitter_stats, refresh_hotspot_summaries
+
+LINK_STAGING_TABLE = "hotspot_links_staging"
+LINK_STAGING_COLUMNS = (("hotspot_id", "TEXT"), ("observed_on", "DATE"), ("emitter_id", "TEXT"))
+FETCH_BATCH_ROWS = 10_000
+
+EMITTERS_SQL = """
+    SELECT id, name, confidence::float8, detection_count, last_seen::text, ST_Y(geom), ST_X(geom)
+    FROM emitters
+"""
+# Only hotspots without an emitter are read, so days linked by earlier runs
+# are never revisited.
+UNLINKED_HOTSPOTS_SQL = """
+    SELECT id, observed_on::text, anomaly_score::float8, area_km2::float8,
+           ST_Y(ST_Centroid(geom)), ST_X(ST_Centroid(geom))
+    FROM hotspots
+    WHERE emitter_id IS NULL
+    ORDER BY observed_on, id
+"""
+APPLY_LINKS_SQL = f"""
+    UPDATE hotspots SET emitter_id = staged.emitter_id
+    FROM {LINK_STAGING_TABLE} AS staged
+    WHERE hotspots.id = staged.hotspot_id
+      AND hotspots.observed_on = staged.observed_on
+      AND hotspots.emitter_id IS NULL
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Link unlinked hotspots to persistent emitters")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--link-radius-km", type=float, default=float(os.getenv("LINK_RADIUS_KM", "10")))
+    parser.add_argument(
+        "--confirmation-link-radius-km",
+        type=float,
+        default=float(os.getenv("EMIT_LINK_RADIUS_KM", "10")),
+        help="EMIT plume link radius, for re-linking plumes around created or moved emitters",
+    )
+    return parser.parse_args()
+
+
+def load_emitters(cur: Cursor) -> list[dict]:
+    cur.execute(EMITTERS_SQL)
+    return [
+        {
+            "id": emitter_id,
+            "name": name,
+            "confidence": confidence,
+            "detection_count": detection_count,
+            "last_seen": last_seen,
+            "latitude": latitude,
+            "longitude": longitude,
+        }
+        for emitter_id, name, confidence, detection_count, last_seen, latitude, longitude in cur.fetchall()
+    ]
+
+
+def iter_hotspot_days(rows: Iterable[tuple]) -> Iterator[tuple[str, list[dict]]]:
+    """Group hotspot rows (ordered by day) into (observed_on, hotspots) batches."""
+    for observed_on, day_rows in groupby(rows, key=lambda row: row[1]):
+        yield observed_on, [
+            {
+                "id": hotspot_id,
+                "observed_on": observed_on,
+                "anomaly_score": anomaly_score,
+                "area_km2": area_km2,
+                "centroid_latitude": latitude,
+                "centroid_longitude": longitude,
+            }
+            for hotspot_id, _, anomaly_score, area_km2, latitude, longitude in day_rows
+        ]
+
+
+def iter_emitter_rows(emitters: Iterable[dict]) -> Iterator[tuple]:
+    for emitter in emitters:
+        yield (
+            emitter["id"],
+            emitter["name"],
+            emitter["confidence"],
+            emitter["detection_count"],
+            emitter["last_seen"],
+            json.dumps({"type": "Point", "coordinates": [emitter["longitude"], emitter["latitude"]]}),
+        )
+
+
+def main() -> None:
+    args = parse_args()
+    started = time.perf_counter()
+    linked = 0
+    days: list[str] = []
+
+    with connect(args.database_url) as conn:
+        with conn.transaction(), conn.cursor() as cur:
+            apply_migrations(cur)
+            linker = EmitterLinker(load_emitters(cur), link_radius_km=args.link_radius_km)
+            create_staging(cur, staging_table=LINK_STAGING_TABLE, columns=LINK_STAGING_COLUMNS)
+
+            # Server-side cursor: a year of hotspots streams one batch at a time,
+            # and each day's links are COPY'd before the next day is fetched.
+            with conn.cursor(name="unlinked_hotspots") as hotspots:
+                hotspots.itersize = FETCH_BATCH_ROWS
+                hotspots.execute(UNLINKED_HOTSPOTS_SQL)
+                for observed_on, day_hotspots in iter_hotspot_days(hotspots):
+                    # observed_on lets the UPDATE prune to each hotspot's partition.
+                    links = [(hotspot_id, observed_on, emitter_id) for hotspot_id, emitter_id in linker.link_day(observed_on, day_hotspots)]
+                    linked += copy_rows(cur, staging_table=LINK_STAGING_TABLE, columns=LINK_STAGING_COLUMNS, rows=links)
+                    days.append(observed_on)
+
+            # Emitters first: hotspots.emitter_id references them.
+            report = bulk_upsert(
+                cur,
+                table="emitters",
+                key="id",
+                staging_columns=EMITTER_STAGING_COLUMNS,
+                columns=EMITTER_COLUMNS,
+                rows=iter_emitter_rows(linker.changed_emitters()),
+            )
+            cur.execute(APPLY_LINKS_SQL)
+            updated_hotspots = cur.rowcount
+            # The linker's counts only steer matching within this run. Stored stats
+            # come from the distinct linked days, so a day linked again (another
+            # AOI, a reload) is not counted twice and a backfilled earlier day does
+            # not move last_seen or confidence out of order.
+            recomputed = refresh_emitter_detections(cur, sorted(linker.changed)) if linker.changed else 0
+            # Plumes ingested before their emitter existed (or moved into range) are linked now.
+            confirmations = relink_confirmations(
+                cur, sorted(linker.changed), link_radius_km=args.confirmation_link_radius_km
+            )
+            changed = (
+                updated_hotspots
+                or report["inserted_count"]
+                or report["updated_count"]
+                or confirmations["link_changed_count"]
+            )
+            data_version = None
+            if changed:
+                # linked_count per day and every touched emitter's stats moved.
+                refresh_hotspot_summaries(cur, days)
+                refresh_emitter_stats(cur, sorted(linker.changed))
+                data_version = bump_data_version(cur)
+
+    print(
+        json.dumps(
+            {
+                "stage": "link",
+                "days_processed": len(days),
+                "hotspots_linked": updated_hotspots,
+                "hotspots_staged": linked,
+                "emitters_created": len(linker.created),
+                "emitters_updated": len(linker.changed - linker.created),
+                "emitter_upsert": report,
+                "emitters_recomputed": recomputed,
+                "confirmations_relinked": confirmations["link_changed_count"],
+                "data_version": data_version,
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+from psycopg import Cursor, connect, sql
+
+from bulk_load import DEFAULT_DATABASE_URL, apply_migrations, bulk_upsert, bump_data_version, staged, staged_geojson
+from json_stream import JsonObjectStream
+from run_catalog import RunCatalog
+from summaries import refresh_for_staged_hotspots, sync_aois
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_ROOT = ROOT / "pipelines" / "artifacts"
+# Partitions are kept this far past today, so daily loads rarely create one.
+PARTITION_LOOKAHEAD_MONTHS = 2
+HOTSPOT_KEY = ("id", "observed_on")
+
+HOTSPOT_STAGING_COLUMNS = (
+    ("id", "TEXT"),
+    ("observed_on", "DATE"),
+    ("anomaly_score", "NUMERIC"),
+    ("area_km2", "NUMERIC"),
+    ("pixel_count", "INTEGER"),
+    ("qa_pass_ratio", "NUMERIC"),
+    ("geometry", "TEXT"),
+    ("aoi", "TEXT"),
+)
+# emitter_id is deliberately absent: linking owns it, and reloading detect
+# output must not clear an existing link.
+HOTSPOT_COLUMNS = {
+    "id": staged("id"),
+    "observed_on": staged("observed_on"),
+    "anomaly_score": staged("anomaly_score"),
+    "area_km2": staged("area_km2"),
+    "pixel_count": staged("pixel_count"),
+    "qa_pass_ratio": staged("qa_pass_ratio"),
+    "geom": staged_geojson("geometry"),
+    "aoi": staged("aoi"),
+}
+
+# A detect run owns the hotspots it loaded for its AOI (hotspots.aoi) in its
+# [start_date, end_date) window, so those it no longer reports are deleted.
+# Hotspots loaded for another, possibly overlapping, AOI are left alone.
+DELETE_STALE_HOTSPOTS_SQL = """
+DELETE FROM hotspots AS h
+WHERE h.aoi = %(aoi)s
+  AND h.observed_on >= %(start_date)s
+  AND h.observed_on < %(end_date)s
+  AND NOT EXISTS (SELECT 1 FROM {staging} AS s WHERE s.id = h.id AND s.observed_on = h.observed_on)
+RETURNING h.observed_on::text, h.emitter_id
+"""
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk-load detect hotspots into PostGIS")
+    parser.add_argument("--detect-run-id", default=os.getenv("LOAD_DETECT_RUN_ID"))
+    parser.add_argument("--aoi", help="Without --detect-run-id, load the latest detect run for this AOI")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--output-root", type=Path, default=Path(os.getenv("PIPELINE_ARTIFACT_ROOT", DEFAULT_OUTPUT_ROOT)))
+    return parser.parse_args(argv)
+
+
+def resolve_detect_run_id(output_root: Path, detect_run_id: str | None, aoi: str | None = None) -> str:
+    if detect_run_id:
+        return detect_run_id
+
+    latest = RunCatalog(output_root).latest("detect", aoi=aoi)
+    if latest is None:
+        scope = f" for AOI {aoi}" if aoi else ""
+        raise FileNotFoundError(
+            f"No detect runs{scope} in the run catalog. Run make detect first "
+            "(or make catalog_backfill for artifacts written before the catalog)."
+        )
+    return latest["run_id"]
+
+
+def replace_scope(output_root: Path, detect_run_id: str) -> dict | None:
+    """AOI and date window a detect run covers, from the run catalog.
+
+    None when the run is not catalogued or has no AOI/date range, in which case
+    the load only upserts and its hotspots have no owning AOI.
+    """
+    run = RunCatalog(output_root).get("detect", detect_run_id)
+    if not run or not (run["aoi"] and run["start_date"] and run["end_date"]):
+        return None
+    return {"aoi": run["aoi"], "start_date": run["start_date"], "end_date": run["end_date"]}
+
+
+def delete_stale_hotspots(cur: Cursor, staging_table: str, scope: dict) -> list[tuple[str, str | None]]:
+    """Delete hotspots in ``scope`` that are not staged; returns their (day, emitter ID) rows.
+
+    Call inside the load transaction, after the upsert and before the staging
+    table is dropped.
+    """
+    cur.execute(sql.SQL(DELETE_STALE_HOTSPOTS_SQL).format(staging=sql.Identifier(staging_table)), scope)
+    return cur.fetchall()
+
+
+def iter_hotspot_rows(hotspots_path: Path, header: dict, aoi: str | None = None) -> Iterator[tuple]:
+    """Stream COPY rows from a detect hotspots.json without loading it whole; ``aoi`` is their owner."""
+    with hotspots_path.open("rb") as stream:
+        for hotspot in JsonObjectStream(stream, array_key="hotspots", label="detect hotspots artifact").iter_array(header):
+            if "geometry" not in hotspot:
+                raise ValueError(
+                    f"Hotspot {hotspot['id']} in {hotspots_path} has no geometry; re-run make detect to regenerate it"
+                )
+            yield (
+                hotspot["id"],
+                hotspot["observed_on"],
+                hotspot["anomaly_score"],
+                hotspot["area_km2"],
+                hotspot["pixel_count"],
+                hotspot["qa_pass_ratio"],
+                json.dumps(hotspot["geometry"], separators=(",", ":")),
+                aoi,
+            )
+
+
+def ensure_partitions(cur: Cursor, staging_table: str) -> int:
+    """Create monthly hotspots partitions for the staged days (plus lookahead)."""
+    cur.execute(
+        sql.SQL(
+            """
+            SELECT ensure_hotspot_partitions(
+                min(observed_on),
+                GREATEST(max(observed_on), (CURRENT_DATE + make_interval(months => %s))::date)
+            )
+            FROM {}
+            HAVING count(*) > 0
+            """
+        ).format(sql.Identifier(staging_table)),
+        (PARTITION_LOOKAHEAD_MONTHS,),
+    )
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    detect_run_id = resolve_detect_run_id(args.output_root, args.detect_run_id, args.aoi)
+    hotspots_path = args.output_root / "detect" / detect_run_id / "hotspots.json"
+    scope = replace_scope(args.output_root, detect_run_id)
+
+    header: dict = {}
+    with connect(args.database_url) as conn:
+        with conn.transaction(), conn.cursor() as cur:
+            apply_migrations(cur)
+            aoi_report = sync_aois(cur)
+            aois_changed = bool(aoi_report["inserted_count"] or aoi_report["updated_count"])
+            report = bulk_upsert(
+                cur,
+                table="hotspots",
+                key=HOTSPOT_KEY,
+                staging_columns=HOTSPOT_STAGING_COLUMNS,
+                columns=HOTSPOT_COLUMNS,
+                rows=iter_hotspot_rows(hotspots_path, header, scope and scope["aoi"]),
+                before_upsert=ensure_partitions,
+            )
+            deleted = delete_stale_hotspots(cur, "hotspots_staging", scope) if scope is not None else []
+            report["deleted_count"] = len(deleted)
+            report["replace_scope"] = scope
+            if report["inserted_count"] or report["updated_count"] or report["deleted_count"] or aois_changed:
+                # Changed AOI geometry invalidates every day's per-AOI summary.
+                report.update(
+                    refresh_for_staged_hotspots(
+                        cur,
+                        "hotspots_staging",
+                        all_days=aois_changed,
+                        extra_days=[day for day, _ in deleted],
+                        extra_emitter_ids=[emitter_id for _, emitter_id in deleted if emitter_id is not None],
+                    )
+                )
+                report["data_version"] = bump_data_version(cur)
+
+    report = {
+        "stage": "load",
+        "run_id": detect_run_id,
+        "ingest_run_id": header.get("ingest_run_id"),
+        **report,
+    }
+    RunCatalog(args.output_root).record("load", detect_run_id, {**report, "input_detect_run_id": detect_run_id})
+    print(json.dumps(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
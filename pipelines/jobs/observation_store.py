@@ -0,0 +1,159 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from run_catalog import RunCatalog
+
+PROCESSED_FORMATS = ("parquet", "json")
+PROCESSED_FILENAMES = {
+    "parquet": "observations.parquet",
+    "json": "observations.json",
+}
+OBSERVATIONS_SCHEMA = pa.schema(
+    [
+        pa.field("observation_id", pa.string(), nullable=False),
+        pa.field("observed_on", pa.string(), nullable=False),
+        pa.field("latitude", pa.float64(), nullable=False),
+        pa.field("longitude", pa.float64(), nullable=False),
+        pa.field("ch4_ppb", pa.float64()),
+        pa.field("qa_value", pa.float64()),
+    ]
+)
+HEADER_METADATA_KEY = b"methane.processed_header"
+PARQUET_COMPRESSION = "zstd"
+
+
+@dataclass
+class IngestResult:
+    """In-memory output of an ingest stage.
+
+    ``metadata`` is the run's metadata.json minus the artifact paths, which
+    ``write_ingest_artifacts`` adds. ``observations`` holds the QA-passed rows;
+    it is None when a streaming ingest already wrote the processed artifact.
+    ``json_aliases`` maps extra keys written to JSON observations to the
+    column they repeat, for sources whose legacy JSON output carried them.
+    """
+
+    run_id: str
+    metadata: dict
+    processed_header: dict
+    raw_refs: dict
+    observations: pd.DataFrame | None = None
+    json_aliases: dict[str, str] = field(default_factory=dict)
+
+
+def ingest_run_dir(output_root: Path, run_id: str) -> Path:
+    run_dir = output_root / "ingest" / run_id
+    (run_dir / "raw").mkdir(parents=True, exist_ok=True)
+    (run_dir / "processed").mkdir(parents=True, exist_ok=True)
+    return run_dir
+
+
+def processed_path(processed_dir: Path, processed_format: str) -> Path:
+    if processed_format not in PROCESSED_FILENAMES:
+        raise ValueError(f"Unsupported processed format '{processed_format}'. Use one of: {', '.join(PROCESSED_FORMATS)}")
+    return processed_dir / PROCESSED_FILENAMES[processed_format]
+
+
+def ingest_processed_path(ingest_run_dir: Path, ingest_metadata: dict) -> Path:
+    if "processed_path" in ingest_metadata and ingest_metadata["processed_path"] is None:
+        raise FileNotFoundError(
+            f"Ingest run {ingest_run_dir.name} did not persist its observations; re-run ingest to write them."
+        )
+    # Runs written before the columnar format was introduced have no
+    # processed_format entry and always used JSON.
+    return processed_path(ingest_run_dir / "processed", ingest_metadata.get("processed_format", "json"))
+
+
+def observations_table(observations: list[dict] | pd.DataFrame) -> pa.Table:
+    if isinstance(observations, pd.DataFrame):
+        columns = [field.name for field in OBSERVATIONS_SCHEMA]
+        return pa.Table.from_pandas(observations[columns], schema=OBSERVATIONS_SCHEMA, preserve_index=False)
+    return pa.Table.from_pylist(observations, schema=OBSERVATIONS_SCHEMA)
+
+
+def write_processed_observations(
+    processed_dir: Path,
+    *,
+    header: dict,
+    observations: list[dict] | pd.DataFrame,
+    processed_format: str,
+    json_aliases: dict[str, str] | None = None,
+) -> Path:
+    path = processed_path(processed_dir, processed_format)
+
+    if processed_format == "json":
+        records = observations.to_dict(orient="records") if isinstance(observations, pd.DataFrame) else observations
+        if json_aliases:
+            records = [{**record, **{alias: record[column] for alias, column in json_aliases.items()}} for record in records]
+        path.write_text(json.dumps({**header, "observations": records}, indent=2))
+        return path
+
+    table = observations_table(observations)
+    table = table.replace_schema_metadata({HEADER_METADATA_KEY: json.dumps(header).encode("utf-8")})
+    pq.write_table(table, path, compression=PARQUET_COMPRESSION)
+    return path
+
+
+def open_processed_writer(processed_dir: Path, *, header: dict) -> pq.ParquetWriter:
+    schema = OBSERVATIONS_SCHEMA.with_metadata({HEADER_METADATA_KEY: json.dumps(header).encode("utf-8")})
+    return pq.ParquetWriter(processed_path(processed_dir, "parquet"), schema, compression=PARQUET_COMPRESSION)
+
+
+def read_processed_header(path: Path) -> dict:
+    if path.suffix == ".json":
+        payload = json.loads(path.read_text())
+        payload.pop("observations", None)
+        return payload
+
+    metadata = pq.read_schema(path).metadata or {}
+    return json.loads(metadata.get(HEADER_METADATA_KEY, b"{}"))
+
+
+def read_processed_observations(path: Path, columns: list[str] | tuple[str, ...] | None = None) -> pd.DataFrame:
+    if path.suffix == ".json":
+        records = json.loads(path.read_text())["observations"]
+        frame = pd.DataFrame.from_records(records, columns=[field.name for field in OBSERVATIONS_SCHEMA])
+        return frame if columns is None else frame[list(columns)]
+
+    table = pq.read_table(path, columns=list(columns) if columns is not None else None, memory_map=True)
+    return table.to_pandas()
+
+
+def write_ingest_artifacts(
+    result: IngestResult,
+    output_root: Path,
+    *,
+    processed_format: str,
+    persist_observations: bool = True,
+) -> Path:
+    """Write raw refs, processed observations and metadata.json for an ingest run.
+
+    With ``persist_observations=False`` only the refs and metadata are kept,
+    for callers that hand the observations straight to detect in-process.
+    """
+    run_dir = ingest_run_dir(output_root, result.run_id)
+    raw_refs_path = run_dir / "raw" / "raw_refs.json"
+    raw_refs_path.write_text(json.dumps(result.raw_refs, indent=2))
+    if persist_observations and result.observations is not None:
+        write_processed_observations(
+            run_dir / "processed",
+            header=result.processed_header,
+            observations=result.observations,
+            processed_format=processed_format,
+            json_aliases=result.json_aliases,
+        )
+
+    metadata = {
+        **result.metadata,
+        "raw_refs_path": str(raw_refs_path),
+        "processed_path": str(processed_path(run_dir / "processed", processed_format)) if persist_observations else None,
+        "processed_format": processed_format,
+    }
+    (run_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
+    RunCatalog(output_root).record("ingest", result.run_id, metadata, paths={"artifact_dir": str(run_dir)})
+    return run_dir
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+FAILED_STATUSES = ("failed", "blocked")
+
+
+def fingerprint(params: dict, paths: Iterable[Path] = ()) -> str:
+    """Digest of a stage's parameters and the size/mtime of its input files.
+
+    Directories are walked, so rewriting any file in a partitioned dataset
+    changes the digest. Missing inputs hash as absent; the stage reports them.
+    """
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    for path in paths:
+        files = sorted(item for item in path.rglob("*") if item.is_file()) if path.is_dir() else [path]
+        for file in files:
+            if file.exists():
+                stat = file.stat()
+                digest.update(f"{file}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+            else:
+                digest.update(f"{file}\0missing\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class Task:
+    """One node of the pipeline DAG.
+
+    ``fn(*args)`` runs on the executor and returns the stage report, so both
+    must be picklable for a process pool. The other callables run in the
+    scheduler: ``fingerprint`` once every dependency has finished (it may hash
+    their outputs), ``recorded_fingerprint`` to find what the last successful
+    run used, and ``on_success(report, fingerprint, seconds)`` afterwards.
+    Tasks sharing a ``resource`` never run concurrently.
+    """
+
+    key: str
+    stage: str
+    fn: Callable[..., dict]
+    args: tuple = ()
+    deps: tuple[str, ...] = ()
+    fingerprint: Callable[[], str] | None = None
+    recorded_fingerprint: Callable[[], str | None] = field(default=lambda: None)
+    on_success: Callable[[dict, str | None, float], None] | None = None
+    resource: str | None = None
+
+
+def _timed(fn: Callable[..., dict], args: tuple) -> tuple[dict, float]:
+    started = time.perf_counter()
+    report = fn(*args)
+    return report, time.perf_counter() - started
+
+
+def run_dag(tasks: list[Task], executor: Executor, *, force: bool = False) -> dict[str, dict]:
+    """Run ``tasks`` in dependency order, as many at once as ``executor`` allows.
+
+    Returns a result per task key with a ``status`` of ran, skipped (inputs
+    unchanged since the recorded run), failed, or blocked (a dependency failed).
+    A failure only stops its own descendants; independent branches finish.
+    """
+    by_key = {task.key: task for task in tasks}
+    if len(by_key) != len(tasks):
+        raise ValueError("Task keys must be unique")
+    dependents: dict[str, list[str]] = defaultdict(list)
+    waiting: dict[str, set[str]] = {}
+    for task in tasks:
+        unknown = [dep for dep in task.deps if dep not in by_key]
+        if unknown:
+            raise ValueError(f"Task {task.key} depends on unknown tasks: {unknown}")
+        waiting[task.key] = set(task.deps)
+        for dep in task.deps:
+            dependents[dep].append(task.key)
+
+    results: dict[str, dict] = {}
+    ready = deque(task.key for task in tasks if not task.deps)
+    running: dict[Future, tuple[Task, str | None, float]] = {}
+    busy: set[str] = set()
+
+    def finish(key: str, result: dict) -> None:
+        results[key] = result
+        for child in dependents[key]:
+            waiting[child].discard(key)
+            if not waiting[child]:
+                ready.append(child)
+
+    while ready or running:
+        deferred = []
+        while ready:
+            task = by_key[ready.popleft()]
+            failed = [dep for dep in task.deps if results[dep]["status"] in FAILED_STATUSES]
+            if failed:
+                finish(task.key, {"status": "blocked", "blocked_by": failed})
+                continue
+            if task.resource is not None and task.resource in busy:
+                deferred.append(task.key)
+                continue
+
+            task_fingerprint = task.fingerprint() if task.fingerprint is not None else None
+            if not force and task_fingerprint is not None and task_fingerprint == task.recorded_fingerprint():
+                finish(task.key, {"status": "skipped", "fingerprint": task_fingerprint})
+                continue
+            if task.resource is not None:
+                busy.add(task.resource)
+            running[executor.submit(_timed, task.fn, task.args)] = (task, task_fingerprint, time.perf_counter())
+        ready.extend(deferred)
+        if not running:
+            break
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            task, task_fingerprint, submitted = running.pop(future)
+            busy.discard(task.resource)
+            wall_seconds = time.perf_counter() - submitted
+            try:
+                report, seconds = future.result()
+                if task.on_success is not None:
+                    task.on_success(report, task_fingerprint, seconds)
+            except Exception as exc:
+                finish(
+                    task.key,
+                    {"status": "failed", "error": f"{type(exc).__name__}: {exc}", "seconds": round(wall_seconds, 3)},
+                )
+                continue
+            finish(
+                task.key,
+                {
+                    "status": "ran",
+                    "fingerprint": task_fingerprint,
+                    "seconds": round(seconds, 3),
+                    "queued_seconds": round(max(wall_seconds - seconds, 0.0), 3),
+                    "report": report,
+                },
+            )
+
+    unfinished = sorted(set(by_key) - set(results))
+    if unfinished:
+        raise ValueError(f"Dependency cycle between tasks: {unfinished}")
+    return results
@@ -0,0 +1,329 @@
+import argparse
+import json
+import os
+import sqlite3
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_ROOT = ROOT / "pipelines" / "artifacts"
+CATALOG_FILENAME = "catalog.sqlite"
+# Artifact directory per catalog stage, relative to the output root; used by backfill.
+STAGE_DIRS = {
+    "fetch": Path("source") / "gee",
+    "ingest": Path("ingest"),
+    "detect": Path("detect"),
+    "load": Path("load"),
+}
+# Parent stage per stage, and the metadata key naming the parent run.
+STAGE_PARENTS = {
+    "ingest": ("fetch", "input_fetch_run_id"),
+    "detect": ("ingest", "input_ingest_run_id"),
+    "load": ("detect", "input_detect_run_id"),
+}
+RUN_COLUMNS = (
+    "stage",
+    "run_id",
+    "aoi",
+    "start_date",
+    "end_date",
+    "parent_stage",
+    "parent_run_id",
+    "params",
+    "counts",
+    "paths",
+    "input_fingerprint",
+    "completed_at",
+)
+_SCALARS = (str, int, float, bool, type(None))
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS runs (
+    stage TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    aoi TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    parent_stage TEXT,
+    parent_run_id TEXT,
+    params TEXT NOT NULL,
+    counts TEXT NOT NULL,
+    paths TEXT NOT NULL,
+    input_fingerprint TEXT,
+    completed_at TEXT NOT NULL,
+    PRIMARY KEY (stage, run_id)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_stage_completed ON runs (stage, completed_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_stage_aoi_completed ON runs (stage, aoi, completed_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_parent ON runs (parent_stage, parent_run_id);
+"""
+
+# A re-run replaces its row; the parent and AOI/date range fall back to the
+# parent's when the stage's own metadata does not carry them (detect, load).
+UPSERT_SQL = """
+INSERT INTO runs
+SELECT
+    :stage,
+    :run_id,
+    coalesce(:aoi, parent.aoi),
+    coalesce(:start_date, parent.start_date),
+    coalesce(:end_date, parent.end_date),
+    :parent_stage,
+    :parent_run_id,
+    :params,
+    :counts,
+    :paths,
+    :input_fingerprint,
+    :completed_at
+FROM (SELECT 1) AS one
+LEFT JOIN runs AS parent ON parent.stage = :parent_stage AND parent.run_id = :parent_run_id
+WHERE true
+ON CONFLICT (stage, run_id) DO UPDATE SET
+    aoi = excluded.aoi,
+    start_date = excluded.start_date,
+    end_date = excluded.end_date,
+    parent_stage = excluded.parent_stage,
+    parent_run_id = excluded.parent_run_id,
+    params = excluded.params,
+    counts = excluded.counts,
+    paths = excluded.paths,
+    input_fingerprint = excluded.input_fingerprint,
+    completed_at = excluded.completed_at
+"""
+
+LINEAGE_SQL = f"""
+WITH RECURSIVE lineage(stage, run_id, depth) AS (
+    SELECT :stage, :run_id, 0
+    UNION ALL
+    SELECT runs.parent_stage, runs.parent_run_id, lineage.depth + 1
+    FROM runs
+    JOIN lineage ON runs.stage = lineage.stage AND runs.run_id = lineage.run_id
+    WHERE runs.parent_stage IS NOT NULL
+)
+SELECT {", ".join(f"runs.{column}" for column in RUN_COLUMNS)}
+FROM lineage
+JOIN runs ON runs.stage = lineage.stage AND runs.run_id = lineage.run_id
+ORDER BY lineage.depth
+"""
+
+
+def catalog_path(output_root: Path) -> Path:
+    return output_root / CATALOG_FILENAME
+
+
+def split_metadata(metadata: dict) -> tuple[dict, dict, dict]:
+    """Split a stage's metadata.json into (params, counts, paths) for the catalog.
+
+    Counts are the integer ``*_count`` entries and paths the ``*_path`` ones;
+    params are the remaining settings made of scalars (flat lists and dicts
+    included). ID lists and timings stay in the artifacts, and run identity,
+    the AOI/date columns and timestamps have columns of their own.
+    """
+    params: dict = {}
+    counts: dict = {}
+    paths: dict = {}
+    skipped = {"run_id", "stage", "aoi", "start_date", "end_date", "generated_at", "input_fingerprint"}
+    for key, value in metadata.items():
+        if key in skipped or key.endswith(("_ids", "_seconds", "_per_second")):
+            continue
+        if key.endswith("_count") and isinstance(value, int) and not isinstance(value, bool):
+            counts[key] = value
+        elif key.endswith("_path"):
+            paths[key] = value
+        elif isinstance(value, _SCALARS) or _is_flat(value):
+            params[key] = value
+    return params, counts, paths
+
+
+def _is_flat(value: object) -> bool:
+    if isinstance(value, list):
+        return all(isinstance(item, _SCALARS) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(item, _SCALARS) for item in value.values())
+    return False
+
+
+class RunCatalog:
+    """SQLite index of completed stage runs under one artifact root.
+
+    Every stage records its run here once its artifacts are written, in a
+    single transaction, so a reader never sees a run whose files are missing.
+    "Latest run" and lineage lookups are index queries instead of directory
+    listings.
+    """
+
+    def __init__(self, output_root: Path) -> None:
+        self.path = catalog_path(output_root)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Partitions finish on parallel workers; WAL lets readers proceed while
+        # one writer commits, and the timeout queues concurrent writers.
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA_SQL)
+            with conn:
+                yield conn
+
+    def record(
+        self,
+        stage: str,
+        run_id: str,
+        metadata: dict,
+        *,
+        paths: dict | None = None,
+        completed_at: str | None = None,
+    ) -> None:
+        """Record (or replace) a completed run; call once its artifacts are written.
+
+        The parent run comes from the stage's ``input_<parent>_run_id`` entry.
+        """
+        params, counts, metadata_paths = split_metadata(metadata)
+        parent_stage, parent_key = STAGE_PARENTS.get(stage, (None, None))
+        parent_run_id = metadata.get(parent_key) if parent_key else None
+        with self._connect() as conn:
+            conn.execute(
+                UPSERT_SQL,
+                {
+                    "stage": stage,
+                    "run_id": run_id,
+                    "aoi": metadata.get("aoi"),
+                    "start_date": metadata.get("start_date"),
+                    "end_date": metadata.get("end_date"),
+                    "parent_stage": parent_stage if parent_run_id else None,
+                    "parent_run_id": parent_run_id,
+                    "params": json.dumps(params, sort_keys=True),
+                    "counts": json.dumps(counts, sort_keys=True),
+                    "paths": json.dumps({**metadata_paths, **(paths or {})}, sort_keys=True),
+                    "input_fingerprint": metadata.get("input_fingerprint"),
+                    "completed_at": completed_at or datetime.now(UTC).isoformat(),
+                },
+            )
+
+    def set_fingerprint(self, stage: str, run_id: str, input_fingerprint: str | None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET input_fingerprint = ? WHERE stage = ? AND run_id = ?",
+                (input_fingerprint, stage, run_id),
+            )
+
+    def get(self, stage: str, run_id: str) -> dict | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE stage = ? AND run_id = ?", (stage, run_id)).fetchone()
+        return _run(row) if row else None
+
+    def latest(self, stage: str, *, aoi: str | None = None) -> dict | None:
+        """Most recently completed run of ``stage``, optionally for one AOI."""
+        query = "SELECT * FROM runs WHERE stage = ?"
+        params: tuple = (stage,)
+        if aoi is not None:
+            query += " AND aoi = ?"
+            params += (aoi,)
+        query += " ORDER BY completed_at DESC, run_id DESC LIMIT 1"
+        with self._connect() as conn:
+            row = conn.execute(query, params).fetchone()
+        return _run(row) if row else None
+
+    def runs(
+        self,
+        stage: str,
+        *,
+        aois: list[str] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> list[dict]:
+        """Runs of ``stage`` for any of ``aois`` whose date range overlaps [start_date, end_date).
+
+        Run ranges are half-open too, so a run ending on ``start_date`` does not overlap.
+        """
+        query = "SELECT * FROM runs WHERE stage = ?"
+        params: tuple = (stage,)
+        if aois:
+            query += f" AND aoi IN ({', '.join('?' for _ in aois)})"
+            params += tuple(aois)
+        if start_date is not None:
+            query += " AND (end_date IS NULL OR end_date > ?)"
+            params += (start_date,)
+        if end_date is not None:
+            query += " AND (start_date IS NULL OR start_date < ?)"
+            params += (end_date,)
+        query += " ORDER BY aoi, start_date, run_id"
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [_run(row) for row in rows]
+
+    def lineage(self, stage: str, run_id: str) -> list[dict]:
+        """The run followed by its parents, nearest first (e.g. load -> detect -> ingest)."""
+        with self._connect() as conn:
+            rows = conn.execute(LINEAGE_SQL, {"stage": stage, "run_id": run_id}).fetchall()
+        return [_run(row) for row in rows]
+
+    def children(self, stage: str, run_id: str) -> list[dict]:
+        """Runs derived directly from this one."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM runs WHERE parent_stage = ? AND parent_run_id = ? ORDER BY stage, completed_at",
+                (stage, run_id),
+            ).fetchall()
+        return [_run(row) for row in rows]
+
+    def backfill(self, output_root: Path) -> int:
+        """Index runs written before the catalog existed, from their metadata.json files."""
+        recorded = 0
+        for stage, stage_dir in STAGE_DIRS.items():
+            for metadata_path in sorted((output_root / stage_dir).glob("*/metadata.json")):
+                run_id = metadata_path.parent.name
+                if self.get(stage, run_id):
+                    continue
+                metadata = json.loads(metadata_path.read_text())
+                self.record(
+                    stage,
+                    run_id,
+                    metadata,
+                    paths={"artifact_dir": str(metadata_path.parent)},
+                    completed_at=metadata.get("generated_at"),
+                )
+                recorded += 1
+        return recorded
+
+
+def _run(row: sqlite3.Row) -> dict:
+    run = dict(row)
+    for column in ("params", "counts", "paths"):
+        run[column] = json.loads(run[column])
+    return run
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query or backfill the pipeline run catalog")
+    parser.add_argument("--output-root", type=Path, default=Path(os.getenv("PIPELINE_ARTIFACT_ROOT", DEFAULT_OUTPUT_ROOT)))
+    commands = parser.add_subparsers(dest="command", required=True)
+    latest = commands.add_parser("latest", help="Most recent run of a stage")
+    latest.add_argument("stage", choices=tuple(STAGE_DIRS))
+    latest.add_argument("--aoi")
+    lineage = commands.add_parser("lineage", help="A run and its upstream runs")
+    lineage.add_argument("stage", choices=tuple(STAGE_DIRS))
+    lineage.add_argument("run_id")
+    commands.add_parser("backfill", help="Index existing artifact directories")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    catalog = RunCatalog(args.output_root)
+    if args.command == "latest":
+        report = {"run": catalog.latest(args.stage, aoi=args.aoi)}
+    elif args.command == "lineage":
+        report = {"lineage": catalog.lineage(args.stage, args.run_id)}
+    else:
+        report = {"recorded_count": catalog.backfill(args.output_root)}
+    print(json.dumps(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
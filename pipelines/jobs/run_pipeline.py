@@ -0,0 +1,461 @@
+import argparse
+import ast
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, date, datetime, timedelta
+from functools import cache
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import detect_hotspots
+from aoi_registry import DEFAULT_AOI_PRESETS
+from fetch_gee_ch4 import build_run_id
+from ingest_tropomi import resolve_aoi
+from observation_store import write_ingest_artifacts
+from pipeline_dag import FAILED_STATUSES, Task, fingerprint, run_dag
+from run_catalog import RunCatalog
+
+ROOT = Path(__file__).resolve().parents[2]
+JOBS_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT_ROOT = ROOT / "pipelines" / "artifacts"
+DEFAULT_FIXTURE = ROOT / "pipelines" / "fixtures" / "sample_tropomi_observations.json"
+DEFAULT_AOI_FIXTURE = ROOT / "pipelines" / "fixtures" / "aoi.geojson"
+PIPELINE_SOURCES = ("gee", "fixture", "real")
+
+# Job module per stage, and the environment variables each one reads its
+# defaults from; both feed the stage fingerprint.
+STAGE_JOBS = {
+    "fetch": "fetch_gee_ch4",
+    "ingest_gee": "ingest_gee_ch4",
+    "ingest": "ingest_tropomi",
+    "detect": "detect_hotspots",
+    "load": "load_hotspots",
+}
+STAGE_ENV_PREFIXES = {
+    "fetch": ("GEE_", "INGEST_AOI_FIXTURE"),
+    "ingest_gee": ("GEE_QA_THRESHOLD", "INGEST_PROCESSED_FORMAT"),
+    "ingest": ("INGEST_",),
+    "detect": ("DETECT_",),
+    "load": ("DATABASE_URL",),
+}
+# Run catalog stage each task's artifact is recorded under.
+CATALOG_STAGES = {
+    "fetch": "fetch",
+    "ingest_gee": "ingest",
+    "ingest": "ingest",
+    "detect": "detect",
+    "ingest_detect": "detect",
+    "load": "load",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run fetch/ingest/detect/load as a DAG over (AOI, date window) partitions")
+    parser.add_argument("--source", choices=PIPELINE_SOURCES, default=os.getenv("PIPELINE_SOURCE", "gee"))
+    parser.add_argument("--aoi", action="append", help="Named preset or bbox; repeat for several AOIs (default: permian)")
+    parser.add_argument("--start", default=os.getenv("INGEST_START_DATE", "2026-02-01"))
+    parser.add_argument("--end", default=os.getenv("INGEST_END_DATE", "2026-02-07"))
+    parser.add_argument(
+        "--partition-days",
+        type=int,
+        default=int(os.getenv("PIPELINE_PARTITION_DAYS", "0")),
+        help="Split [start, end) into windows of this many days (0 keeps one window per AOI)",
+    )
+    parser.add_argument("--max-workers", type=int, default=int(os.getenv("PIPELINE_MAX_WORKERS", str(os.cpu_count() or 2))))
+    parser.add_argument(
+        "--load",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("PIPELINE_LOAD", "0") == "1",
+        help="Also bulk-load each detect run into PostGIS (loads run one at a time)",
+    )
+    parser.add_argument(
+        "--in-process",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("PIPELINE_IN_PROCESS", "0") == "1",
+        help="Run ingest and detect as one task, handing observations over in memory",
+    )
+    parser.add_argument(
+        "--persist-observations",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("PIPELINE_PERSIST_OBSERVATIONS", "1") == "1",
+        help="With --in-process, still write the processed observations artifact",
+    )
+    parser.add_argument("--force", action="store_true", help="Re-run every stage even if its inputs are unchanged")
+    parser.add_argument("--fixture", type=Path, default=Path(os.getenv("INGEST_FIXTURE_PATH", DEFAULT_FIXTURE)))
+    parser.add_argument("--output-root", type=Path, default=Path(os.getenv("PIPELINE_ARTIFACT_ROOT", DEFAULT_OUTPUT_ROOT)))
+    return parser.parse_args()
+
+
+def date_windows(start: str, end: str, partition_days: int) -> list[tuple[str, str]]:
+    if partition_days <= 0:
+        return [(start, end)]
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    windows = []
+    while first < last:
+        window_end = min(first + timedelta(days=partition_days), last)
+        windows.append((first.isoformat(), window_end.isoformat()))
+        first = window_end
+    return windows
+
+
+def real_source_inputs(source_url: str | None) -> list[Path] | None:
+    """Input files behind a real-source URL, or None when they cannot be tracked.
+
+    A ``file://`` source is fingerprinted like the fixture; a remote endpoint has
+    no revision to compare, so its ingest is never considered fresh.
+    """
+    parsed = urlparse(source_url or "")
+    if parsed.scheme == "file":
+        return [Path(url2pathname(parsed.path))]
+    return None
+
+
+def overlaps_recent_days(end_date: str, today: date | None = None) -> bool:
+    """Whether [.., end_date) reaches the days fetch still refetches (``GEE_CACHE_RECENT_DAYS``)."""
+    recent_days = int(os.getenv("GEE_CACHE_RECENT_DAYS", "5"))
+    recent_from = (today or datetime.now(UTC).date()) - timedelta(days=recent_days)
+    return recent_days > 0 and date.fromisoformat(end_date) > recent_from
+
+
+def run_job(module_name: str, argv: list[str]) -> dict:
+    """Run a job's CLI ``main(argv)`` in this worker process and return its report.
+
+    Workers are reused, so numpy/pandas/pyarrow are imported once per worker
+    rather than once per stage.
+    """
+    module = importlib.import_module(module_name)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return module.main(argv)
+
+
+def run_ingest_detect(ingest_module: str, ingest_argv: list[str], detect_argv: list[str], persist_observations: bool) -> dict:
+    """Ingest then detect one partition in memory, writing only the artifacts asked for.
+
+    Observations go from the ingest stage function straight into detect, so the
+    processed artifact is never re-read (and, if not persisted, never written).
+    """
+    ingest_args = importlib.import_module(ingest_module).parse_args(ingest_argv)
+    ingest = importlib.import_module(ingest_module).run_ingest(ingest_args)
+    ingest_dir = write_ingest_artifacts(
+        ingest, ingest_args.output_root, processed_format=ingest_args.processed_format, persist_observations=persist_observations
+    )
+    detect_args = detect_hotspots.parse_args(detect_argv)
+    detect = detect_hotspots.run_detect(detect_args, ingest.observations, ingest.metadata)
+    detect_dir = detect_hotspots.write_detect_artifacts(detect, detect_args.output_root)
+    return {
+        "stage": "ingest_detect",
+        "run_id": detect.run_id,
+        "raw_count": ingest.metadata["raw_count"],
+        "qa_pass_count": ingest.metadata["qa_pass_count"],
+        "candidate_count": detect.metadata["candidate_count"],
+        "observations_persisted": persist_observations,
+        "ingest_artifact_dir": str(ingest_dir),
+        "artifact_dir": str(detect_dir),
+    }
+
+
+@cache
+def local_modules(module_name: str) -> tuple[str, ...]:
+    """``module_name`` and every pipelines/jobs module it imports, transitively, sorted."""
+    found: set[str] = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        path = JOBS_DIR / f"{name}.py"
+        if name in found or not path.exists():
+            continue
+        found.add(name)
+        for node in ast.walk(ast.parse(path.read_bytes())):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module.split(".")[0])
+    return tuple(sorted(found))
+
+
+def _code_digest(module_name: str) -> str:
+    # The detection logic lives in helper modules (detect_engine, background,
+    # aoi_registry, ...), so editing any of them must invalidate the stage.
+    digest = hashlib.sha256()
+    for name in local_modules(module_name):
+        digest.update(f"{name}\0".encode("utf-8"))
+        digest.update((JOBS_DIR / f"{name}.py").read_bytes())
+    return digest.hexdigest()
+
+
+def _stage_params(stage: str, argv: list[str]) -> dict:
+    prefixes = STAGE_ENV_PREFIXES[stage]
+    return {
+        "stage": stage,
+        "argv": argv,
+        "env": {name: value for name, value in sorted(os.environ.items()) if name.startswith(prefixes)},
+        "code": _code_digest(STAGE_JOBS[stage]),
+    }
+
+
+def _recorded_fingerprint(artifact_dir: Path) -> str | None:
+    metadata_path = artifact_dir / "metadata.json"
+    if not metadata_path.exists():
+        return None
+    return json.loads(metadata_path.read_text()).get("input_fingerprint")
+
+
+def _stamp_metadata(artifact_dir: Path, extra: dict) -> None:
+    metadata_path = artifact_dir / "metadata.json"
+    metadata = json.loads(metadata_path.read_text()) if metadata_path.exists() else {}
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    metadata_path.write_text(json.dumps({**metadata, **extra}, indent=2))
+
+
+def stage_task(
+    stage: str,
+    *,
+    key: str,
+    argv: list[str],
+    catalog_root: Path,
+    artifact_dir: Path,
+    inputs: list[Path] | None,
+    deps: tuple[str, ...] = (),
+    resource: str | None = None,
+    metadata: dict | None = None,
+) -> Task:
+    """Task running one job's CLI main with ``argv``; ``inputs=None`` means it always runs."""
+    return _artifact_task(
+        stage,
+        key=key,
+        fn=run_job,
+        args=(STAGE_JOBS[stage], argv),
+        params=_stage_params(stage, argv),
+        catalog_root=catalog_root,
+        artifact_dir=artifact_dir,
+        inputs=inputs,
+        deps=deps,
+        resource=resource,
+        metadata=metadata,
+    )
+
+
+def _artifact_task(
+    stage: str,
+    *,
+    key: str,
+    fn: Callable[..., dict],
+    args: tuple,
+    params: dict,
+    catalog_root: Path,
+    artifact_dir: Path,
+    inputs: list[Path] | None,
+    deps: tuple[str, ...] = (),
+    resource: str | None = None,
+    metadata: dict | None = None,
+) -> Task:
+    def on_success(report: dict, input_fingerprint: str | None, seconds: float) -> None:
+        # Stages that write no artifact of their own (load) get a metadata file
+        # here, so their freshness is tracked like every other stage.
+        _stamp_metadata(
+            artifact_dir,
+            {**(metadata or {}), "input_fingerprint": input_fingerprint, "stage_seconds": round(seconds, 3)},
+        )
+        RunCatalog(catalog_root).set_fingerprint(CATALOG_STAGES[stage], artifact_dir.name, input_fingerprint)
+
+    return Task(
+        key=key,
+        stage=stage,
+        fn=fn,
+        args=args,
+        deps=deps,
+        # Without trackable inputs there is nothing to compare, so the task always runs.
+        fingerprint=None if inputs is None else lambda: fingerprint(params, inputs),
+        recorded_fingerprint=lambda: _recorded_fingerprint(artifact_dir),
+        on_success=on_success,
+        resource=resource,
+    )
+
+
+def build_tasks(args: argparse.Namespace, partitions: list[dict]) -> list[Task]:
+    output_root = args.output_root
+    root_argv = ["--output-root", str(output_root)]
+    tasks: list[Task] = []
+    for partition in partitions:
+        run_id = partition["run_id"]
+        window = ["--aoi", partition["aoi"]]
+        ingest_dir = output_root / "ingest" / run_id
+        detect_dir = output_root / "detect" / run_id
+        detect_argv = ["--ingest-run-id", run_id, *root_argv]
+
+        if args.source == "gee":
+            source_dir = output_root / "source" / "gee" / run_id
+            dates = ["--start", partition["start_date"], "--end", partition["end_date"]]
+            tasks.append(
+                stage_task(
+                    "fetch",
+                    key=f"fetch:{run_id}",
+                    argv=[*window, *dates, *root_argv],
+                    catalog_root=output_root,
+                    artifact_dir=source_dir,
+                    # Recent days are still gaining scenes: fetch them every run,
+                    # and let the slice cache decide what to request again.
+                    inputs=(
+                        None
+                        if overlaps_recent_days(partition["end_date"])
+                        else [Path(os.getenv("INGEST_AOI_FIXTURE", DEFAULT_AOI_FIXTURE))]
+                    ),
+                )
+            )
+            ingest_stage, ingest_deps = "ingest_gee", (f"fetch:{run_id}",)
+            ingest_argv = [*window, *dates, *root_argv]
+            ingest_inputs = [source_dir / "points", source_dir / "points.parquet"]
+        else:
+            dates = ["--start-date", partition["start_date"], "--end-date", partition["end_date"]]
+            ingest_stage, ingest_deps = "ingest", ()
+            ingest_argv = ["--source", args.source, "--fixture", str(args.fixture), *window, *dates, *root_argv]
+            if args.source == "fixture":
+                ingest_inputs = [args.fixture]
+            else:
+                ingest_inputs = real_source_inputs(os.getenv("INGEST_REAL_SOURCE_URL"))
+            # Ingest clips to the AOI polygons in the preset file.
+            if ingest_inputs is not None:
+                ingest_inputs.append(DEFAULT_AOI_PRESETS)
+
+        if args.in_process:
+            tasks.append(
+                _artifact_task(
+                    "ingest_detect",
+                    key=f"detect:{run_id}",
+                    fn=run_ingest_detect,
+                    args=(STAGE_JOBS[ingest_stage], ingest_argv, detect_argv, args.persist_observations),
+                    params={
+                        "ingest": _stage_params(ingest_stage, ingest_argv),
+                        "detect": _stage_params("detect", detect_argv),
+                        "persist_observations": args.persist_observations,
+                    },
+                    catalog_root=output_root,
+                    artifact_dir=detect_dir,
+                    inputs=ingest_inputs,
+                    deps=ingest_deps,
+                )
+            )
+        else:
+            tasks.append(
+                stage_task(
+                    ingest_stage,
+                    key=f"ingest:{run_id}",
+                    argv=ingest_argv,
+                    catalog_root=output_root,
+                    artifact_dir=ingest_dir,
+                    inputs=ingest_inputs,
+                    deps=ingest_deps,
+                )
+            )
+            tasks.append(
+                stage_task(
+                    "detect",
+                    key=f"detect:{run_id}",
+                    argv=detect_argv,
+                    catalog_root=output_root,
+                    artifact_dir=detect_dir,
+                    inputs=[ingest_dir / "processed"],
+                    deps=(f"ingest:{run_id}",),
+                )
+            )
+        if args.load:
+            tasks.append(
+                stage_task(
+                    "load",
+                    key=f"load:{run_id}",
+                    argv=["--detect-run-id", run_id, *root_argv],
+                    catalog_root=output_root,
+                    artifact_dir=output_root / "load" / run_id,
+                    inputs=[detect_dir / "hotspots.json"],
+                    deps=(f"detect:{run_id}",),
+                    # Concurrent loads would contend for the same partitions and data_version row.
+                    resource="database",
+                    metadata={"run_id": run_id, "stage": "load", "input_detect_run_id": run_id},
+                )
+            )
+    return tasks
+
+
+def build_partitions(args: argparse.Namespace) -> list[dict]:
+    partitions = []
+    for aoi in args.aoi or ["permian"]:
+        # Bbox AOIs get the canonical name ingest_tropomi uses for its run ID.
+        run_aoi = aoi if args.source == "gee" else str(resolve_aoi(aoi)["aoi"])
+        for start_date, end_date in date_windows(args.start, args.end, args.partition_days):
+            partitions.append(
+                {
+                    "aoi": aoi,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "run_id": build_run_id(start_date, end_date, run_aoi),
+                }
+            )
+    return partitions
+
+
+def main() -> None:
+    args = parse_args()
+    started = time.perf_counter()
+    generated_at = datetime.now(UTC)
+    partitions = build_partitions(args)
+    tasks = build_tasks(args, partitions)
+
+    with ProcessPoolExecutor(max_workers=max(1, args.max_workers)) as executor:
+        results = run_dag(tasks, executor, force=args.force)
+
+    pipeline_run_id = generated_at.strftime("%Y%m%dT%H%M%S%fZ")
+    run_dir = args.output_root / "pipeline" / pipeline_run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    task_results = [{"key": task.key, "stage": task.stage, **results[task.key]} for task in tasks]
+    status_counts: dict[str, int] = {}
+    for result in task_results:
+        status_counts[result["status"]] = status_counts.get(result["status"], 0) + 1
+    metadata = {
+        "run_id": pipeline_run_id,
+        "stage": "pipeline",
+        "source": args.source,
+        "start_date": args.start,
+        "end_date": args.end,
+        "partition_days": args.partition_days,
+        "partitions": partitions,
+        "max_workers": args.max_workers,
+        "load": args.load,
+        "in_process": args.in_process,
+        "persist_observations": args.persist_observations,
+        "force": args.force,
+        "status_counts": status_counts,
+        "stage_seconds": {
+            stage: round(sum(result.get("seconds", 0.0) for result in task_results if result["stage"] == stage), 3)
+            for stage in dict.fromkeys(task.stage for task in tasks)
+        },
+        "tasks": task_results,
+        "generated_at": generated_at.isoformat(),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    (run_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
+
+    print(
+        json.dumps(
+            {
+                "stage": "pipeline",
+                "run_id": pipeline_run_id,
+                "status_counts": status_counts,
+                "seconds": metadata["seconds"],
+                "artifact_dir": str(run_dir),
+            }
+        )
+    )
+    if any(result["status"] in FAILED_STATUSES for result in task_results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import json
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+
+from psycopg import Cursor, sql
+
+from bulk_load import bulk_upsert, staged, staged_geojson
+from emitter_linking import CONFIDENCE_SCALE_DETECTIONS
+
+ROOT = Path(__file__).resolve().parents[2]
+AOI_FIXTURE_PATH = ROOT / "pipelines" / "fixtures" / "aoi.geojson"
+
+AOI_STAGING_COLUMNS = (("name", "TEXT"), ("geometry", "TEXT"))
+AOI_COLUMNS = {"name": staged("name"), "geom": staged_geojson("geometry")}
+
+
+def iter_aoi_rows(aoi_path: Path = AOI_FIXTURE_PATH) -> Iterator[tuple]:
+    for feature in json.loads(aoi_path.read_text()).get("features", []):
+        name = feature.get("properties", {}).get("name")
+        if name and feature.get("geometry"):
+            yield name, json.dumps(feature["geometry"])
+
+
+def sync_aois(cur: Cursor, aoi_path: Path = AOI_FIXTURE_PATH) -> dict:
+    return bulk_upsert(
+        cur, table="aois", key="name", staging_columns=AOI_STAGING_COLUMNS, columns=AOI_COLUMNS, rows=iter_aoi_rows(aoi_path)
+    )
+
+
+def refresh_hotspot_summaries(cur: Cursor, days: Sequence[str] | None) -> int:
+    """Recompute daily and per-AOI summaries for ``days`` (None = every day)."""
+    cur.execute("SELECT refresh_hotspot_summaries(%s::date[])", (list(days) if days is not None else None,))
+    return cur.fetchone()[0]
+
+
+def refresh_emitter_stats(cur: Cursor, emitter_ids: Sequence[str] | None) -> int:
+    """Recompute rolling stats for ``emitter_ids`` (None = every emitter)."""
+    cur.execute("SELECT refresh_emitter_stats(%s::text[])", (list(emitter_ids) if emitter_ids is not None else None,))
+    return cur.fetchone()[0]
+
+
+def refresh_emitter_detections(cur: Cursor, emitter_ids: Sequence[str]) -> int:
+    """Recompute ``emitter_ids``' detection count, last_seen, confidence and position from their linked hotspots."""
+    cur.execute(
+        "SELECT refresh_emitter_detections(%s::text[], %s)", (list(emitter_ids), CONFIDENCE_SCALE_DETECTIONS)
+    )
+    return cur.fetchone()[0]
+
+
+def refresh_for_staged_hotspots(
+    cur: Cursor,
+    staging_table: str,
+    *,
+    all_days: bool = False,
+    extra_days: Sequence[str] = (),
+    extra_emitter_ids: Sequence[str] = (),
+) -> dict:
+    """Refresh summaries touched by the hotspots staged in ``staging_table``.
+
+    ``extra_days``/``extra_emitter_ids`` add those of hotspots the load
+    deleted. The touched emitters' own detection stats are recomputed first,
+    since a reloaded or deleted hotspot may change them. Call inside the load
+    transaction, before the staging table is dropped.
+    """
+    cur.execute(sql.SQL("SELECT DISTINCT observed_on::text FROM {}").format(sql.Identifier(staging_table)))
+    days = sorted({row[0] for row in cur.fetchall()} | set(extra_days))
+    cur.execute(
+        sql.SQL(
+            """
+            SELECT DISTINCT h.emitter_id
+            FROM hotspots AS h
+            JOIN {} AS s ON s.id = h.id AND s.observed_on = h.observed_on
+            WHERE h.emitter_id IS NOT NULL
+            ORDER BY 1
+            """
+        ).format(sql.Identifier(staging_table))
+    )
+    emitter_ids = sorted({row[0] for row in cur.fetchall()} | set(extra_emitter_ids))
+    return {
+        "summary_days_refreshed": refresh_hotspot_summaries(cur, None if all_days else days),
+        "emitters_recomputed": refresh_emitter_detections(cur, emitter_ids) if emitter_ids else 0,
+        "emitter_stats_refreshed": refresh_emitter_stats(cur, emitter_ids) if emitter_ids else 0,
+    }
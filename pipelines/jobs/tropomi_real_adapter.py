@@ -1,8 +1,12 @@
 import json
-from typing import Any
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, BinaryIO
 from urllib.parse import urlencode, urlparse
 from urllib.request import urlopen
 
+from json_stream import JsonObjectStream
+
 REQUIRED_FIELDS = (
     "observation_id",
     "observed_on",
@@ -12,6 +16,10 @@ REQUIRED_FIELDS = (
     "qa_value",
 )
 
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl")
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+STREAM_CHUNK_BYTES = 1 << 20
+
 
 class RealSourceError(ValueError):
     """Raised when the configured real source payload cannot be normalized."""
@@ -48,16 +56,19 @@ def normalize_observation(record: dict[str, Any]) -> dict[str, Any]:
     return normalized
 
 
-def load_real_tropomi_payload(source_url: str, *, start_date: str, end_date: str, aoi: str, timeout_seconds: float) -> dict[str, Any]:
+def _request_urls(source_url: str, *, start_date: str, end_date: str, aoi: str) -> tuple[str, str]:
     query = urlencode({"start_date": start_date, "end_date": end_date, "aoi": aoi})
     parsed = urlparse(source_url)
     if parsed.scheme == "file":
-        request_url = source_url
-        source_reference = f"{source_url}?{query}"
-    else:
-        separator = "&" if "?" in source_url else "?"
-        request_url = f"{source_url}{separator}{query}"
-        source_reference = request_url
+        return source_url, f"{source_url}?{query}"
+
+    separator = "&" if "?" in source_url else "?"
+    request_url = f"{source_url}{separator}{query}"
+    return request_url, request_url
+
+
+def load_real_tropomi_payload(source_url: str, *, start_date: str, end_date: str, aoi: str, timeout_seconds: float) -> dict[str, Any]:
+    request_url, source_reference = _request_urls(source_url, start_date=start_date, end_date=end_date, aoi=aoi)
 
     with urlopen(request_url, timeout=timeout_seconds) as response:
         payload = json.loads(response.read().decode("utf-8"))
@@ -68,13 +79,95 @@ def load_real_tropomi_payload(source_url: str, *, start_date: str, end_date: str
 
     normalized_observations = sorted(
         (normalize_observation(record) for record in observations),
-        key=lambda record: (record["observed_on"], record["observation_id"]),
+        key=observation_sort_key,
     )
 
+    return {
+        **_payload_header(payload),
+        "source_urls": [source_reference],
+        "observations": normalized_observations,
+    }
+
+
+def observation_sort_key(record: dict[str, Any]) -> tuple[str, str]:
+    return record["observed_on"], record["observation_id"]
+
+
+def _payload_header(payload: dict[str, Any]) -> dict[str, Any]:
     return {
         "dataset": payload.get("dataset", "Sentinel-5P"),
         "product": payload.get("product", "TROPOMI-CH4"),
         "version": payload.get("version", "unknown"),
-        "source_urls": [source_reference],
-        "observations": normalized_observations,
     }
+
+
+class RealSourceStream:
+    """Observations from a real source, read and normalized incrementally.
+
+    ``header`` holds dataset/product/version and is complete once
+    ``iter_observations`` has been exhausted (the fields may follow the array).
+    """
+
+    def __init__(self, response: BinaryIO, *, source_reference: str, ndjson: bool, chunk_size: int) -> None:
+        self._response = response
+        self._ndjson = ndjson
+        self._chunk_size = chunk_size
+        self._raw_header: dict[str, Any] = {}
+        self.source_urls = [source_reference]
+
+    @property
+    def header(self) -> dict[str, Any]:
+        return _payload_header(self._raw_header)
+
+    def _iter_records(self) -> Iterator[Any]:
+        if not self._ndjson:
+            yield from JsonObjectStream(
+                self._response,
+                array_key="observations",
+                chunk_size=self._chunk_size,
+                error=RealSourceError,
+                label="real source payload",
+            ).iter_array(self._raw_header)
+            return
+
+        for line_number, line in enumerate(self._response, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise RealSourceError(f"Malformed NDJSON record on line {line_number}: {exc.msg}") from exc
+
+    def iter_observations(self) -> Iterator[dict[str, Any]]:
+        for record in self._iter_records():
+            if not isinstance(record, dict):
+                raise RealSourceError("Real source observations must be JSON objects")
+            yield normalize_observation(record)
+
+
+def _is_ndjson(request_url: str, content_type: str) -> bool:
+    if content_type in NDJSON_CONTENT_TYPES:
+        return True
+    return urlparse(request_url).path.endswith(NDJSON_SUFFIXES)
+
+
+@contextmanager
+def open_real_tropomi_stream(
+    source_url: str,
+    *,
+    start_date: str,
+    end_date: str,
+    aoi: str,
+    timeout_seconds: float,
+    chunk_size: int = STREAM_CHUNK_BYTES,
+) -> Iterator[RealSourceStream]:
+    request_url, source_reference = _request_urls(source_url, start_date=start_date, end_date=end_date, aoi=aoi)
+
+    with urlopen(request_url, timeout=timeout_seconds) as response:
+        content_type = response.headers.get_content_type() if response.headers else ""
+        yield RealSourceStream(
+            response,
+            source_reference=source_reference,
+            ndjson=_is_ndjson(request_url, content_type),
+            chunk_size=chunk_size,
+        )
@@ -0,0 +1,101 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+FIXTURE = ROOT / "pipelines" / "fixtures" / "sample_tropomi_observations.json"
+
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+
+import artifact_analytics  # noqa: E402
+import detect_hotspots  # noqa: E402
+import fetch_gee_ch4  # noqa: E402
+import ingest_tropomi  # noqa: E402
+
+
+def _fetch(output_root: Path, aoi: str, days: int) -> str:
+    run_id = f"2026-02-01_2026-02-{days + 1:02d}_{aoi}"
+    rows = [
+        {
+            "lat": 31.0 + idx * 0.01,
+            "lon": -102.0,
+            "ch4_ppb": 1900.0 + idx,
+            "qa_value": 0.3 if idx % 3 == 0 else 0.9,
+            "observed_on": f"2026-02-{1 + idx % days:02d}",
+            "source": "gee",
+        }
+        for idx in range(3 * days)
+    ]
+    fetch_gee_ch4.write_artifacts(
+        output_root=output_root,
+        run_id=run_id,
+        rows=rows,
+        aoi=aoi,
+        start_date="2026-02-01",
+        end_date=f"2026-02-{days + 1:02d}",
+        scale_meters=10000,
+        qa_threshold=0.0,
+        max_points=1000,
+    )
+    return run_id
+
+
+def test_views_aggregate_artifacts_across_runs_and_formats(tmp_path: Path) -> None:
+    _fetch(tmp_path, "permian", days=10)
+    _fetch(tmp_path, "delaware", days=3)
+    common = ["--start-date", "2026-02-10", "--end-date", "2026-02-12", "--fixture", str(FIXTURE)]
+    common += ["--output-root", str(tmp_path)]
+    ingest_tropomi.main(["--aoi=permian", *common])
+    ingest_tropomi.main(["--aoi=-103,31,-101,32", *common, "--processed-format", "json"])
+    detect_hotspots.main(["--aoi", "permian", "--output-root", str(tmp_path)])
+
+    report = artifact_analytics.main(["--query", "qa_weekly", "--output-root", str(tmp_path)])
+    assert report["rows"] == [
+        {"aoi": "delaware", "week": "2026-01-26", "qa_fail_count": 3, "point_count": 3},
+        {"aoi": "delaware", "week": "2026-02-02", "qa_fail_count": 0, "point_count": 6},
+        {"aoi": "permian", "week": "2026-01-26", "qa_fail_count": 1, "point_count": 3},
+        {"aoi": "permian", "week": "2026-02-02", "qa_fail_count": 7, "point_count": 21},
+        {"aoi": "permian", "week": "2026-02-09", "qa_fail_count": 2, "point_count": 6},
+    ]
+
+    conn = artifact_analytics.connect(tmp_path)
+    # Parquet and legacy JSON processed observations read through one view.
+    by_run = dict(conn.execute("SELECT run_id, count(*) FROM observations GROUP BY run_id").fetchall())
+    assert len(by_run) == 2 and min(by_run.values()) > 0
+    hotspot = conn.execute("SELECT run_id, aoi, id, anomaly_score FROM hotspots").fetchall()
+    assert hotspot == [("2026-02-10_2026-02-12_permian", "permian", "hs-obs-0004", 47.0)]
+    query = "SELECT counts->>'qa_pass_count' FROM runs WHERE stage = 'ingest' AND aoi = 'permian'"
+    assert conn.execute(query).fetchone() == ("3",)
+
+
+def test_aoi_and_date_window_prune_artifact_files(tmp_path: Path) -> None:
+    permian = _fetch(tmp_path, "permian", days=10)
+    _fetch(tmp_path, "delaware", days=3)
+
+    window = {"aois": ["permian"], "start_date": "2026-02-03", "end_date": "2026-02-05"}
+    files = artifact_analytics.artifact_files(tmp_path, **window)
+    assert sorted(Path(path).parent.name for path, _, _ in files["gee_points"]) == [
+        "observed_on=2026-02-03",
+        "observed_on=2026-02-04",
+    ]
+    assert {run_id for _, run_id, _ in files["gee_points"]} == {permian}
+
+    query = "SELECT observed_on, count(*) AS points FROM gee_points GROUP BY 1 ORDER BY 1"
+    argv = ["--aoi", "permian", "--start-date", "2026-02-03", "--end-date", "2026-02-05"]
+    report = artifact_analytics.main(["--sql", query, *argv, "--output-root", str(tmp_path)])
+    assert report["artifact_file_count"] == 2
+    assert report["rows"] == [{"observed_on": "2026-02-03", "points": 3}, {"observed_on": "2026-02-04", "points": 3}]
+
+    # Filters on partition and data columns reach the Parquet scan: only the
+    # 2026-02-03 partition of each run is opened.
+    conn = artifact_analytics.connect(tmp_path)
+    query = "SELECT avg(ch4_ppb) FROM gee_points WHERE observed_on = '2026-02-03' AND qa_value > 0.5"
+    plan = conn.execute(f"EXPLAIN {query}").fetchall()[0][1]
+    assert "Scanning Files: 2/13" in plan
+    assert "qa_value>0.5" in plan
+
+
+def test_views_are_empty_without_artifacts(tmp_path: Path) -> None:
+    conn = artifact_analytics.connect(tmp_path)
+    for view in artifact_analytics.VIEW_COLUMNS:
+        assert conn.execute(f"SELECT count(*) FROM {view}").fetchone() == (0,)
+    assert artifact_analytics.main(["--query", "hotspots_weekly", "--output-root", str(tmp_path)])["rows"] == []
@@ -0,0 +1,101 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+import background  # noqa: E402
+import detect_engine  # noqa: E402
+
+
+def _two_basin_scene() -> pd.DataFrame:
+    # West basin sits near 1850 ppb, east near 1950 ppb, one grid cell apart per
+    # observation; a +45 ppb plume sits in the west basin on the last day.
+    rng = np.random.default_rng(3)
+    records = []
+    for day in range(3):
+        observed_on = f"2026-02-{10 + day:02d}"
+        for row in range(12):
+            for col in range(24):
+                ch4 = (1850.0 if col < 12 else 1950.0) + rng.normal(0.0, 2.0)
+                if day == 2 and 5 <= row <= 6 and 4 <= col <= 5:
+                    ch4 += 45.0
+                records.append(
+                    {
+                        "observation_id": f"obs-{day}-{row:02d}-{col:02d}",
+                        "observed_on": observed_on,
+                        "latitude": 31.0 + (row + 0.5) * 0.05,
+                        "longitude": -103.0 + (col + 0.5) * 0.05,
+                        "ch4_ppb": round(ch4, 3),
+                    }
+                )
+    return pd.DataFrame.from_records(records)
+
+
+def test_local_background_separates_basins_and_keeps_plume() -> None:
+    frame = _two_basin_scene()
+    kwargs = {"anomaly_threshold_ppb": 30.0, "qa_pass_ratio": 0.9, "grid_cell_deg": 0.05}
+
+    _, global_hotspots = detect_engine.detect_hotspot_clusters(frame, **kwargs)
+    _, local_hotspots = detect_engine.detect_hotspot_clusters(
+        frame, background_mode="local", background_window_cells=3, background_window_days=2, **kwargs
+    )
+
+    # One scene median lands between the basins: the whole east basin is flagged
+    # and the west-basin plume is missed.
+    assert global_hotspots
+    assert all(hotspot["centroid_longitude"] > -102.4 for hotspot in global_hotspots)
+    assert len(local_hotspots) == 1
+    plume = local_hotspots[0]
+    assert plume["observed_on"] == "2026-02-12"
+    assert plume["pixel_count"] == 4
+    assert abs(plume["background_ppb"] - 1850.0) < 5.0
+    assert plume["robust_z"] > 5.0
+
+
+def test_robust_z_threshold_filters_low_significance_anomalies() -> None:
+    frame = _two_basin_scene()
+    kwargs = {
+        "anomaly_threshold_ppb": 30.0,
+        "qa_pass_ratio": 0.9,
+        "grid_cell_deg": 0.05,
+        "background_mode": "local",
+        "background_window_cells": 3,
+        "background_window_days": 2,
+    }
+
+    _, hotspots = detect_engine.detect_hotspot_clusters(frame, robust_z_threshold=5.0, **kwargs)
+    _, none_left = detect_engine.detect_hotspot_clusters(frame, robust_z_threshold=1000.0, **kwargs)
+
+    assert [hotspot["pixel_count"] for hotspot in hotspots] == [4]
+    assert none_left == []
+
+
+def test_local_background_tiles_match_one_raster() -> None:
+    frame = _two_basin_scene()
+    kwargs = {"grid_cell_deg": 0.05, "window_cells": 3, "window_days": 2, "fallback_ppb": 1900.0, "fallback_scale_ppb": 5.0}
+
+    whole = background.local_background(frame, **kwargs)
+    # 3 x 12 x 24 cells pad to 5 x 18 x 30; this limit forces 16 tiles of 3 x 3 x 6.
+    tiled = background.local_background(frame, max_raster_cells=600, **kwargs)
+
+    np.testing.assert_array_equal(tiled[0], whole[0])
+    np.testing.assert_array_equal(tiled[1], whole[1])
+    with pytest.raises(ValueError, match="max_raster_cells"):
+        background.local_background(frame, max_raster_cells=100, **kwargs)
+
+
+def test_row_nanmedian_matches_numpy() -> None:
+    rng = np.random.default_rng(11)
+    values = rng.normal(1900.0, 20.0, (200, 49))
+    values[rng.random(values.shape) < 0.6] = np.nan
+    values[:, 0] = 1900.0
+
+    medians, counts = background._row_nanmedian(values)
+
+    np.testing.assert_allclose(medians, np.nanmedian(values, axis=1))
+    np.testing.assert_array_equal(counts, np.count_nonzero(~np.isnan(values), axis=1))
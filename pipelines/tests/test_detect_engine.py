@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+import detect_engine  # noqa: E402
+
+
+def _observations(ch4_values: list[float]) -> list[dict]:
+    return [
+        {
+            "observation_id": f"obs-{idx:04d}",
+            "observed_on": "2026-02-10",
+            "latitude": 31.7 + idx * 0.01,
+            "longitude": -102.1 - idx * 0.01,
+            "ch4_ppb": value,
+            "qa_value": 0.9,
+        }
+        for idx, value in enumerate(ch4_values)
+    ]
+
+
+def test_columnar_detect_matches_reference_on_random_observations() -> None:
+    rng = np.random.default_rng(42)
+    observations = _observations(rng.normal(1900.0, 30.0, 5000).tolist())
+
+    expected = detect_engine.detect_hotspots_reference(observations, anomaly_threshold_ppb=40.0, qa_pass_ratio=0.8)
+    actual = detect_engine.detect_hotspots(
+        detect_engine.observations_frame(observations), anomaly_threshold_ppb=40.0, qa_pass_ratio=0.8
+    )
+
+    assert expected[1]
+    assert actual == expected
+
+
+def test_columnar_detect_matches_reference_at_rounding_boundary() -> None:
+    # Median is 1900.0; anomalies straddle the 40 ppb threshold within rounding error.
+    observations = _observations([1900.0, 1900.0, 1900.0, 1900.0, 1939.9996, 1939.9994, 1940.0])
+
+    expected = detect_engine.detect_hotspots_reference(observations, anomaly_threshold_ppb=40.0, qa_pass_ratio=1.0)
+    actual = detect_engine.detect_hotspots(
+        detect_engine.observations_frame(observations), anomaly_threshold_ppb=40.0, qa_pass_ratio=1.0
+    )
+
+    assert actual == expected
+    assert [hotspot["id"] for hotspot in actual[1]] == ["hs-obs-0004", "hs-obs-0006"]
+
+
+def test_columnar_detect_handles_empty_observations() -> None:
+    baseline, hotspots = detect_engine.detect_hotspots(
+        detect_engine.observations_frame([]), anomaly_threshold_ppb=40.0, qa_pass_ratio=0.0
+    )
+
+    assert baseline == 0.0
+    assert hotspots == []
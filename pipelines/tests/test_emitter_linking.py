@@ -0,0 +1,155 @@
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+import emitter_linking  # noqa: E402
+import link_emitters  # noqa: E402
+
+
+def _hotspot(hotspot_id: str, observed_on: str, latitude: float, longitude: float, **overrides: object) -> dict:
+    return {
+        "id": hotspot_id,
+        "observed_on": observed_on,
+        "anomaly_score": 50.0,
+        "area_km2": 25.0,
+        "centroid_latitude": latitude,
+        "centroid_longitude": longitude,
+        **overrides,
+    }
+
+
+def _seed_emitter() -> dict:
+    return {
+        "id": "em-001",
+        "name": "Permian Candidate 1",
+        "confidence": 0.5,
+        "detection_count": 4,
+        "last_seen": "2026-02-01",
+        "latitude": 31.7,
+        "longitude": -103.8,
+    }
+
+
+def test_index_radius_query_matches_brute_force() -> None:
+    rng = random.Random(5)
+    index = emitter_linking.EmitterIndex(cell_deg=0.1)
+    points = {f"em-{idx}": (rng.uniform(30.0, 33.0), rng.uniform(-105.0, -100.0)) for idx in range(2000)}
+    for emitter_id, (latitude, longitude) in points.items():
+        index.upsert(emitter_id, latitude, longitude)
+    # Moving an emitter must drop it from its old bucket.
+    index.upsert("em-0", 31.5, -102.5)
+    points["em-0"] = (31.5, -102.5)
+
+    for _ in range(50):
+        latitude, longitude, radius = rng.uniform(30.0, 33.0), rng.uniform(-105.0, -100.0), rng.uniform(1.0, 40.0)
+        expected = sorted(
+            (emitter_linking.haversine_km(latitude, longitude, *point), emitter_id)
+            for emitter_id, point in points.items()
+            if emitter_linking.haversine_km(latitude, longitude, *point) <= radius
+        )
+        assert index.nearby(latitude, longitude, radius) == expected
+    assert len(index) == 2000
+
+
+def test_overlapping_hotspot_updates_existing_emitter_stats() -> None:
+    linker = emitter_linking.EmitterLinker([_seed_emitter()], link_radius_km=5.0)
+
+    links = linker.link_day("2026-02-10", [_hotspot("hs-a", "2026-02-10", 31.72, -103.82)])
+
+    assert links == [("hs-a", "em-001")]
+    emitter = linker.emitters["em-001"]
+    assert emitter["detection_count"] == 5
+    assert emitter["last_seen"] == "2026-02-10"
+    assert emitter["confidence"] == emitter_linking.emitter_confidence(5)
+    assert abs(emitter["latitude"] - (31.7 + 0.02 / 5)) < 1e-9
+    assert linker.created == set()
+
+
+def test_large_cluster_links_when_its_extent_overlaps_the_emitter() -> None:
+    linker = emitter_linking.EmitterLinker([_seed_emitter()], link_radius_km=5.0)
+    # Centroid ~13 km away; a 400 km^2 cluster (~11 km radius) still covers it.
+    far_centroid = _hotspot("hs-big", "2026-02-10", 31.82, -103.8, area_km2=400.0)
+    small = _hotspot("hs-small", "2026-02-11", 31.82, -103.8, area_km2=1.0)
+
+    assert linker.link_day("2026-02-10", [far_centroid]) == [("hs-big", "em-001")]
+    [(_, emitter_id)] = linker.link_day("2026-02-11", [small])
+    assert emitter_id != "em-001"
+
+
+def test_split_plume_counts_one_detection_per_day() -> None:
+    linker = emitter_linking.EmitterLinker([_seed_emitter()], link_radius_km=5.0)
+
+    links = linker.link_day(
+        "2026-02-10",
+        [_hotspot("hs-a", "2026-02-10", 31.71, -103.8), _hotspot("hs-b", "2026-02-10", 31.69, -103.79, anomaly_score=70.0)],
+    )
+
+    assert sorted(links) == [("hs-a", "em-001"), ("hs-b", "em-001")]
+    assert linker.emitters["em-001"]["detection_count"] == 5
+
+
+def test_new_emitters_get_stable_ids_and_reappear() -> None:
+    days = [
+        ("2026-02-10", [_hotspot("hs-new", "2026-02-10", 32.5, -101.0)]),
+        ("2026-03-20", [_hotspot("hs-back", "2026-03-20", 32.51, -101.01)]),
+    ]
+
+    first = emitter_linking.EmitterLinker([_seed_emitter()], link_radius_km=5.0)
+    second = emitter_linking.EmitterLinker([_seed_emitter()], link_radius_km=5.0)
+    first_links = [link for observed_on, hotspots in days for link in first.link_day(observed_on, hotspots)]
+    second_links = [link for observed_on, hotspots in days for link in second.link_day(observed_on, hotspots)]
+
+    emitter_id = emitter_linking.new_emitter_id("hs-new")
+    assert first_links == second_links == [("hs-new", emitter_id), ("hs-back", emitter_id)]
+    assert first.emitters[emitter_id]["detection_count"] == 2
+    assert first.emitters[emitter_id]["last_seen"] == "2026-03-20"
+    assert first.created == {emitter_id}
+
+
+def test_incremental_runs_match_a_single_pass() -> None:
+    rng = random.Random(9)
+    days = []
+    for day in range(20):
+        observed_on = f"2026-01-{day + 1:02d}"
+        days.append(
+            (
+                observed_on,
+                [
+                    _hotspot(f"hs-{day}-{idx}", observed_on, 31.0 + rng.random() * 2, -104.0 + rng.random() * 3)
+                    for idx in range(15)
+                ],
+            )
+        )
+
+    single = emitter_linking.EmitterLinker([_seed_emitter()], link_radius_km=8.0)
+    single_links = [link for observed_on, hotspots in days for link in single.link_day(observed_on, hotspots)]
+
+    # Second run starts only from the first run's persisted emitter rows.
+    early = emitter_linking.EmitterLinker([_seed_emitter()], link_radius_km=8.0)
+    early_links = [link for observed_on, hotspots in days[:12] for link in early.link_day(observed_on, hotspots)]
+    late = emitter_linking.EmitterLinker(early.emitters.values(), link_radius_km=8.0)
+    late_links = [link for observed_on, hotspots in days[12:] for link in late.link_day(observed_on, hotspots)]
+
+    assert early_links + late_links == single_links
+    assert late.emitters == single.emitters
+
+
+def test_hotspot_rows_group_by_day_and_emitter_rows_are_points() -> None:
+    rows = [
+        ("hs-a", "2026-02-10", 50.0, 25.0, 31.7, -103.8),
+        ("hs-b", "2026-02-10", 45.0, 25.0, 31.8, -103.8),
+        ("hs-c", "2026-02-11", 60.0, 25.0, 31.7, -103.8),
+    ]
+
+    grouped = list(link_emitters.iter_hotspot_days(rows))
+    [emitter_row] = link_emitters.iter_emitter_rows([_seed_emitter()])
+
+    assert [(observed_on, [item["id"] for item in hotspots]) for observed_on, hotspots in grouped] == [
+        ("2026-02-10", ["hs-a", "hs-b"]),
+        ("2026-02-11", ["hs-c"]),
+    ]
+    assert emitter_row[0] == "em-001"
+    assert emitter_row[-1] == '{"type": "Point", "coordinates": [-103.8, 31.7]}'
@@ -1,6 +1,7 @@
 import json
 import subprocess
 import sys
+from datetime import date
 from pathlib import Path
 
 import os
@@ -14,7 +15,10 @@ INGEST_GEE_JOB = ROOT / "pipelines" / "jobs" / "ingest_gee_ch4.py"
 GEE_FIXTURE = ROOT / "pipelines" / "fixtures" / "gee_points.json"
 
 sys.path.append(str(ROOT / "pipelines" / "jobs"))
+import fetch_cache  # noqa: E402
 import fetch_gee_ch4  # noqa: E402
+import ingest_gee_ch4  # noqa: E402
+from observation_store import OBSERVATIONS_SCHEMA, read_processed_observations, write_ingest_artifacts  # noqa: E402
 
 
 def test_build_run_id() -> None:
@@ -33,12 +37,206 @@ def test_write_artifacts_with_empty_points_creates_stable_parquet_schema(tmp_pat
         qa_threshold=0.5,
         max_points=50000,
     )
-    points = pd.read_parquet(run_dir / "points.parquet")
+    points = fetch_gee_ch4.read_points_dataset(run_dir / "points")
     metadata = json.loads((run_dir / "metadata.json").read_text())
 
     assert list(points.columns) == ["lat", "lon", "ch4_ppb", "qa_value", "observed_on", "source"]
     assert points.empty
     assert metadata["point_count"] == 0
+    assert metadata["partitions"] == []
+
+
+class _FakeGeometry:
+    def __init__(self, geojson: dict | None = None, bbox: list[float] | None = None) -> None:
+        self.bbox = bbox if bbox is not None else list(fetch_gee_ch4.geometry_bbox(geojson))
+
+    @staticmethod
+    def Rectangle(coords: list[float]) -> "_FakeGeometry":
+        return _FakeGeometry(bbox=coords)
+
+    def intersection(self, other: "_FakeGeometry", _max_error: float) -> "_FakeGeometry":
+        return _FakeGeometry(
+            bbox=[
+                max(self.bbox[0], other.bbox[0]),
+                max(self.bbox[1], other.bbox[1]),
+                min(self.bbox[2], other.bbox[2]),
+                min(self.bbox[3], other.bbox[3]),
+            ]
+        )
+
+
+class _FakeSample:
+    def __init__(self, ee: "_FakeEE", day: str, bbox: list[float]) -> None:
+        self._ee, self._day, self._bbox = ee, day, bbox
+
+    def getInfo(self) -> dict:
+        key = (self._day, tuple(self._bbox))
+        self._ee.calls.append(key)
+        if key in self._ee.fail_once:
+            self._ee.fail_once.discard(key)
+            raise RuntimeError("Too many concurrent aggregations")
+        min_lon, min_lat, max_lon, max_lat = self._bbox
+        points = [(min_lon, min_lat), ((min_lon + max_lon) / 2, (min_lat + max_lat) / 2), (max_lon, max_lat)]
+        return {
+            "features": [
+                {
+                    "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                    "properties": {"CH4_column_volume_mixing_ratio_dry_air": 1900.0, "qa_value": 0.9},
+                }
+                for lon, lat in points
+            ]
+        }
+
+
+class _FakeImage:
+    def __init__(self, ee: "_FakeEE", day: str) -> None:
+        self._ee, self._day = ee, day
+
+    def select(self, *_args) -> "_FakeImage":
+        return self
+
+    def gte(self, _value: float) -> "_FakeImage":
+        return self
+
+    def updateMask(self, _mask: "_FakeImage") -> "_FakeImage":
+        return self
+
+    def sample(self, *, region: _FakeGeometry, **_kwargs) -> _FakeSample:
+        return _FakeSample(self._ee, self._day, region.bbox)
+
+
+class _FakeCollection:
+    def __init__(self, ee: "_FakeEE") -> None:
+        self._ee = ee
+        self._day = ""
+
+    def filterDate(self, start: str, _end: str) -> "_FakeCollection":
+        self._day = start
+        return self
+
+    def filterBounds(self, _region: _FakeGeometry) -> "_FakeCollection":
+        return self
+
+    def select(self, _bands: list[str]) -> "_FakeCollection":
+        return self
+
+    def median(self) -> _FakeImage:
+        return _FakeImage(self._ee, self._day)
+
+
+class _FakeEE:
+    Geometry = _FakeGeometry
+
+    def __init__(self) -> None:
+        self.calls: list[tuple] = []
+        self.fail_once: set[tuple] = set()
+
+    def ImageCollection(self, _dataset_id: str) -> _FakeCollection:
+        return _FakeCollection(self)
+
+
+PERMIAN = {
+    "type": "Polygon",
+    "coordinates": [[[-104.9, 30.3], [-100.0, 30.3], [-100.0, 33.0], [-104.9, 33.0], [-104.9, 30.3]]],
+}
+
+
+def test_fetch_schedule_tiles_days_retries_and_partitions(tmp_path: Path) -> None:
+    fake_ee = _FakeEE()
+    tiles = fetch_gee_ch4.split_aoi_tiles(PERMIAN, 2.5)
+    fake_ee.fail_once.add(("2026-02-02", tuple(tiles[0]["bbox"])))
+    sleeps: list[float] = []
+
+    rows, schedule = fetch_gee_ch4.run_fetch_schedule(
+        lambda: fake_ee,
+        aoi_geometry=PERMIAN,
+        start_date="2026-02-01",
+        end_date="2026-02-03",
+        scale_meters=10000,
+        qa_threshold=0.5,
+        max_points=100,
+        tile_scale=4,
+        tile_size_deg=2.5,
+        max_workers=3,
+        max_retries=2,
+        retry_base_seconds=0.5,
+        sleep=sleeps.append,
+    )
+
+    assert [tile["tile_id"] for tile in tiles] == ["r000c000", "r000c001", "r001c000", "r001c001"]
+    assert schedule["slice_count"] == 8
+    assert schedule["retry_count"] == 1
+    assert len(sleeps) == 1 and 0.5 <= sleeps[0] <= 0.75
+    assert len(fake_ee.calls) == 9
+    assert {row["observed_on"] for row in rows} == {"2026-02-01", "2026-02-02"}
+
+    run_dir = fetch_gee_ch4.write_artifacts(
+        output_root=tmp_path,
+        run_id="2026-02-01_2026-02-03_permian",
+        rows=rows,
+        aoi="permian",
+        start_date="2026-02-01",
+        end_date="2026-02-03",
+        scale_meters=10000,
+        qa_threshold=0.5,
+        max_points=100,
+        schedule=schedule,
+    )
+    metadata = json.loads((run_dir / "metadata.json").read_text())
+    points = fetch_gee_ch4.read_points_dataset(run_dir / "points")
+
+    # The shared corner of tiles r000c000 and r001c001 is only kept once per day.
+    assert metadata["partitions"] == [
+        {"observed_on": "2026-02-01", "point_count": 11},
+        {"observed_on": "2026-02-02", "point_count": 11},
+    ]
+    assert metadata["tile_count"] == 4
+    assert sorted(path.name for path in (run_dir / "points").iterdir()) == [
+        "observed_on=2026-02-01",
+        "observed_on=2026-02-02",
+    ]
+    assert len(points) == 22
+
+    subprocess.run(
+        [
+            sys.executable,
+            str(INGEST_GEE_JOB),
+            "--start",
+            "2026-02-01",
+            "--end",
+            "2026-02-03",
+            "--output-root",
+            str(tmp_path),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    processed = pd.read_parquet(tmp_path / "ingest" / "2026-02-01_2026-02-03_permian" / "processed" / "observations.parquet")
+    assert processed["observed_on"].unique().tolist() == ["2026-02-01", "2026-02-02"]
+    assert processed["observation_id"].iloc[-1] == "GEE-2026-02-02-33.00000_-100.00000"
+
+
+def test_fetch_schedule_raises_after_exhausting_retries() -> None:
+    fake_ee = _FakeEE()
+    tile = fetch_gee_ch4.split_aoi_tiles(PERMIAN, 10.0)[0]
+    fake_ee.fail_once.add(("2026-02-01", tuple(tile["bbox"])))
+
+    with pytest.raises(RuntimeError, match="day 2026-02-01 tile r000c000"):
+        fetch_gee_ch4.run_fetch_schedule(
+            lambda: fake_ee,
+            aoi_geometry=PERMIAN,
+            start_date="2026-02-01",
+            end_date="2026-02-02",
+            scale_meters=10000,
+            qa_threshold=0.5,
+            max_points=100,
+            tile_scale=4,
+            tile_size_deg=10.0,
+            max_workers=1,
+            max_retries=0,
+            retry_base_seconds=0.0,
+            sleep=lambda _seconds: None,
+        )
 
 
 def test_ingest_gee_converts_parquet_to_observations(tmp_path: Path) -> None:
@@ -72,14 +270,60 @@ def test_ingest_gee_converts_parquet_to_observations(tmp_path: Path) -> None:
     payload = json.loads(result.stdout.strip())
     assert payload["run_id"] == run_id
 
-    processed = json.loads((tmp_path / "ingest" / run_id / "processed" / "observations.json").read_text())
+    processed = pd.read_parquet(tmp_path / "ingest" / run_id / "processed" / "observations.parquet")
     metadata = json.loads((tmp_path / "ingest" / run_id / "metadata.json").read_text())
 
-    assert len(processed["observations"]) == 2
-    assert processed["observations"][0]["observation_id"].startswith("GEE-")
+    assert len(processed) == 2
+    assert processed["observation_id"].iloc[0].startswith("GEE-")
     assert metadata["qa_fail_count"] == 1
 
 
+def test_ingest_gee_json_output_keeps_legacy_lat_lon_keys(tmp_path: Path) -> None:
+    points = pd.DataFrame(json.loads(GEE_FIXTURE.read_text())["points"])
+    args = ingest_gee_ch4.parse_args(["--processed-format", "json", "--output-root", str(tmp_path)])
+    result = ingest_gee_ch4.run_ingest(args, points)
+    run_dir = write_ingest_artifacts(result, tmp_path, processed_format="json")
+
+    observation = json.loads((run_dir / "processed" / "observations.json").read_text())["observations"][0]
+    assert (observation["lat"], observation["lon"]) == (observation["latitude"], observation["longitude"])
+    read_back = read_processed_observations(run_dir / "processed" / "observations.json")
+    assert list(read_back.columns) == [field.name for field in OBSERVATIONS_SCHEMA]
+
+
+def test_to_observations_orders_ids_and_splits_qa_in_bulk(monkeypatch) -> None:
+    frame = pd.DataFrame(
+        {
+            "lat": [31.8, 31.4, 31.6, 31.2],
+            "lon": [-102.8, -103.2, -103.0, -103.4],
+            "ch4_ppb": [1905.0, 1880.0, 1935.0, 1890.0],
+            "qa_value": [0.45, 0.92, 0.5, float("nan")],
+            "observed_on": ["2026-02-01", "2026-02-01", "2026-02-01", "2026-02-02"],
+            "source": ["S5P_OFFL_L3_CH4"] * 4,
+        }
+    )
+
+    observations, dropped_ids = ingest_gee_ch4.to_observations(frame, qa_threshold=0.5)
+
+    assert observations["observation_id"].tolist() == [
+        "GEE-2026-02-01-31.40000_-103.20000",
+        "GEE-2026-02-01-31.60000_-103.00000",
+        "GEE-2026-02-02-31.20000_-103.40000",
+    ]
+    assert observations["latitude"].tolist() == [31.4, 31.6, 31.2]
+    assert dropped_ids == ["GEE-2026-02-01-31.80000_-102.80000"]
+
+    # The same sample keeps its ID in a run over another window or AOI.
+    later, _ = ingest_gee_ch4.to_observations(frame.iloc[[3]], qa_threshold=0.5)
+    assert later["observation_id"].tolist() == ["GEE-2026-02-02-31.20000_-103.40000"]
+    assert list(observations.columns) == ["observation_id", "observed_on", "latitude", "longitude", "ch4_ppb", "qa_value"]
+
+    # IDs built across chunk boundaries match the single-chunk build.
+    monkeypatch.setattr(ingest_gee_ch4, "ID_CHUNK_ROWS", 2)
+    chunked, chunked_dropped = ingest_gee_ch4.to_observations(frame, qa_threshold=0.5)
+    assert chunked["observation_id"].tolist() == observations["observation_id"].tolist()
+    assert chunked_dropped == dropped_ids
+
+
 @pytest.mark.skipif(os.getenv("GEE_RUN_INTEGRATION") != "1", reason="GEE integration requires explicit env opt-in and credentials")
 def test_fetch_gee_job_integration_smoke(tmp_path: Path) -> None:
     result = subprocess.run(
@@ -101,3 +345,112 @@ def test_fetch_gee_job_integration_smoke(tmp_path: Path) -> None:
         text=True,
     )
     assert result.returncode == 0
+
+
+def _run_cached_schedule(
+    fake_ee: "_FakeEE", cache: "fetch_cache.FetchCache", start: str, end: str, **kwargs
+) -> tuple[list[dict], dict]:
+    return fetch_gee_ch4.run_fetch_schedule(
+        lambda: fake_ee,
+        aoi_geometry=PERMIAN,
+        start_date=start,
+        end_date=end,
+        scale_meters=10000,
+        qa_threshold=0.5,
+        max_points=100,
+        tile_scale=4,
+        tile_size_deg=2.5,
+        max_workers=2,
+        max_retries=0,
+        retry_base_seconds=0.0,
+        cache=cache,
+        **kwargs,
+    )
+
+
+def test_fetch_cache_only_fetches_missing_days(tmp_path: Path) -> None:
+    cache = fetch_cache.FetchCache(tmp_path / "cache", schema=fetch_gee_ch4.POINTS_SCHEMA)
+    fake_ee = _FakeEE()
+    first_rows, first = _run_cached_schedule(fake_ee, cache, "2026-02-01", "2026-02-03")
+    assert (first["cache_hits"], first["cache_misses"], len(fake_ee.calls)) == (0, 8, 8)
+
+    rolling = fetch_cache.FetchCache(tmp_path / "cache", schema=fetch_gee_ch4.POINTS_SCHEMA)
+    rows, second = _run_cached_schedule(fake_ee, rolling, "2026-02-02", "2026-02-04")
+    assert (second["cache_hits"], second["cache_misses"], second["fetched_slice_count"]) == (4, 4, 4)
+    assert {call[0] for call in fake_ee.calls[8:]} == {"2026-02-03"}
+    cached_day = sorted((row["lat"], row["lon"]) for row in rows if row["observed_on"] == "2026-02-02")
+    assert cached_day == sorted((row["lat"], row["lon"]) for row in first_rows if row["observed_on"] == "2026-02-02")
+
+    def _unexpected_ee():
+        raise AssertionError("Earth Engine should not be initialized on a full cache hit")
+
+    full_hit = fetch_cache.FetchCache(tmp_path / "cache", schema=fetch_gee_ch4.POINTS_SCHEMA)
+    _, third = fetch_gee_ch4.run_fetch_schedule(
+        _unexpected_ee,
+        aoi_geometry=PERMIAN,
+        start_date="2026-02-01",
+        end_date="2026-02-04",
+        scale_meters=10000,
+        qa_threshold=0.5,
+        max_points=100,
+        tile_scale=4,
+        tile_size_deg=2.5,
+        max_workers=2,
+        max_retries=0,
+        retry_base_seconds=0.0,
+        cache=full_hit,
+    )
+    assert (third["cache_hits"], third["cache_misses"], third["cache_hit_ratio"]) == (12, 0, 1.0)
+
+
+def test_fetch_cache_key_changes_with_fetch_parameters() -> None:
+    base = {
+        "aoi_geometry_hash": fetch_cache.geometry_hash(PERMIAN),
+        "day": "2026-02-01",
+        "tile_bbox": (-104.9, 30.3, -102.4, 32.8),
+        "scale_meters": 10000,
+        "qa_threshold": 0.5,
+        "max_points": 100,
+    }
+    key = fetch_gee_ch4.slice_cache_key(**base)
+
+    assert key == fetch_gee_ch4.slice_cache_key(**base)
+    assert key != fetch_gee_ch4.slice_cache_key(**{**base, "qa_threshold": 0.6})
+    assert key != fetch_gee_ch4.slice_cache_key(**{**base, "scale_meters": 5000})
+    assert key != fetch_gee_ch4.slice_cache_key(**{**base, "aoi_geometry_hash": "other"})
+
+
+def test_fetch_cache_refetches_aged_slices_of_recent_days(tmp_path: Path) -> None:
+    cache = fetch_cache.FetchCache(tmp_path / "cache", schema=fetch_gee_ch4.POINTS_SCHEMA)
+    fake_ee = _FakeEE()
+    recent = {"recent_days": 2, "recent_ttl_seconds": 3600, "today": date(2026, 2, 4)}
+    _run_cached_schedule(fake_ee, cache, "2026-02-01", "2026-02-03", **recent)
+    for path in (tmp_path / "cache").glob("*/*.parquet"):
+        os.utime(path, (path.stat().st_atime - 7200, path.stat().st_mtime - 7200))
+
+    # 2026-02-02 is within two days of "today" and its entries are older than the
+    # recent TTL; 2026-02-01 is settled and stays cached under the default (no) TTL.
+    fake_ee.calls.clear()
+    reopened = fetch_cache.FetchCache(tmp_path / "cache", schema=fetch_gee_ch4.POINTS_SCHEMA)
+    _, stats = _run_cached_schedule(fake_ee, reopened, "2026-02-01", "2026-02-03", **recent)
+    assert (stats["cache_hits"], stats["cache_misses"], stats["cache_expired"]) == (4, 4, 4)
+    assert {call[0] for call in fake_ee.calls} == {"2026-02-02"}
+
+
+def test_fetch_cache_ttl_and_size_eviction(tmp_path: Path) -> None:
+    cache = fetch_cache.FetchCache(tmp_path / "cache", schema=fetch_gee_ch4.POINTS_SCHEMA, ttl_seconds=60)
+    row = {"lat": 31.4, "lon": -103.2, "ch4_ppb": 1880.0, "qa_value": 0.9, "observed_on": "2026-02-01", "source": "S5P"}
+    cache.put("aa" + "0" * 62, [row])
+    cache.put("bb" + "0" * 62, [row])
+    stale = tmp_path / "cache" / "aa" / ("aa" + "0" * 62 + ".parquet")
+    os.utime(stale, (stale.stat().st_atime - 3600, stale.stat().st_mtime - 3600))
+
+    assert cache.get("aa" + "0" * 62) is None
+    assert cache.get("bb" + "0" * 62) == [row]
+    cache.evict()
+    assert not stale.exists()
+
+    capped = fetch_cache.FetchCache(tmp_path / "cache", schema=fetch_gee_ch4.POINTS_SCHEMA, max_bytes=1)
+    capped.evict()
+    assert capped.stats()["cache_evicted"] == 1
+    assert not list((tmp_path / "cache").glob("*/*.parquet"))
@@ -0,0 +1,160 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+import detect_engine  # noqa: E402
+import hotspot_clustering  # noqa: E402
+
+
+def _anomalies(cells: list[tuple[int, int]], *, observed_on: str = "2026-02-10", cell_deg: float = 0.1) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "observation_id": [f"obs-{idx:04d}" for idx in range(len(cells))],
+            "observed_on": observed_on,
+            "latitude": [(row + 0.5) * cell_deg for row, _ in cells],
+            "longitude": [(col + 0.5) * cell_deg for _, col in cells],
+            "anomaly_score": [40.0 + idx for idx in range(len(cells))],
+        }
+    )
+
+
+def _reference_components(cells: set[tuple[str, int, int]]) -> set[frozenset]:
+    # Breadth-first flood fill over 4-neighbours, one cell at a time.
+    remaining = set(cells)
+    components = set()
+    while remaining:
+        frontier = [remaining.pop()]
+        component = set(frontier)
+        while frontier:
+            day, row, col = frontier.pop()
+            for neighbour in ((day, row + 1, col), (day, row - 1, col), (day, row, col + 1), (day, row, col - 1)):
+                if neighbour in remaining:
+                    remaining.remove(neighbour)
+                    component.add(neighbour)
+                    frontier.append(neighbour)
+        components.add(frozenset(component))
+    return components
+
+
+def _ring_area(ring: list[list[float]]) -> float:
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:])) / 2
+
+
+def test_clusters_match_flood_fill_and_outline_every_cell() -> None:
+    rng = np.random.default_rng(7)
+    cell_deg = 0.1
+    count = 3000
+    frame = pd.DataFrame(
+        {
+            "observation_id": [f"obs-{idx:05d}" for idx in range(count)],
+            "observed_on": rng.choice(["2026-02-10", "2026-02-11"], count),
+            "latitude": rng.uniform(31.0, 34.0, count),
+            "longitude": rng.uniform(-104.0, -101.0, count),
+            "anomaly_score": rng.uniform(40.0, 80.0, count),
+        }
+    )
+    rows, cols = hotspot_clustering.grid_cells(frame["latitude"].to_numpy(), frame["longitude"].to_numpy(), cell_deg)
+    cell_of = dict(zip(frame["observation_id"], zip(frame["observed_on"], rows.tolist(), cols.tolist())))
+
+    clusters = hotspot_clustering.cluster_anomalies(frame, cell_deg=cell_deg)
+
+    actual = {frozenset(cell_of[obs_id] for obs_id in ids) for ids in clusters["observation_ids"]}
+    assert actual == _reference_components(set(cell_of.values()))
+    assert clusters["pixel_count"].sum() == len(set(cell_of.values()))
+    assert (clusters["pixel_count"] > 1).any()
+
+    for cluster in clusters.to_dict(orient="records"):
+        rings = cluster["geometry"]["coordinates"]
+        assert all(ring[0] == ring[-1] and len(ring) >= 5 for ring in rings)
+        assert _ring_area(rings[0]) > 0
+        assert all(_ring_area(ring) < 0 for ring in rings[1:])
+        filled_area = sum(_ring_area(ring) for ring in rings)
+        assert abs(filled_area - cluster["pixel_count"] * cell_deg**2) < 1e-6
+
+
+def test_cluster_polygon_keeps_holes_and_splits_diagonal_cells() -> None:
+    donut = [(row, col) for row in range(3) for col in range(3) if (row, col) != (1, 1)]
+
+    clusters = hotspot_clustering.cluster_anomalies(_anomalies(donut, cell_deg=1.0), cell_deg=1.0)
+
+    assert len(clusters) == 1
+    assert clusters.iloc[0]["pixel_count"] == 8
+    assert clusters.iloc[0]["geometry"]["coordinates"] == [
+        [[0.0, 0.0], [3.0, 0.0], [3.0, 3.0], [0.0, 3.0], [0.0, 0.0]],
+        [[1.0, 2.0], [2.0, 2.0], [2.0, 1.0], [1.0, 1.0], [1.0, 2.0]],
+    ]
+
+    diagonal = hotspot_clustering.cluster_anomalies(_anomalies([(0, 0), (1, 1)], cell_deg=1.0), cell_deg=1.0)
+    assert diagonal["pixel_count"].tolist() == [1, 1]
+
+
+def test_cluster_records_name_peak_and_sum_cell_area() -> None:
+    frame = _anomalies([(317, -1021), (317, -1020), (318, -1020)])
+    frame.loc[1, "anomaly_score"] = 75.0
+
+    background = pd.DataFrame(
+        {
+            "observation_id": [f"bg-{idx}" for idx in range(10)],
+            "observed_on": "2026-02-10",
+            "latitude": 10.0,
+            "longitude": 10.0,
+            "anomaly_score": 0.0,
+        }
+    )
+    observations = pd.concat([frame, background], ignore_index=True)
+    observations["ch4_ppb"] = 1900.0 + observations.pop("anomaly_score")
+
+    _, hotspots = detect_engine.detect_hotspot_clusters(
+        observations,
+        anomaly_threshold_ppb=40.0,
+        qa_pass_ratio=0.8,
+        grid_cell_deg=0.1,
+    )
+
+    assert len(hotspots) == 1
+    hotspot = hotspots[0]
+    assert hotspot["id"] == "hs-obs-0001"
+    assert hotspot["anomaly_score"] == 75.0
+    assert hotspot["source_observation_ids"] == ["obs-0000", "obs-0001", "obs-0002"]
+    assert hotspot["pixel_count"] == 3
+    expected_area = sum(
+        (0.1 * hotspot_clustering.KM_PER_DEGREE) ** 2 * np.cos(np.radians((row + 0.5) * 0.1)) for row in (317, 317, 318)
+    )
+    assert abs(hotspot["area_km2"] - round(expected_area, 3)) < 1e-9
+    assert hotspot["geometry"]["type"] == "Polygon"
+
+
+def test_cluster_peaks_are_read_by_row_when_observation_ids_repeat() -> None:
+    # Two separate one-cell clusters whose peaks share an observation ID.
+    frame = _anomalies([(317, -1021), (330, -1000)])
+    frame["observation_id"] = "obs-dup"
+    frame["anomaly_score"] = [50.0, 90.0]
+    background = pd.DataFrame(
+        {
+            "observation_id": [f"bg-{idx}" for idx in range(10)],
+            "observed_on": "2026-02-10",
+            "latitude": 10.0,
+            "longitude": 10.0,
+            "anomaly_score": np.linspace(-2.0, 2.0, 10),
+        }
+    )
+    observations = pd.concat([frame, background], ignore_index=True)
+    observations["ch4_ppb"] = 1900.0 + observations.pop("anomaly_score")
+
+    _, hotspots = detect_engine.detect_hotspot_clusters(
+        observations,
+        anomaly_threshold_ppb=40.0,
+        qa_pass_ratio=0.8,
+        grid_cell_deg=0.1,
+    )
+
+    by_score = sorted(hotspots, key=lambda hotspot: hotspot["anomaly_score"])
+    assert [hotspot["source_observation_id"] for hotspot in by_score] == ["obs-dup", "obs-dup"]
+    low, high = (hotspot["robust_z"] for hotspot in by_score)
+    assert high / low == pytest.approx(by_score[1]["anomaly_score"] / by_score[0]["anomaly_score"], rel=1e-2)
@@ -3,12 +3,21 @@ import subprocess
 import sys
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 ROOT = Path(__file__).resolve().parents[2]
 INGEST_JOB = ROOT / "pipelines" / "jobs" / "ingest_tropomi.py"
 DETECT_JOB = ROOT / "pipelines" / "jobs" / "detect_hotspots.py"
 FIXTURE = ROOT / "pipelines" / "fixtures" / "sample_tropomi_observations.json"
 REAL_SOURCE_FIXTURE = ROOT / "pipelines" / "fixtures" / "sample_tropomi_real_source.json"
 
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+import detect_hotspots  # noqa: E402
+from aoi_registry import Aoi, AoiIndex, load_registry  # noqa: E402
+import ingest_tropomi  # noqa: E402
+import tropomi_real_adapter  # noqa: E402
+
 
 def test_ingest_writes_raw_processed_and_metadata(tmp_path: Path) -> None:
     result = subprocess.run(
@@ -20,7 +29,7 @@ def test_ingest_writes_raw_processed_and_metadata(tmp_path: Path) -> None:
             "--start-date",
             "2026-02-10",
             "--end-date",
-            "2026-02-11",
+            "2026-02-12",
             "--qa-threshold",
             "0.9",
             "--fixture",
@@ -36,13 +45,15 @@ def test_ingest_writes_raw_processed_and_metadata(tmp_path: Path) -> None:
     run_id = payload["run_id"]
 
     metadata = json.loads((tmp_path / "ingest" / run_id / "metadata.json").read_text())
-    processed = json.loads((tmp_path / "ingest" / run_id / "processed" / "observations.json").read_text())
+    processed = pd.read_parquet(tmp_path / "ingest" / run_id / "processed" / "observations.parquet")
 
     assert metadata["qa_threshold"] == 0.9
     assert metadata["source"] == "fixture"
     assert metadata["qa_pass_count"] == 2
     assert metadata["qa_fail_count"] == 2
-    assert len(processed["observations"]) == 2
+    assert metadata["processed_format"] == "parquet"
+    assert list(processed.columns) == ["observation_id", "observed_on", "latitude", "longitude", "ch4_ppb", "qa_value"]
+    assert len(processed) == 2
 
 
 def test_ingest_real_source_requires_url(tmp_path: Path) -> None:
@@ -77,7 +88,7 @@ def test_ingest_real_source_normalizes_and_tracks_source_urls(tmp_path: Path) ->
             "--start-date",
             "2026-02-10",
             "--end-date",
-            "2026-02-11",
+            "2026-02-12",
             "--qa-threshold",
             "0.9",
             "--output-root",
@@ -91,14 +102,100 @@ def test_ingest_real_source_normalizes_and_tracks_source_urls(tmp_path: Path) ->
     run_id = json.loads(result.stdout.strip())["run_id"]
     raw_refs = json.loads((tmp_path / "ingest" / run_id / "raw" / "raw_refs.json").read_text())
     metadata = json.loads((tmp_path / "ingest" / run_id / "metadata.json").read_text())
-    processed = json.loads((tmp_path / "ingest" / run_id / "processed" / "observations.json").read_text())
+    processed = pd.read_parquet(tmp_path / "ingest" / run_id / "processed" / "observations.parquet")
 
     assert metadata["source"] == "real"
     assert metadata["source_fixture"] is None
     assert len(metadata["source_urls"]) == 1
     assert "start_date=2026-02-10" in metadata["source_urls"][0]
-    assert raw_refs["raw_observation_ids"] == ["S5P-R1", "S5P-R2", "S5P-R3"]
-    assert [obs["observation_id"] for obs in processed["observations"]] == ["S5P-R1", "S5P-R3"]
+    assert raw_refs["in_scope_observation_ids"] == ["S5P-R1", "S5P-R2", "S5P-R3"]
+    assert processed["observation_id"].tolist() == ["S5P-R1", "S5P-R3"]
+
+
+def _run_streaming_ingest(tmp_path: Path, source_url: str) -> tuple[str, subprocess.CompletedProcess]:
+    result = subprocess.run(
+        [
+            sys.executable,
+            str(INGEST_JOB),
+            "--source",
+            "real",
+            "--stream",
+            "--stream-batch-size",
+            "1",
+            "--real-source-url",
+            source_url,
+            "--aoi",
+            "permian",
+            "--start-date",
+            "2026-02-10",
+            "--end-date",
+            "2026-02-12",
+            "--qa-threshold",
+            "0.9",
+            "--output-root",
+            str(tmp_path),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout.strip())["run_id"], result
+
+
+def test_ingest_real_source_streaming_matches_in_memory_ordering(tmp_path: Path) -> None:
+    run_id, _ = _run_streaming_ingest(tmp_path, f"file://{REAL_SOURCE_FIXTURE.resolve()}")
+
+    run_dir = tmp_path / "ingest" / run_id
+    metadata = json.loads((run_dir / "metadata.json").read_text())
+    processed = pd.read_parquet(run_dir / "processed" / "observations.parquet")
+    raw_ids = pd.read_parquet(run_dir / "raw" / "observation_ids.parquet")
+
+    assert metadata["streamed"] is True
+    assert metadata["dataset"] == "Sentinel-5P"
+    assert metadata["version"] == "03.00.01"
+    assert metadata["sort_run_count"] == 3
+    assert (metadata["raw_count"], metadata["qa_pass_count"], metadata["qa_fail_count"]) == (3, 2, 1)
+    assert (metadata["out_of_range_count"], metadata["out_of_aoi_count"]) == (0, 0)
+    assert raw_ids["observation_id"].tolist() == ["S5P-R1", "S5P-R2", "S5P-R3"]
+    assert raw_ids.loc[~raw_ids["qa_pass"], "observation_id"].tolist() == ["S5P-R2"]
+    assert metadata["observation_qa_path"] == str(run_dir / "raw" / "observation_ids.parquet")
+    assert processed["observation_id"].tolist() == ["S5P-R1", "S5P-R3"]
+    assert not list((run_dir / "processed").glob("sort-*"))
+
+
+def test_ingest_real_source_streaming_reads_ndjson(tmp_path: Path) -> None:
+    records = json.loads(REAL_SOURCE_FIXTURE.read_text())["observations"]
+    ndjson_path = tmp_path / "source.ndjson"
+    ndjson_path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    run_id, _ = _run_streaming_ingest(tmp_path / "out", f"file://{ndjson_path.resolve()}")
+
+    processed = pd.read_parquet(tmp_path / "out" / "ingest" / run_id / "processed" / "observations.parquet")
+    assert processed["observation_id"].tolist() == ["S5P-R1", "S5P-R3"]
+
+
+def test_streaming_parser_handles_small_chunks_and_trailing_header(tmp_path: Path) -> None:
+    payload = {
+        "observations": json.loads(REAL_SOURCE_FIXTURE.read_text())["observations"],
+        "dataset": "Sentinel-5P",
+        "version": "03.00.01",
+    }
+    source_path = tmp_path / "source.json"
+    source_path.write_text(json.dumps(payload, indent=2))
+
+    with tropomi_real_adapter.open_real_tropomi_stream(
+        f"file://{source_path.resolve()}",
+        start_date="2026-02-10",
+        end_date="2026-02-11",
+        aoi="permian",
+        timeout_seconds=5,
+        chunk_size=7,
+    ) as stream:
+        observations = list(stream.iter_observations())
+
+    assert [obs["observation_id"] for obs in observations] == ["S5P-R3", "S5P-R1", "S5P-R2"]
+    assert observations[0]["ch4_ppb"] == 1935.0
+    assert stream.header == {"dataset": "Sentinel-5P", "product": "TROPOMI-CH4", "version": "03.00.01"}
 
 
 def test_detect_generates_explainable_hotspots(tmp_path: Path) -> None:
@@ -111,7 +208,7 @@ def test_detect_generates_explainable_hotspots(tmp_path: Path) -> None:
             "--start-date",
             "2026-02-10",
             "--end-date",
-            "2026-02-11",
+            "2026-02-12",
             "--qa-threshold",
             "0.85",
             "--fixture",
@@ -127,7 +224,7 @@ def test_detect_generates_explainable_hotspots(tmp_path: Path) -> None:
             sys.executable,
             str(DETECT_JOB),
             "--ingest-run-id",
-            "2026-02-10_2026-02-11_permian",
+            "2026-02-10_2026-02-12_permian",
             "--anomaly-threshold-ppb",
             "40",
             "--output-root",
@@ -141,13 +238,67 @@ def test_detect_generates_explainable_hotspots(tmp_path: Path) -> None:
     run_id = payload["run_id"]
 
     hotspots = json.loads((tmp_path / "detect" / run_id / "hotspots.json").read_text())
-    assert hotspots["ingest_run_id"] == "2026-02-10_2026-02-11_permian"
+    assert hotspots["ingest_run_id"] == "2026-02-10_2026-02-12_permian"
     assert len(hotspots["hotspots"]) == 1
     assert hotspots["hotspots"][0]["anomaly_score"] == 47.0
     assert hotspots["hotspots"][0]["qa_pass_ratio"] == 0.75
     assert hotspots["hotspots"][0]["pixel_count"] == 1
 
 
+def test_in_process_stages_match_cli_artifacts(tmp_path: Path) -> None:
+    ingest_argv = ["--aoi", "permian", "--fixture", str(FIXTURE), "--output-root", str(tmp_path)]
+    subprocess.run([sys.executable, str(INGEST_JOB), *ingest_argv], check=True, capture_output=True)
+    subprocess.run(
+        [sys.executable, str(DETECT_JOB), "--ingest-run-id", "2026-02-10_2026-02-12_permian", "--output-root", str(tmp_path)],
+        check=True,
+        capture_output=True,
+    )
+
+    ingest = ingest_tropomi.run_ingest(ingest_tropomi.parse_args(ingest_argv))
+    detect = detect_hotspots.run_detect(detect_hotspots.parse_args([]), ingest.observations, ingest.metadata)
+
+    written = json.loads((tmp_path / "detect" / "2026-02-10_2026-02-12_permian" / "hotspots.json").read_text())
+    processed = pd.read_parquet(tmp_path / "ingest" / "2026-02-10_2026-02-12_permian" / "processed" / "observations.parquet")
+    assert ingest.run_id == detect.run_id == "2026-02-10_2026-02-12_permian"
+    assert ingest.observations.equals(processed)
+    assert detect.payload == written
+
+
+def test_detect_reads_json_processed_format_for_compatibility(tmp_path: Path) -> None:
+    subprocess.run(
+        [
+            sys.executable,
+            str(INGEST_JOB),
+            "--aoi",
+            "permian",
+            "--start-date",
+            "2026-02-10",
+            "--end-date",
+            "2026-02-12",
+            "--fixture",
+            str(FIXTURE),
+            "--processed-format",
+            "json",
+            "--output-root",
+            str(tmp_path),
+        ],
+        check=True,
+    )
+    run_id = "2026-02-10_2026-02-12_permian"
+    processed = json.loads((tmp_path / "ingest" / run_id / "processed" / "observations.json").read_text())
+    assert processed["aoi"] == "permian"
+    assert len(processed["observations"]) == 3
+
+    subprocess.run(
+        [sys.executable, str(DETECT_JOB), "--ingest-run-id", run_id, "--output-root", str(tmp_path)],
+        check=True,
+        capture_output=True,
+    )
+
+    hotspots = json.loads((tmp_path / "detect" / run_id / "hotspots.json").read_text())
+    assert [hotspot["id"] for hotspot in hotspots["hotspots"]] == ["hs-obs-0004"]
+
+
 def test_ingest_accepts_bbox_aoi_and_records_bbox_metadata(tmp_path: Path) -> None:
     result = subprocess.run(
         [
@@ -157,7 +308,7 @@ def test_ingest_accepts_bbox_aoi_and_records_bbox_metadata(tmp_path: Path) -> No
             "--start-date",
             "2026-02-10",
             "--end-date",
-            "2026-02-11",
+            "2026-02-12",
             "--fixture",
             str(FIXTURE),
             "--output-root",
@@ -192,3 +343,136 @@ def test_ingest_rejects_invalid_bbox_aoi(tmp_path: Path) -> None:
 
     assert result.returncode != 0
     assert "min_lon must be less than max_lon" in result.stderr
+
+
+def test_aoi_contains_is_exact_for_concave_polygons_with_holes() -> None:
+    # An L-shaped AOI with a square hole in its lower arm.
+    aoi = Aoi.from_geometry(
+        "l-shape",
+        {
+            "type": "Polygon",
+            "coordinates": [
+                [[0, 0], [4, 0], [4, 1], [1, 1], [1, 4], [0, 4], [0, 0]],
+                [[2, 0.25], [3, 0.25], [3, 0.75], [2, 0.75], [2, 0.25]],
+            ],
+        },
+    )
+    longitude = np.array([0.5, 3.5, 2.5, 2.5, 0.5, 5.0])
+    latitude = np.array([3.5, 0.5, 0.5, 2.5, 0.5, 0.5])
+
+    assert aoi.bbox == (0.0, 0.0, 4.0, 4.0)
+    assert aoi.contains(longitude, latitude).tolist() == [True, True, False, False, True, False]
+
+
+def test_aoi_contains_includes_every_edge_and_vertex() -> None:
+    square = load_registry().resolve("-104,31,-102,33")
+    # West, east, south and north edge midpoints, then two corners and points just outside.
+    longitude = np.array([-104.0, -102.0, -103.0, -103.0, -102.0, -104.0, -101.999, -103.0])
+    latitude = np.array([32.0, 32.0, 31.0, 33.0, 33.0, 31.0, 32.0, 33.001])
+    assert square.contains(longitude, latitude).tolist() == [True] * 6 + [False] * 2
+
+    triangle = Aoi.from_geometry("triangle", {"type": "Polygon", "coordinates": [[[0, 0], [4, 0], [0, 4], [0, 0]]]})
+    # On the diagonal, at its top vertex, then just beyond the diagonal.
+    assert triangle.contains(np.array([2.0, 0.0, 2.0]), np.array([2.0, 4.0, 2.001])).tolist() == [True, True, False]
+
+
+def test_aoi_clip_masks_dates_then_polygon_and_counts_drops() -> None:
+    aoi = load_registry().resolve("permian")
+    mask, counts = aoi.clip(
+        np.array([-102.1, -102.1, -90.0, -102.1]),
+        np.array([31.7, 31.7, 31.7, 31.7]),
+        np.array(["2026-02-10", "2026-02-12", "2026-02-11", "2026-02-11"]),
+        start_date="2026-02-10",
+        end_date="2026-02-12",
+    )
+
+    assert mask.tolist() == [True, False, False, True]
+    assert counts == {"out_of_range_count": 1, "out_of_aoi_count": 1}
+    assert load_registry() is load_registry()
+    assert load_registry().names == ["four-corners", "marcellus", "permian"]
+
+
+def test_ingest_clips_observations_to_aoi_and_date_range(tmp_path: Path) -> None:
+    payload = json.loads(FIXTURE.read_text())
+    outside = {**payload["observations"][2], "observation_id": "obs-outside", "latitude": 40.0, "longitude": -78.0}
+    late = {**payload["observations"][2], "observation_id": "obs-late", "observed_on": "2026-02-20"}
+    payload["observations"] += [outside, late]
+    fixture = tmp_path / "fixture.json"
+    fixture.write_text(json.dumps(payload))
+
+    args = ingest_tropomi.parse_args(
+        ["--fixture", str(fixture), "--aoi", "permian", "--start-date", "2026-02-10", "--end-date", "2026-02-12"]
+    )
+    result = ingest_tropomi.run_ingest(args)
+
+    assert result.metadata["raw_count"] == 6
+    assert result.metadata["out_of_aoi_count"] == 1
+    assert result.metadata["out_of_range_count"] == 1
+    assert (result.metadata["qa_pass_count"], result.metadata["qa_fail_count"]) == (3, 1)
+    assert result.observations["observation_id"].tolist() == ["obs-0002", "obs-0003", "obs-0004"]
+    assert "obs-outside" not in result.raw_refs["in_scope_observation_ids"]
+
+
+def test_aoi_index_assigns_points_to_every_overlapping_aoi() -> None:
+    registry = load_registry()
+    aois = [registry.resolve("permian"), registry.resolve("-103,31,-101,32"), registry.resolve("marcellus")]
+    rng = np.random.default_rng(3)
+    longitude = np.concatenate([rng.uniform(-110, -75, 5000), [np.nan]])
+    latitude = np.concatenate([rng.uniform(28, 44, 5000), [31.5]])
+
+    assigned = AoiIndex(aois, cell_deg=0.5).assign(longitude, latitude)
+
+    for aoi, rows in zip(aois, assigned):
+        assert rows.tolist() == np.flatnonzero(aoi.contains(longitude, latitude)).tolist()
+    assert set(assigned[1]) <= set(assigned[0])
+
+
+def test_batch_ingest_reads_source_once_and_matches_single_aoi_runs(tmp_path: Path, monkeypatch) -> None:
+    payload = json.loads(FIXTURE.read_text())
+    payload["observations"].append(
+        {**payload["observations"][2], "observation_id": "obs-fc", "latitude": 36.0, "longitude": -108.0}
+    )
+    reads = []
+
+    def _source(args):
+        # Like the real source, only return observations inside the queried bbox.
+        reads.append(args.query_aoi)
+        query = load_registry().resolve(args.query_aoi)
+        observations = payload["observations"]
+        in_bbox = query.in_bbox([row["longitude"] for row in observations], [row["latitude"] for row in observations])
+        return {**payload, "observations": [row for row, inside in zip(observations, in_bbox) if inside]}
+
+    monkeypatch.setitem(ingest_tropomi.SOURCE_READERS, "fixture", _source)
+    aois = ["permian", "four-corners", "marcellus"]
+    batch = ingest_tropomi.run_batch_ingest(ingest_tropomi.parse_args(["--aois", " ".join(aois)]))
+    singles = [ingest_tropomi.run_ingest(ingest_tropomi.parse_args(["--aoi", aoi])) for aoi in aois]
+
+    assert reads[0] == "-109.500000,30.300000,-76.500000,42.500000"
+    assert len(reads) == 1 + len(aois)
+    assert [result.run_id for result in batch] == [result.run_id for result in singles]
+    for batched, single in zip(batch, singles):
+        volatile = {"generated_at", "batch_aois", "batch_raw_count"}
+        assert {k: v for k, v in batched.metadata.items() if k not in volatile} == {
+            k: v for k, v in single.metadata.items() if k not in volatile
+        }
+        pd.testing.assert_frame_equal(batched.observations, single.observations)
+    assert batch[1].observations["observation_id"].tolist() == ["obs-fc"]
+    assert batch[1].metadata["raw_count"] == 1
+    assert {result.metadata["batch_raw_count"] for result in batch} == {len(payload["observations"])}
+    assert batch[2].metadata["raw_count"] == 0
+
+
+def test_batch_ingest_cli_writes_one_artifact_per_aoi(tmp_path: Path) -> None:
+    result = subprocess.run(
+        [sys.executable, str(INGEST_JOB), "--aois", "permian four-corners", "--fixture", str(FIXTURE), "--output-root", str(tmp_path)],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    report = json.loads(result.stdout)
+
+    assert report["run_ids"] == ["2026-02-10_2026-02-12_permian", "2026-02-10_2026-02-12_four-corners"]
+    for run_id in report["run_ids"]:
+        metadata = json.loads((tmp_path / "ingest" / run_id / "metadata.json").read_text())
+        assert metadata["batch_aois"] == ["permian", "four-corners"]
+        assert (tmp_path / "ingest" / run_id / "processed" / "observations.parquet").exists()
@@ -0,0 +1,430 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+LOAD_JOB = ROOT / "pipelines" / "jobs" / "load_hotspots.py"
+EMIT_JOB = ROOT / "pipelines" / "jobs" / "ingest_emit.py"
+LINK_JOB = ROOT / "pipelines" / "jobs" / "link_emitters.py"
+SEED_JOB = ROOT / "pipelines" / "jobs" / "seed_sample_data.py"
+
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+import bulk_load  # noqa: E402
+import ingest_emit  # noqa: E402
+import load_hotspots  # noqa: E402
+from run_catalog import RunCatalog  # noqa: E402
+import seed_sample_data  # noqa: E402
+import summaries  # noqa: E402
+
+
+def _write_detect_artifact(output_root: Path, run_id: str, hotspots: list[dict]) -> Path:
+    run_dir = output_root / "detect" / run_id
+    run_dir.mkdir(parents=True)
+    path = run_dir / "hotspots.json"
+    path.write_text(
+        json.dumps(
+            {"ingest_run_id": run_id, "baseline_ppb": 1900.0, "anomaly_threshold_ppb": 40.0, "hotspots": hotspots},
+            indent=2,
+        )
+    )
+    return path
+
+
+def _hotspot(hotspot_id: str, **overrides: object) -> dict:
+    return {
+        "id": hotspot_id,
+        "source_observation_id": hotspot_id.removeprefix("hs-"),
+        "observed_on": "2026-02-10",
+        "anomaly_score": 47.0,
+        "threshold": 40.0,
+        "qa_pass_ratio": 0.75,
+        "pixel_count": 1,
+        "area_km2": 25.893,
+        "centroid_latitude": 31.72,
+        "centroid_longitude": -102.08,
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[-102.1, 31.7], [-102.05, 31.7], [-102.05, 31.75], [-102.1, 31.75], [-102.1, 31.7]]],
+        },
+        **overrides,
+    }
+
+
+def test_hotspot_rows_stream_from_detect_artifact(tmp_path: Path) -> None:
+    path = _write_detect_artifact(tmp_path, "run-a", [_hotspot("hs-obs-0001"), _hotspot("hs-obs-0002", pixel_count=3)])
+
+    header: dict = {}
+    rows = list(load_hotspots.iter_hotspot_rows(path, header, "permian"))
+
+    assert [row[0] for row in rows] == ["hs-obs-0001", "hs-obs-0002"]
+    assert rows[1][4] == 3
+    assert json.loads(rows[0][6])["type"] == "Polygon"
+    assert rows[0][7] == "permian"
+    assert len(rows[0]) == len(load_hotspots.HOTSPOT_STAGING_COLUMNS)
+    assert header["ingest_run_id"] == "run-a"
+
+
+def test_hotspot_rows_reject_artifacts_without_geometry(tmp_path: Path) -> None:
+    legacy = _hotspot("hs-obs-0001")
+    legacy.pop("geometry")
+    path = _write_detect_artifact(tmp_path, "run-a", [legacy])
+
+    with pytest.raises(ValueError, match="re-run make detect"):
+        list(load_hotspots.iter_hotspot_rows(path, {}))
+
+
+def test_upsert_keeps_last_duplicate_and_skips_unchanged_rows() -> None:
+    statement = bulk_load.upsert_sql(
+        table="hotspots", staging_table="hotspots_staging", key="id", columns=load_hotspots.HOTSPOT_COLUMNS
+    ).as_string(None)
+
+    assert 'SELECT DISTINCT ON ("hotspots_staging"."id")' in statement
+    assert 'ORDER BY "hotspots_staging"."id", "hotspots_staging"."_ordinal" DESC' in statement
+    assert 'ON CONFLICT ("id") DO UPDATE SET' in statement
+    assert "IS DISTINCT FROM" in statement
+    assert '"emitter_id"' not in statement
+
+
+def test_hotspot_upsert_conflicts_on_partitioned_primary_key() -> None:
+    statement = bulk_load.upsert_sql(
+        table="hotspots", staging_table="hotspots_staging", key=load_hotspots.HOTSPOT_KEY, columns=load_hotspots.HOTSPOT_COLUMNS
+    ).as_string(None)
+
+    assert 'SELECT DISTINCT ON ("hotspots_staging"."id", "hotspots_staging"."observed_on")' in statement
+    assert 'ON CONFLICT ("id", "observed_on") DO UPDATE SET' in statement
+    assert '"observed_on" = EXCLUDED."observed_on"' not in statement
+
+
+def _catalog_detect_run(output_root: Path, run_id: str, aoi: str) -> None:
+    catalog = RunCatalog(output_root)
+    catalog.record("ingest", run_id, {"aoi": aoi, "start_date": "2031-06-01", "end_date": "2031-06-03"})
+    catalog.record("detect", run_id, {"input_ingest_run_id": run_id})
+
+
+def test_replace_scope_covers_the_detect_runs_aoi_and_window(tmp_path: Path) -> None:
+    _catalog_detect_run(tmp_path, "run-named", "permian")
+    _catalog_detect_run(tmp_path, "run-bbox", "bbox:-104.000000,31.000000,-102.000000,33.000000")
+
+    named = load_hotspots.replace_scope(tmp_path, "run-named")
+    bbox = load_hotspots.replace_scope(tmp_path, "run-bbox")
+
+    assert named == {"aoi": "permian", "start_date": "2031-06-01", "end_date": "2031-06-03"}
+    assert bbox["aoi"] == "bbox:-104.000000,31.000000,-102.000000,33.000000"
+    # Runs outside the catalog have no known scope and only upsert.
+    assert load_hotspots.replace_scope(tmp_path, "run-uncatalogued") is None
+
+
+class _MigrationCursor:
+    """Just enough of a cursor to drive apply_migrations against a recorded set."""
+
+    def __init__(self, applied: set[str] | None) -> None:
+        self.applied = applied
+        self.statements: list[str] = []
+        self._rows: list[tuple] = []
+
+    def execute(self, query: str, params: tuple = ()) -> None:
+        self.statements.append(query)
+        if "to_regclass" in query:
+            self._rows = [(self.applied is not None,)]
+        elif "SELECT name FROM schema_migrations" in query:
+            self._rows = [(name,) for name in sorted(self.applied)]
+        elif "CREATE TABLE IF NOT EXISTS schema_migrations" in query:
+            self.applied = set() if self.applied is None else self.applied
+        elif "INSERT INTO schema_migrations" in query:
+            self.applied.add(params[0])
+
+    def fetchone(self) -> tuple:
+        return self._rows[0]
+
+    def fetchall(self) -> list[tuple]:
+        return self._rows
+
+
+def test_apply_migrations_runs_each_file_once(tmp_path: Path) -> None:
+    (tmp_path / "001_init.sql").write_text("-- init")
+    (tmp_path / "002_index.sql").write_text("-- index")
+
+    fresh = _MigrationCursor(applied=None)
+    assert bulk_load.apply_migrations(fresh, tmp_path) == ["001_init.sql", "002_index.sql"]
+    assert fresh.applied == {"001_init.sql", "002_index.sql"}
+
+    partial = _MigrationCursor(applied={"001_init.sql"})
+    assert bulk_load.apply_migrations(partial, tmp_path) == ["002_index.sql"]
+    assert "-- init" not in partial.statements and "-- index" in partial.statements
+
+    # Fully migrated: one lookup, no lock and no DDL.
+    current = _MigrationCursor(applied={"001_init.sql", "002_index.sql"})
+    assert bulk_load.apply_migrations(current, tmp_path) == []
+    assert not any("advisory" in statement or "CREATE" in statement for statement in current.statements)
+
+
+def test_seed_rows_cover_every_fixture_emitter() -> None:
+    rows = list(seed_sample_data.iter_emitter_rows(seed_sample_data.FIXTURE_PATH))
+    fixture = json.loads(seed_sample_data.FIXTURE_PATH.read_text())
+
+    assert [row[0] for row in rows] == [feature["properties"]["id"] for feature in fixture["features"]]
+    assert all(len(row) == len(seed_sample_data.EMITTER_STAGING_COLUMNS) for row in rows)
+
+
+def test_aoi_rows_cover_fixture_presets() -> None:
+    rows = list(summaries.iter_aoi_rows())
+    fixture = json.loads(summaries.AOI_FIXTURE_PATH.read_text())
+
+    assert [name for name, _ in rows] == [feature["properties"]["name"] for feature in fixture["features"]]
+    assert all(json.loads(geometry)["type"] == "Polygon" for _, geometry in rows)
+
+
+def test_emit_plume_rows_stream_from_feature_collections(tmp_path: Path) -> None:
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "plumes.geojson").write_text(ingest_emit.DEFAULT_INPUT.read_text())
+    (tmp_path / "notes.txt").write_text("not a plume file")
+
+    paths = ingest_emit.plume_paths(tmp_path)
+    rows = list(ingest_emit.iter_plume_rows(paths))
+
+    assert paths == [tmp_path / "nested" / "plumes.geojson"]
+    assert [row[0] for row in rows] == ["emit-CH4_PlumeComplex-0101", "emit-CH4_PlumeComplex-0102", "emit-CH4_PlumeComplex-0103"]
+    assert {row[1] for row in rows} == {"EMIT"}
+    assert rows[0][2] == "2026-02-11"
+    metadata = json.loads(rows[0][3])
+    assert metadata["plume_id"] == "CH4_PlumeComplex-0101"
+    assert metadata["Max Plume Concentration (ppm m)"] == 1840.5
+    assert metadata["source_file"] == "plumes.geojson"
+    assert json.loads(rows[0][4])["type"] == "Polygon"
+
+
+def test_emit_plume_rows_reject_incomplete_plumes(tmp_path: Path) -> None:
+    point = {"type": "Feature", "properties": {"plume_id": "p-1", "observed_on": "2026-02-10"}, "geometry": {"type": "Point", "coordinates": [0, 0]}}
+
+    with pytest.raises(ValueError, match="Polygon"):
+        ingest_emit.plume_row(point, tmp_path / "plumes.geojson")
+    with pytest.raises(ValueError, match="plume ID"):
+        ingest_emit.plume_row({**point, "properties": {"plume_id": "p-1"}}, tmp_path / "plumes.geojson")
+    with pytest.raises(FileNotFoundError):
+        ingest_emit.plume_paths(tmp_path / "missing.geojson")
+
+
+@pytest.mark.skipif(os.getenv("DB_RUN_INTEGRATION") != "1", reason="Database integration requires a running PostGIS and explicit opt-in")
+def test_ingest_emit_links_plumes_to_nearest_emitter(tmp_path: Path) -> None:
+    from psycopg import connect
+
+    subprocess.run([sys.executable, str(SEED_JOB)], check=True, capture_output=True, text=True)
+    command = [sys.executable, str(EMIT_JOB), "--link-radius-km", "10"]
+    first = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+    second = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+
+    with connect(os.getenv("DATABASE_URL", bulk_load.DEFAULT_DATABASE_URL)) as conn:
+        links = dict(conn.execute("SELECT id, emitter_id FROM confirmations WHERE id LIKE 'emit-CH4_PlumeComplex-01%'").fetchall())
+
+    assert first["staged_count"] == 3
+    assert first["linked_count"] == second["linked_count"] == 2
+    assert second["unlinked_count"] == 1
+    assert second["link_changed_count"] == 0
+    assert links == {
+        "emit-CH4_PlumeComplex-0101": "em-001",
+        "emit-CH4_PlumeComplex-0102": "em-002",
+        "emit-CH4_PlumeComplex-0103": None,
+    }
+
+
+def test_relink_confirmations_without_changed_emitters_runs_nothing() -> None:
+    class _NoQueries:
+        def execute(self, *_args: object) -> None:
+            raise AssertionError("no statement expected")
+
+    relinked = ingest_emit.relink_confirmations(_NoQueries(), [], link_radius_km=10)
+    assert relinked == {"linked_count": 0, "unlinked_count": 0, "link_changed_count": 0}
+
+
+@pytest.mark.skipif(os.getenv("DB_RUN_INTEGRATION") != "1", reason="Database integration requires a running PostGIS and explicit opt-in")
+def test_link_emitters_links_plumes_ingested_before_their_emitter(tmp_path: Path) -> None:
+    from psycopg import connect
+
+    subprocess.run([sys.executable, str(SEED_JOB)], check=True, capture_output=True, text=True)
+    subprocess.run([sys.executable, str(EMIT_JOB), "--link-radius-km", "10"], check=True, capture_output=True, text=True)
+    # A hotspot over plume 0103, which had no emitter in range at ingest.
+    hotspot = _hotspot(
+        "hs-late-emitter",
+        observed_on="2026-02-09",
+        centroid_latitude=36.801,
+        centroid_longitude=-108.402,
+        geometry={
+            "type": "Polygon",
+            "coordinates": [[[-108.41, 36.79], [-108.39, 36.79], [-108.39, 36.81], [-108.41, 36.81], [-108.41, 36.79]]],
+        },
+    )
+    _write_detect_artifact(tmp_path, "run-late", [hotspot])
+    load = [sys.executable, str(LOAD_JOB), "--output-root", str(tmp_path), "--detect-run-id", "run-late"]
+    subprocess.run(load, check=True, capture_output=True, text=True)
+    report = json.loads(subprocess.run([sys.executable, str(LINK_JOB)], check=True, capture_output=True, text=True).stdout)
+
+    with connect(os.getenv("DATABASE_URL", bulk_load.DEFAULT_DATABASE_URL)) as conn:
+        emitter_id = conn.execute("SELECT emitter_id FROM hotspots WHERE id = 'hs-late-emitter'").fetchone()[0]
+        plume_emitter = conn.execute("SELECT emitter_id FROM confirmations WHERE id = 'emit-CH4_PlumeComplex-0103'").fetchone()[0]
+        # Leave plume 0103 without an emitter in range for the other EMIT tests.
+        conn.execute("DELETE FROM hotspots WHERE id = 'hs-late-emitter'")
+        conn.execute("UPDATE confirmations SET emitter_id = NULL WHERE emitter_id = %s", (emitter_id,))
+        conn.execute("DELETE FROM emitters WHERE id = %s", (emitter_id,))
+
+    assert emitter_id is not None
+    assert plume_emitter == emitter_id
+    assert report["confirmations_relinked"] >= 1
+
+
+@pytest.mark.skipif(os.getenv("DB_RUN_INTEGRATION") != "1", reason="Database integration requires a running PostGIS and explicit opt-in")
+def test_link_emitters_counts_each_day_once_and_accepts_backfilled_days(tmp_path: Path) -> None:
+    from psycopg import connect
+
+    far_away = {
+        "type": "Polygon",
+        "coordinates": [[[-120.1, 44.0], [-120.05, 44.0], [-120.05, 44.05], [-120.1, 44.05], [-120.1, 44.0]]],
+    }
+    place = {"geometry": far_away, "centroid_latitude": 44.025, "centroid_longitude": -120.075}
+    # A second hotspot on the same day from another run, then an earlier day backfilled.
+    runs = [
+        ("run-day-a", "hs-days-0001", "2031-08-10"),
+        ("run-day-b", "hs-days-0002", "2031-08-10"),
+        ("run-day-c", "hs-days-0003", "2031-08-05"),
+    ]
+    for run_id, hotspot_id, observed_on in runs:
+        _write_detect_artifact(tmp_path, run_id, [_hotspot(hotspot_id, observed_on=observed_on, **place)])
+        load = [sys.executable, str(LOAD_JOB), "--output-root", str(tmp_path), "--detect-run-id", run_id]
+        subprocess.run(load, check=True, capture_output=True, text=True)
+        subprocess.run([sys.executable, str(LINK_JOB)], check=True, capture_output=True, text=True)
+
+    with connect(os.getenv("DATABASE_URL", bulk_load.DEFAULT_DATABASE_URL)) as conn:
+        links = conn.execute("SELECT DISTINCT emitter_id FROM hotspots WHERE id LIKE 'hs-days-%'").fetchall()
+        [(emitter_id,)] = links
+        emitter = conn.execute(
+            "SELECT detection_count, last_seen::text, confidence::float8 FROM emitters WHERE id = %s", (emitter_id,)
+        ).fetchone()
+        conn.execute("DELETE FROM hotspots WHERE id LIKE 'hs-days-%'")
+        conn.execute("DELETE FROM emitters WHERE id = %s", (emitter_id,))
+
+    # Two hotspots on 2031-08-10 count as one detection day; the backfilled
+    # 2031-08-05 adds a day without moving last_seen back.
+    assert emitter == (2, "2031-08-10", 0.283)
+
+
+@pytest.mark.skipif(os.getenv("DB_RUN_INTEGRATION") != "1", reason="Database integration requires a running PostGIS and explicit opt-in")
+def test_load_hotspots_is_idempotent_against_postgis(tmp_path: Path) -> None:
+    _write_detect_artifact(tmp_path, "run-a", [_hotspot(f"hs-it-{idx:04d}") for idx in range(500)])
+    command = [sys.executable, str(LOAD_JOB), "--output-root", str(tmp_path), "--detect-run-id", "run-a"]
+
+    first = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+    second = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+
+    assert first["staged_count"] == 500
+    assert first["inserted_count"] + first["updated_count"] + first["skipped_count"] == 500
+    assert second["inserted_count"] == 0
+    assert second["updated_count"] == 0
+    assert second["skipped_count"] == 500
+
+
+@pytest.mark.skipif(os.getenv("DB_RUN_INTEGRATION") != "1", reason="Database integration requires a running PostGIS and explicit opt-in")
+def test_load_hotspots_refreshes_daily_summaries(tmp_path: Path) -> None:
+    from psycopg import connect
+
+    hotspots = [_hotspot(f"hs-sum-{idx:04d}", observed_on=f"2031-05-0{1 + idx % 2}", anomaly_score=40.0 + idx) for idx in range(6)]
+    _write_detect_artifact(tmp_path, "run-s", hotspots)
+    command = [sys.executable, str(LOAD_JOB), "--output-root", str(tmp_path), "--detect-run-id", "run-s"]
+    subprocess.run(command, check=True, capture_output=True, text=True)
+
+    with connect(os.getenv("DATABASE_URL", bulk_load.DEFAULT_DATABASE_URL)) as conn:
+        rows = conn.execute(
+            "SELECT observed_on::text, hotspot_count, max_anomaly_score::float8 FROM hotspot_daily_summary "
+            "WHERE observed_on IN ('2031-05-01', '2031-05-02') ORDER BY observed_on"
+        ).fetchall()
+        permian = conn.execute(
+            "SELECT hotspot_count FROM aoi_daily_summary WHERE aoi = 'permian' AND observed_on = '2031-05-01'"
+        ).fetchone()
+
+    assert rows == [("2031-05-01", 3, 44.0), ("2031-05-02", 3, 45.0)]
+    assert permian == (3,)
+
+
+@pytest.mark.skipif(os.getenv("DB_RUN_INTEGRATION") != "1", reason="Database integration requires a running PostGIS and explicit opt-in")
+def test_load_hotspots_creates_partitions_and_date_queries_prune(tmp_path: Path) -> None:
+    from psycopg import connect
+
+    _write_detect_artifact(tmp_path, "run-p", [_hotspot("hs-part-0001", observed_on="2019-03-14")])
+    command = [sys.executable, str(LOAD_JOB), "--output-root", str(tmp_path), "--detect-run-id", "run-p"]
+    subprocess.run(command, check=True, capture_output=True, text=True)
+
+    with connect(os.getenv("DATABASE_URL", bulk_load.DEFAULT_DATABASE_URL)) as conn:
+        partition = conn.execute("SELECT to_regclass('hotspots_p2019_03')::text").fetchone()
+        plan = "\n".join(
+            row[0]
+            for row in conn.execute(
+                "EXPLAIN SELECT id FROM hotspots WHERE observed_on BETWEEN '2019-03-01' AND '2019-03-31'"
+            ).fetchall()
+        )
+
+    assert partition == ("hotspots_p2019_03",)
+    assert set(re.findall(r"hotspots_p\d{4}_\d{2}\b", plan)) == {"hotspots_p2019_03"}
+
+
+@pytest.mark.skipif(os.getenv("DB_RUN_INTEGRATION") != "1", reason="Database integration requires a running PostGIS and explicit opt-in")
+def test_reloading_a_redetected_run_deletes_its_stale_hotspots(tmp_path: Path) -> None:
+    from psycopg import connect
+
+    _catalog_detect_run(tmp_path, "run-r", "permian")
+    path = _write_detect_artifact(
+        tmp_path, "run-r", [_hotspot("hs-re-0001", observed_on="2031-06-01"), _hotspot("hs-re-0002", observed_on="2031-06-02")]
+    )
+    # Same window and place, loaded for an overlapping bbox AOI: owned by that
+    # run, so never deleted by run-r's reloads.
+    _catalog_detect_run(tmp_path, "run-other", "bbox:-103.000000,31.000000,-101.000000,32.000000")
+    _write_detect_artifact(tmp_path, "run-other", [_hotspot("hs-re-other", observed_on="2031-06-01")])
+    command = [sys.executable, str(LOAD_JOB), "--output-root", str(tmp_path), "--detect-run-id"]
+    subprocess.run([*command, "run-other"], check=True, capture_output=True, text=True)
+    subprocess.run([*command, "run-r"], check=True, capture_output=True, text=True)
+
+    database_url = os.getenv("DATABASE_URL", bulk_load.DEFAULT_DATABASE_URL)
+    with connect(database_url) as conn:
+        conn.execute(
+            "INSERT INTO emitters (id, name, confidence, detection_count, last_seen, geom) "
+            "VALUES ('em-reload', 'Reload test', 0.284, 2, '2031-06-02', ST_SetSRID(ST_MakePoint(-102.075, 31.725), 4326)) "
+            "ON CONFLICT (id) DO UPDATE SET detection_count = 2, last_seen = '2031-06-02'"
+        )
+        conn.execute("UPDATE hotspots SET emitter_id = 'em-reload' WHERE id IN ('hs-re-0001', 'hs-re-0002')")
+
+    # Re-detection drops hs-re-0001 and finds nothing on 2031-06-02 either.
+    path.unlink()
+    path.parent.rmdir()
+    _write_detect_artifact(tmp_path, "run-r", [_hotspot("hs-re-0003", observed_on="2031-06-01")])
+    reload = json.loads(subprocess.run([*command, "run-r"], check=True, capture_output=True, text=True).stdout)
+
+    with connect(database_url) as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM hotspots WHERE id LIKE 'hs-re-%' ORDER BY id").fetchall()]
+        summary = conn.execute(
+            "SELECT observed_on::text, hotspot_count FROM aoi_daily_summary "
+            "WHERE aoi = 'permian' AND observed_on IN ('2031-06-01', '2031-06-02') ORDER BY observed_on"
+        ).fetchall()
+        emitter = conn.execute("SELECT detection_count, confidence::float8 FROM emitters WHERE id = 'em-reload'").fetchone()
+        conn.execute("DELETE FROM emitters WHERE id = 'em-reload'")
+
+    assert reload["deleted_count"] == 2
+    assert reload["replace_scope"] == {"aoi": "permian", "start_date": "2031-06-01", "end_date": "2031-06-03"}
+    assert ids == ["hs-re-0003", "hs-re-other"]
+    assert summary == [("2031-06-01", 2)]
+    # Both of its linked hotspots were deleted, so the emitter counts no detections.
+    assert emitter == (0, 0.0)
+
+
+@pytest.mark.skipif(os.getenv("DB_RUN_INTEGRATION") != "1", reason="Database integration requires a running PostGIS and explicit opt-in")
+def test_apply_migrations_records_every_file_against_postgis() -> None:
+    from psycopg import connect
+
+    with connect(os.getenv("DATABASE_URL", bulk_load.DEFAULT_DATABASE_URL)) as conn:
+        with conn.transaction(), conn.cursor() as cur:
+            bulk_load.apply_migrations(cur)
+            assert bulk_load.apply_migrations(cur) == []
+        recorded = [row[0] for row in conn.execute("SELECT name FROM schema_migrations ORDER BY name").fetchall()]
+
+    assert recorded == sorted(path.name for path in bulk_load.MIGRATIONS_DIR.glob("*.sql"))
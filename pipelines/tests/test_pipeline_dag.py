@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+PIPELINE_JOB = ROOT / "pipelines" / "jobs" / "run_pipeline.py"
+FIXTURE = ROOT / "pipelines" / "fixtures" / "sample_tropomi_observations.json"
+
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+import ingest_tropomi  # noqa: E402
+import run_pipeline  # noqa: E402
+from pipeline_dag import Task, fingerprint, run_dag  # noqa: E402
+
+
+def _record(calls: list[str], name: str) -> dict:
+    calls.append(name)
+    return {"name": name}
+
+
+def _fail() -> dict:
+    raise RuntimeError("boom")
+
+
+def test_run_dag_respects_dependencies_and_blocks_descendants_of_failures() -> None:
+    calls: list[str] = []
+    tasks = [
+        Task(key="detect:a", stage="detect", fn=_record, args=(calls, "detect:a"), deps=("ingest:a",)),
+        Task(key="ingest:a", stage="ingest", fn=_record, args=(calls, "ingest:a")),
+        Task(key="ingest:b", stage="ingest", fn=_fail),
+        Task(key="detect:b", stage="detect", fn=_record, args=(calls, "detect:b"), deps=("ingest:b",)),
+        Task(key="load:b", stage="load", fn=_record, args=(calls, "load:b"), deps=("detect:b",)),
+    ]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = run_dag(tasks, executor)
+
+    assert calls == ["ingest:a", "detect:a"]
+    assert results["detect:a"]["status"] == "ran"
+    assert results["detect:a"]["report"] == {"name": "detect:a"}
+    assert results["ingest:b"]["status"] == "failed"
+    assert "boom" in results["ingest:b"]["error"]
+    assert results["detect:b"] == {"status": "blocked", "blocked_by": ["ingest:b"]}
+    assert results["load:b"] == {"status": "blocked", "blocked_by": ["detect:b"]}
+
+
+def test_run_dag_skips_fresh_tasks_unless_forced() -> None:
+    calls: list[str] = []
+    recorded: dict[str, str] = {}
+    task = Task(
+        key="detect:a",
+        stage="detect",
+        fn=_record,
+        args=(calls, "detect:a"),
+        fingerprint=lambda: "fp-1",
+        recorded_fingerprint=lambda: recorded.get("detect:a"),
+        on_success=lambda report, task_fingerprint, seconds: recorded.update({"detect:a": task_fingerprint}),
+    )
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        first = run_dag([task], executor)
+        second = run_dag([task], executor)
+        forced = run_dag([task], executor, force=True)
+
+    assert first["detect:a"]["status"] == "ran"
+    assert second["detect:a"] == {"status": "skipped", "fingerprint": "fp-1"}
+    assert forced["detect:a"]["status"] == "ran"
+    assert calls == ["detect:a", "detect:a"]
+
+
+def test_run_dag_serializes_tasks_sharing_a_resource() -> None:
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0}
+
+    def load() -> dict:
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return {}
+
+    tasks = [Task(key=f"load:{idx}", stage="load", fn=load, resource="database") for idx in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = run_dag(tasks, executor)
+
+    assert {result["status"] for result in results.values()} == {"ran"}
+    assert active["max"] == 1
+
+
+def test_run_dag_rejects_unknown_dependencies_and_cycles() -> None:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(ValueError, match="unknown"):
+            run_dag([Task(key="a", stage="x", fn=dict, deps=("missing",))], executor)
+        with pytest.raises(ValueError, match="cycle"):
+            run_dag(
+                [Task(key="a", stage="x", fn=dict, deps=("b",)), Task(key="b", stage="x", fn=dict, deps=("a",))],
+                executor,
+            )
+
+
+def test_fingerprint_tracks_params_and_input_files(tmp_path: Path) -> None:
+    dataset = tmp_path / "points"
+    (dataset / "observed_on=2026-02-01").mkdir(parents=True)
+    part = dataset / "observed_on=2026-02-01" / "part-0.parquet"
+    part.write_bytes(b"one")
+
+    first = fingerprint({"qa": 0.5}, [dataset])
+
+    assert fingerprint({"qa": 0.5}, [dataset]) == first
+    assert fingerprint({"qa": 0.6}, [dataset]) != first
+    part.write_bytes(b"three")
+    assert fingerprint({"qa": 0.5}, [dataset]) != first
+
+
+def test_date_windows_split_half_open_range() -> None:
+    assert run_pipeline.date_windows("2026-02-01", "2026-02-08", 0) == [("2026-02-01", "2026-02-08")]
+    assert run_pipeline.date_windows("2026-02-01", "2026-02-08", 3) == [
+        ("2026-02-01", "2026-02-04"),
+        ("2026-02-04", "2026-02-07"),
+        ("2026-02-07", "2026-02-08"),
+    ]
+
+
+def test_adjacent_ingest_windows_do_not_share_days() -> None:
+    def observation_ids(start_date: str, end_date: str) -> list[str]:
+        argv = ["--fixture", str(FIXTURE), "--aoi", "permian", "--start-date", start_date, "--end-date", end_date]
+        return ingest_tropomi.run_ingest(ingest_tropomi.parse_args(argv)).observations["observation_id"].tolist()
+
+    windows = run_pipeline.date_windows("2026-02-10", "2026-02-12", 1)
+    assert windows == [("2026-02-10", "2026-02-11"), ("2026-02-11", "2026-02-12")]
+    per_window = [observation_ids(start, end) for start, end in windows]
+
+    assert set(per_window[0]).isdisjoint(per_window[1])
+    assert sorted(per_window[0] + per_window[1]) == sorted(observation_ids("2026-02-10", "2026-02-12"))
+    assert per_window[1] == ["obs-0004"]
+
+
+def test_pipeline_runs_partitions_in_parallel_and_skips_fresh_stages(tmp_path: Path) -> None:
+    command = [
+        sys.executable,
+        str(PIPELINE_JOB),
+        "--source",
+        "fixture",
+        "--fixture",
+        str(FIXTURE),
+        "--aoi",
+        "permian",
+        "--aoi",
+        "four-corners",
+        "--start",
+        "2026-02-10",
+        "--end",
+        "2026-02-12",
+        "--max-workers",
+        "2",
+        "--output-root",
+        str(tmp_path),
+    ]
+    env = {name: value for name, value in os.environ.items() if not name.startswith(("INGEST_", "DETECT_"))}
+
+    first = json.loads(subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout)
+    second = json.loads(subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout)
+    env["DETECT_ANOMALY_THRESHOLD_PPB"] = "35"
+    third_result = subprocess.run(command, check=True, capture_output=True, text=True, env=env)
+    third = json.loads(third_result.stdout)
+
+    assert first["status_counts"] == {"ran": 4}
+    assert second["status_counts"] == {"skipped": 4}
+    assert third["status_counts"] == {"skipped": 2, "ran": 2}
+
+    metadata = json.loads((Path(third["artifact_dir"]) / "metadata.json").read_text())
+    statuses = {task["key"]: task["status"] for task in metadata["tasks"]}
+    assert statuses["ingest:2026-02-10_2026-02-12_permian"] == "skipped"
+    assert statuses["detect:2026-02-10_2026-02-12_four-corners"] == "ran"
+    assert set(metadata["stage_seconds"]) == {"ingest", "detect"}
+
+    detect_metadata = json.loads((tmp_path / "detect" / "2026-02-10_2026-02-12_permian" / "metadata.json").read_text())
+    assert detect_metadata["anomaly_threshold_ppb"] == 35.0
+    assert detect_metadata["input_fingerprint"]
+    assert detect_metadata["stage_seconds"] >= 0
+
+
+def test_pipeline_in_process_hands_observations_to_detect_without_artifact(tmp_path: Path) -> None:
+    command = [
+        sys.executable,
+        str(PIPELINE_JOB),
+        "--source",
+        "fixture",
+        "--fixture",
+        str(FIXTURE),
+        "--start",
+        "2026-02-10",
+        "--end",
+        "2026-02-12",
+        "--in-process",
+        "--no-persist-observations",
+        "--max-workers",
+        "1",
+        "--output-root",
+        str(tmp_path),
+    ]
+    env = {name: value for name, value in os.environ.items() if not name.startswith(("INGEST_", "DETECT_"))}
+
+    first = json.loads(subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout)
+    second = json.loads(subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout)
+
+    run_dir = tmp_path / "ingest" / "2026-02-10_2026-02-12_permian"
+    ingest_metadata = json.loads((run_dir / "metadata.json").read_text())
+    hotspots = json.loads((tmp_path / "detect" / "2026-02-10_2026-02-12_permian" / "hotspots.json").read_text())
+    assert first["status_counts"] == {"ran": 1}
+    assert second["status_counts"] == {"skipped": 1}
+    assert ingest_metadata["processed_path"] is None
+    assert not (run_dir / "processed" / "observations.parquet").exists()
+    assert len(hotspots["hotspots"]) == 1
+
+
+def test_real_source_ingest_is_fresh_only_for_trackable_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = tmp_path / "observations.json"
+    source.write_text(FIXTURE.read_text())
+    assert run_pipeline.real_source_inputs(source.as_uri()) == [source]
+    assert run_pipeline.real_source_inputs("https://example.org/ch4") is None
+
+    args = argparse.Namespace(
+        source="real", fixture=FIXTURE, output_root=tmp_path, in_process=False, load=False, persist_observations=True
+    )
+    partition = {"aoi": "permian", "start_date": "2026-02-10", "end_date": "2026-02-12", "run_id": "run"}
+
+    def ingest_task() -> Task:
+        return next(task for task in run_pipeline.build_tasks(args, [partition]) if task.key == "ingest:run")
+
+    monkeypatch.setenv("INGEST_REAL_SOURCE_URL", "https://example.org/ch4")
+    assert ingest_task().fingerprint is None
+
+    monkeypatch.setenv("INGEST_REAL_SOURCE_URL", source.as_uri())
+    before = ingest_task().fingerprint()
+    source.write_text(FIXTURE.read_text() + "\n")
+    assert ingest_task().fingerprint() != before
+
+
+def test_stage_code_fingerprint_covers_imported_job_modules() -> None:
+    modules = run_pipeline.local_modules("detect_hotspots")
+
+    assert {"detect_engine", "hotspot_clustering", "background", "observation_store"} <= set(modules)
+    assert {"aoi_registry", "tropomi_real_adapter"} <= set(run_pipeline.local_modules("ingest_tropomi"))
+    # Third-party and standard-library imports are not part of the closure.
+    assert not {"numpy", "pandas", "json"} & set(modules)
+
+
+def test_recent_fetch_partitions_always_run_and_ingest_tracks_aoi_presets(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("GEE_CACHE_RECENT_DAYS", "5")
+    today = date(2026, 3, 10)
+    assert run_pipeline.overlaps_recent_days("2026-03-06", today)
+    assert not run_pipeline.overlaps_recent_days("2026-03-05", today)
+    monkeypatch.setenv("GEE_CACHE_RECENT_DAYS", "0")
+    assert not run_pipeline.overlaps_recent_days("2026-03-10", today)
+    monkeypatch.delenv("GEE_CACHE_RECENT_DAYS")
+
+    args = argparse.Namespace(output_root=tmp_path, in_process=False, load=False, persist_observations=True, fixture=FIXTURE)
+    recent_end = (datetime.now(UTC).date() + timedelta(days=1)).isoformat()
+    windows = [("2026-02-10", "2026-02-12", "old"), ("2026-02-10", recent_end, "recent")]
+    partitions = [{"aoi": "permian", "start_date": start, "end_date": end, "run_id": run_id} for start, end, run_id in windows]
+    tasks = {task.key: task for task in run_pipeline.build_tasks(argparse.Namespace(**vars(args), source="gee"), partitions)}
+    assert tasks["fetch:old"].fingerprint is not None
+    assert tasks["fetch:recent"].fingerprint is None
+
+    aoi_presets = tmp_path / "aoi.geojson"
+    aoi_presets.write_text(run_pipeline.DEFAULT_AOI_PRESETS.read_text())
+    monkeypatch.setattr(run_pipeline, "DEFAULT_AOI_PRESETS", aoi_presets)
+
+    def ingest_fingerprint() -> str:
+        fixture_tasks = run_pipeline.build_tasks(argparse.Namespace(**vars(args), source="fixture"), partitions[:1])
+        return next(task for task in fixture_tasks if task.key == "ingest:old").fingerprint()
+
+    before = ingest_fingerprint()
+    aoi_presets.write_text(aoi_presets.read_text() + "\n")
+    assert ingest_fingerprint() != before
@@ -0,0 +1,82 @@
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+FIXTURE = ROOT / "pipelines" / "fixtures" / "sample_tropomi_observations.json"
+
+sys.path.append(str(ROOT / "pipelines" / "jobs"))
+
+import detect_hotspots  # noqa: E402
+import ingest_tropomi  # noqa: E402
+import run_catalog  # noqa: E402
+from run_catalog import RunCatalog  # noqa: E402
+
+
+def _ingest(output_root: Path, aoi: str, start_date: str) -> str:
+    argv = [f"--aoi={aoi}", "--start-date", start_date, "--end-date", "2026-02-12", "--fixture", str(FIXTURE)]
+    return ingest_tropomi.main([*argv, "--output-root", str(output_root)])["run_id"]
+
+
+def test_stages_record_runs_and_latest_follows_completion_order(tmp_path: Path) -> None:
+    permian = _ingest(tmp_path, "permian", "2026-02-10")
+    # Sorts before the permian run by name, but completed after it.
+    bbox = _ingest(tmp_path, "-104,31,-102,33", "2026-02-01")
+    assert bbox < permian
+
+    catalog = RunCatalog(tmp_path)
+    assert catalog.latest("ingest")["run_id"] == bbox
+    assert catalog.latest("ingest", aoi="permian")["run_id"] == permian
+    assert catalog.latest("ingest", aoi="delaware") is None
+
+    recorded = catalog.get("ingest", permian)
+    assert (recorded["start_date"], recorded["end_date"]) == ("2026-02-10", "2026-02-12")
+    assert recorded["counts"]["qa_pass_count"] > 0
+    assert recorded["params"]["qa_threshold"] == 0.85
+    assert recorded["paths"]["artifact_dir"] == str(tmp_path / "ingest" / permian)
+    assert "qa_fail_ids" not in recorded["params"]
+
+    # Without --ingest-run-id, detect reads the catalog instead of listing ingest/.
+    assert detect_hotspots.main(["--output-root", str(tmp_path)])["run_id"] == bbox
+    detect_run_id = detect_hotspots.main(["--aoi", "permian", "--output-root", str(tmp_path)])["run_id"]
+
+    lineage = catalog.lineage("detect", detect_run_id)
+    assert [(run["stage"], run["run_id"]) for run in lineage] == [("detect", detect_run_id), ("ingest", permian)]
+    # Detect metadata carries no AOI or dates of its own; they come from the ingest run.
+    assert (lineage[0]["aoi"], lineage[0]["start_date"]) == ("permian", "2026-02-10")
+    assert [run["run_id"] for run in catalog.children("ingest", permian)] == [detect_run_id]
+
+
+def test_backfill_indexes_existing_artifacts(tmp_path: Path) -> None:
+    runs = {
+        ("ingest", "b-run"): {"aoi": "permian", "raw_count": 4, "generated_at": "2026-02-02T00:00Z"},
+        ("ingest", "a-run"): {"aoi": "permian", "raw_count": 2, "generated_at": "2026-02-04T00:00Z"},
+        ("detect", "a-run"): {"input_ingest_run_id": "a-run", "candidate_count": 1, "generated_at": "2026-02-04T01:00Z"},
+    }
+    for (stage, run_id), metadata in runs.items():
+        run_dir = tmp_path / stage / run_id
+        run_dir.mkdir(parents=True)
+        (run_dir / "metadata.json").write_text(json.dumps(metadata))
+
+    assert run_catalog.main(["--output-root", str(tmp_path), "backfill"]) == {"recorded_count": 3}
+    assert run_catalog.main(["--output-root", str(tmp_path), "backfill"]) == {"recorded_count": 0}
+
+    catalog = RunCatalog(tmp_path)
+    assert catalog.latest("ingest", aoi="permian")["run_id"] == "a-run"
+    assert catalog.get("ingest", "b-run")["counts"] == {"raw_count": 4}
+    lineage = run_catalog.main(["--output-root", str(tmp_path), "lineage", "detect", "a-run"])["lineage"]
+    assert [(run["stage"], run["aoi"]) for run in lineage] == [("detect", "permian"), ("ingest", "permian")]
+
+
+def test_rerun_replaces_row_and_keeps_fingerprint_column(tmp_path: Path) -> None:
+    catalog = RunCatalog(tmp_path)
+    catalog.record("detect", "run", {"input_ingest_run_id": "ingest-run", "candidate_count": 3})
+    catalog.set_fingerprint("detect", "run", "abc")
+    assert catalog.get("detect", "run")["input_fingerprint"] == "abc"
+
+    rerun = {"input_ingest_run_id": "ingest-run", "candidate_count": 5, "input_fingerprint": "def"}
+    catalog.record("detect", "run", rerun)
+    recorded = catalog.get("detect", "run")
+    assert recorded["counts"] == {"candidate_count": 5}
+    assert recorded["input_fingerprint"] == "def"
+    assert (recorded["parent_stage"], recorded["parent_run_id"]) == ("ingest", "ingest-run")